@@ -1,9 +1,9 @@
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
-from chat.models import Message, Chat
+from chat.models import ChatReadCursor, Message, Chat
+from common.channel_layer import publish
+from common.encoders import encode_frame
 from common.serializers import (
     NonNullDynamicFieldsModelSerializer,
 )
@@ -36,6 +36,14 @@ class EditMessageSerializer(NonNullDynamicFieldsModelSerializer):
             )
         return super().validate(attrs)
 
+    def update(self, instance, validated_data):
+        instance = super().update(instance, validated_data)
+        if instance.is_read:
+            ChatReadCursor.objects.mark_read(
+                instance.chat_id, self.context["request"].user, instance.pk
+            )
+        return instance
+
 
 class ChatSerializer(NonNullDynamicFieldsModelSerializer):
     last_message = serializers.SerializerMethodField()
@@ -46,15 +54,31 @@ class ChatSerializer(NonNullDynamicFieldsModelSerializer):
         read_only_fields = ["messages", "last_message", "unread_count"]
 
     def get_last_message(self, chat: Chat):
-        try:
-            last_message = chat.messages.latest("created_at")
-        except Message.DoesNotExist:
-            last_message = None
-        if last_message:
-            return MessageSerializer(last_message).data
+        if chat.last_message:
+            return MessageSerializer(chat.last_message).data
         return MessageSerializer().data
 
 
+class ReadMessagesSerializer(serializers.Serializer):
+    message = serializers.IntegerField(
+        required=False,
+        help_text="Последнее прочитанное сообщение, "
+        "по умолчанию последнее сообщение чата",
+    )
+
+    def validate_message(self, value):
+        chat = self.context["chat"]
+        if not chat.messages.filter(pk=value).exists():
+            raise ValidationError("Сообщение не найдено в чате")
+        return value
+
+
+class ChatReadCursorSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ChatReadCursor
+        fields = ("chat", "last_read_message", "unread_count")
+
+
 class CreateMessageSerializer(NonNullDynamicFieldsModelSerializer):
     class Meta:
         model = Message
@@ -64,19 +88,19 @@ class CreateMessageSerializer(NonNullDynamicFieldsModelSerializer):
         validated_data["author"] = self.context["request"].user
 
         instance = super().create(validated_data)
+        self.message_data = MessageSerializer().to_representation(instance)
 
-        channel_layer = get_channel_layer()
-        group_name = str(instance.chat.pk)
-
-        # Transforming created instance to dict and sending it to websocket
-        async_to_sync(channel_layer.group_send)(
-            group_name,
-            {
-                "type": "chat_message",
-                "message": self.to_representation(instance),
-            },
+        # Sending created message to websocket of the chat
+        publish(
+            [str(instance.chat_id)],
+            {"type": "chat_message", "text": encode_frame(self.message_data)},
         )
         return instance
 
     def to_representation(self, instance):
+        # Created message is represented once for the websocket
+        # and the response
+        message_data = getattr(self, "message_data", None)
+        if message_data is not None and message_data["id"] == instance.pk:
+            return message_data
         return MessageSerializer().to_representation(instance)
@@ -1,25 +1,58 @@
-from django.db.models import Sum
-from rest_framework import generics
+from django.db.models import Prefetch
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import generics, status
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 from rest_framework_nested.viewsets import NestedViewSetMixin
 
 from chat.api.serializers import (
+    ChatReadCursorSerializer,
     ChatSerializer,
     MessageSerializer,
     CreateMessageSerializer,
     EditMessageSerializer,
+    ReadMessagesSerializer,
 )
-from chat.models import Chat, Message
+from chat.models import Chat, ChatReadCursor, Message
+from common.pagination import CURSOR_MODE, PAGE_MODE
 from common.views import MultiSerializerMixin
+from company.models import Company
+from exchange.models import Review
+
+
+def get_author_prefetch_lookups(author: str) -> list:
+    """
+    Lookups prefetching companies of the authors of messages serialized
+    by MessageSerializer, f.e. "last_message__author" for chats
+    """
+    reviewer_lookups = [
+        Prefetch(
+            f"created_by__{company}", Company.objects.prefetch_for_serializer()
+        )
+        for company in ("my_company", "company")
+    ]
+    companies = Company.objects.prefetch_for_serializer().prefetch_related(
+        Prefetch(
+            "review_set",
+            Review.objects.prefetch_related(*reviewer_lookups),
+        )
+    )
+    return [
+        Prefetch(f"{author}__{company}", companies)
+        for company in ("my_company", "company")
+    ]
 
 
 class ChatsViewSet(
     generics.ListAPIView, generics.RetrieveAPIView, GenericViewSet
 ):
     serializer_class = ChatSerializer
-    queryset = Chat.objects.prefetch_related("messages").all()
+    queryset = Chat.objects.select_related(
+        "last_message__author"
+    ).prefetch_related(*get_author_prefetch_lookups("last_message__author"))
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -36,18 +69,40 @@ class ChatsViewSet(
 
         return queryset
 
-    def get_total_unread_count(self):
-        return self.get_queryset().aggregate(
-            total_unread_count=Sum("unread_count")
-        )["total_unread_count"]
-
     def list(self, request, *args, **kwargs):
+        ChatReadCursor.objects.create_missing(
+            request.user, Chat.objects.filter_user_chats(request.user)
+        )
         base_response = super().list(request, *args, **kwargs)
         base_response.data[
             "total_unread_count"
-        ] = self.get_total_unread_count()
+        ] = ChatReadCursor.objects.get_total_unread_count(request.user)
         return base_response
 
+    @swagger_auto_schema(
+        request_body=ReadMessagesSerializer,
+        responses={status.HTTP_200_OK: ChatReadCursorSerializer()},
+    )
+    @action(methods=["POST"], detail=True)
+    def read(self, request, *args, **kwargs):
+        """
+        Marks messages of the chat up to the given one as read
+        """
+        chat = self.get_object()
+        serializer = ReadMessagesSerializer(
+            data=request.data, context={"chat": chat}
+        )
+        serializer.is_valid(raise_exception=True)
+        message_id = serializer.validated_data.get(
+            "message", chat.last_message_id
+        )
+        if message_id is not None:
+            ChatReadCursor.objects.mark_read(chat.pk, request.user, message_id)
+        cursor, _ = ChatReadCursor.objects.get_or_create(
+            chat=chat, user=request.user
+        )
+        return Response(ChatReadCursorSerializer(cursor).data)
+
 
 class MessageViewSet(
     NestedViewSetMixin,
@@ -58,44 +113,83 @@ class MessageViewSet(
     generics.CreateAPIView,
     generics.UpdateAPIView,
 ):
+    pagination_modes = (PAGE_MODE, CURSOR_MODE)
     default_serializer_class = MessageSerializer
     serializer_classes = {
         "create": CreateMessageSerializer,
         "update": EditMessageSerializer,
         "partial_update": EditMessageSerializer,
     }
-    queryset = Message.objects.all().prefetch_related("author")
+    queryset = Message.objects.select_related("author").prefetch_related(
+        *get_author_prefetch_lookups("author")
+    )
     parent_lookup_kwargs = {"chat_pk": "chat__pk"}
     permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset.none()
+        return queryset.filter(chat__in=Chat.objects.filter_user_chats(user))
+
+    def get_chat(self) -> Chat:
+        """
+        Chat of the url, if the user participates in it
+        """
+        return get_object_or_404(
+            Chat.objects.filter_user_chats(self.request.user),
+            pk=self.kwargs["chat_pk"],
+        )
+
+    def perform_create(self, serializer):
+        # Message is created in the chat of the url, whatever chat is sent
+        serializer.save(chat=self.get_chat())
+
+    def set_read_status(self, messages):
+        """
+        Message is read if any other user of the chat has read it
+        """
+        read_marks = ChatReadCursor.objects.get_read_marks(
+            self.kwargs["chat_pk"]
+        )
+        for message in messages:
+            message.is_read = message.is_read or any(
+                user_id != message.author_id and last_read_id >= message.pk
+                for user_id, last_read_id in read_marks.items()
+            )
+
     def retrieve(self, request, *args, **kwargs):
         """Overriding retrieve method, so we can mark messages as read after request"""
 
         message = self.get_object()
-        if message.author != request.user and not message.is_read:
-            message.is_read = True
-            message.save()
+        if message.author != request.user:
+            ChatReadCursor.objects.mark_read(
+                message.chat_id, request.user, message.pk
+            )
+        self.set_read_status([message])
         serializer = MessageSerializer(message)
         return Response(serializer.data)
 
     def list(self, request, *args, **kwargs):
-        """Overriding retrieve method, so we can mark messages as read after request"""
+        """
+        Overriding list method, so we can mark messages as read after request.
+        Only the newest message of the page moves the read mark of the user
+        """
+        self.get_chat()
         queryset = self.get_queryset()
 
         paginator_class = self.pagination_class()
         paginated_queryset = paginator_class.paginate_queryset(
             queryset, request, view=self
         )
-        messages_data = paginator_class.get_paginated_response(
+        if paginated_queryset:
+            ChatReadCursor.objects.mark_read(
+                self.kwargs["chat_pk"],
+                request.user,
+                max(message.pk for message in paginated_queryset),
+            )
+        self.set_read_status(paginated_queryset)
+        return paginator_class.get_paginated_response(
             MessageSerializer(paginated_queryset, many=True).data
         )
-
-        to_update = []
-        for message in paginated_queryset:
-            to_update.append(message.pk)
-            message.is_read = True
-
-        Message.objects.filter(id__in=to_update).exclude(
-            author=request.user
-        ).update(is_read=True)
-        return messages_data
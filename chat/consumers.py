@@ -1,12 +1,9 @@
-import json
-
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from django.db import close_old_connections
 from rest_framework import status
 
 from chat.models import Chat
-from common.utils import DecimalEncoder
 
 
 class ChatConsumer(AsyncJsonWebsocketConsumer):
@@ -23,11 +20,14 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
             await self.disconnect(status.HTTP_401_UNAUTHORIZED)
             return
 
-        self.chat_db_obj, created = await database_sync_to_async(
-            Chat.objects.get_or_create
-        )(id=self.chat_id)
-
-        # TODO: Check if user has access to this chat
+        has_access = await database_sync_to_async(
+            Chat.objects.filter_user_chats(self.user)
+            .filter(pk=self.chat_id)
+            .exists
+        )()
+        if not has_access:
+            await self.close()
+            return
 
         # Join room group
         await self.channel_layer.group_add(
@@ -46,5 +46,5 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
 
     # Receive message from room group
     async def chat_message(self, event):
-        message: dict = event["message"]
-        await self.send_json(json.dumps(message, cls=DecimalEncoder))
+        # Frame is encoded once by the sender for all consumers of the group
+        await self.send(text_data=event["text"])
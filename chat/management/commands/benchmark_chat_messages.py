@@ -0,0 +1,247 @@
+import asyncio
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from common import encoders
+from common.channel_layer import FLUSH_TIMEOUT, Publisher, get_publisher
+from common.query_budget import create_dataset
+
+User = get_user_model()
+
+
+def send_messages(chat_id: int, author_id: int, count: int) -> float:
+    """
+    Creates messages with the API, returns duration in seconds.
+    Executed in the worker processes
+    """
+    author = User.objects.get(pk=author_id)
+    client = Client(HTTP_AUTHORIZATION=f"JWT {AccessToken.for_user(author)}")
+    url = reverse("messages-list", kwargs={"chat_pk": chat_id})
+
+    started_at = time.perf_counter()
+    for i in range(count):
+        response = client.post(
+            url,
+            {"chat": chat_id, "content": f"Сообщение {i}"},
+            content_type="application/json",
+        )
+        if response.status_code != 201:
+            raise RuntimeError(
+                f"Message is not created: {response.status_code}"
+            )
+    duration = time.perf_counter() - started_at
+    # Frames are published in background, the worker process
+    # is stopped without running atexit handlers
+    get_publisher().flush(FLUSH_TIMEOUT)
+    return duration
+
+
+def group_send_synchronously(publisher, group_name: str, message: dict):
+    """
+    Previous publishing: request waits for the channel layer
+    """
+    async_to_sync(get_channel_layer().group_send)(group_name, message)
+
+
+async def add_consumers(group_name: str, count: int) -> list:
+    channel_layer = get_channel_layer()
+    channel_names = []
+    for _ in range(count):
+        channel_name = await channel_layer.new_channel()
+        await channel_layer.group_add(group_name, channel_name)
+        channel_names.append(channel_name)
+    return channel_names
+
+
+async def receive_frames(channel_names: list, expected: int, timeout: float):
+    """
+    Receives frames of the chat by the consumers, returns number of
+    received and invalid frames and time of the last frame
+    """
+    channel_layer = get_channel_layer()
+    received, invalid, last_received_at = 0, 0, None
+
+    async def receive(channel_name):
+        nonlocal received, invalid, last_received_at
+        for _ in range(expected):
+            try:
+                message = await asyncio.wait_for(
+                    channel_layer.receive(channel_name), timeout
+                )
+            except asyncio.TimeoutError:
+                return
+            last_received_at = time.perf_counter()
+            received += 1
+            # Frame is a JSON object encoded once
+            if not isinstance(json.loads(message["text"]), dict):
+                invalid += 1
+
+    await asyncio.gather(*(receive(name) for name in channel_names))
+    return received, invalid, last_received_at
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures throughput of chat messages in a test database: messages "
+        "per second created with the API by every worker process and "
+        "frames per second delivered to the consumers of the chat "
+        "by the channel layer"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--messages",
+            type=int,
+            default=500,
+            help="Number of messages created by every worker",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of processes creating messages",
+        )
+        parser.add_argument(
+            "--consumers",
+            type=int,
+            default=10,
+            help="Number of consumers connected to the chat",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=30,
+            help="Seconds to wait for the frame before counting the rest "
+            "of the frames as lost",
+        )
+        parser.add_argument(
+            "--baseline",
+            action="store_true",
+            help="Publish synchronously and encode with json of the standard "
+            "library, as before the background publisher",
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            if options["workers"] > 1 and connection.vendor == "sqlite":
+                raise CommandError(
+                    "Several workers require database shared by processes"
+                )
+            with ExitStack() as stack:
+                # Do not touch the real cache, debug toolbar and
+                # the query log are not measured
+                stack.enter_context(
+                    override_settings(
+                        CACHES={
+                            "default": {
+                                "BACKEND": "django.core.cache.backends"
+                                ".locmem.LocMemCache"
+                            }
+                        },
+                        DEBUG=False,
+                    )
+                )
+                if options["baseline"]:
+                    stack.enter_context(
+                        mock.patch.object(
+                            Publisher, "group_send", group_send_synchronously
+                        )
+                    )
+                    stack.enter_context(
+                        mock.patch.object(encoders, "orjson", None)
+                    )
+                self.benchmark(create_dataset(), options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+    def benchmark(self, dataset: dict, options: dict):
+        chat_id = dataset["ids"]["chat"]
+        author_id = dataset["users"]["company_admin"].pk
+        workers, count = options["workers"], options["messages"]
+        expected = workers * count
+
+        # Consumers are run in the loop of the publisher
+        loop = get_publisher().loop
+        channel_names = asyncio.run_coroutine_threadsafe(
+            add_consumers(str(chat_id), options["consumers"]), loop
+        ).result()
+        receiving = asyncio.run_coroutine_threadsafe(
+            receive_frames(channel_names, expected, options["timeout"]), loop
+        )
+
+        started_at = time.perf_counter()
+        if workers == 1:
+            # Requests are handled in a thread of the loop of the consumers,
+            # like sync views by the ASGI server, so the in-memory layer
+            # wakes the consumers too
+            durations = [
+                asyncio.run_coroutine_threadsafe(
+                    sync_to_async(send_messages, thread_sensitive=False)(
+                        chat_id, author_id, count
+                    ),
+                    loop,
+                ).result()
+            ]
+        else:
+            # Connections can't be shared with the forked processes
+            connections.close_all()
+            with ProcessPoolExecutor(
+                workers, mp_context=multiprocessing.get_context("fork")
+            ) as executor:
+                durations = list(
+                    executor.map(
+                        send_messages,
+                        [chat_id] * workers,
+                        [author_id] * workers,
+                        [count] * workers,
+                    )
+                )
+        received, invalid, last_received_at = receiving.result()
+
+        for worker, duration in enumerate(durations, 1):
+            self.stdout.write(
+                f"Worker {worker}: {count} messages, "
+                f"{count / duration:.1f} messages/s"
+            )
+        self.stdout.write(
+            f"Total: {expected / max(durations):.1f} messages/s "
+            f"by {workers} workers"
+        )
+        frames = expected * len(channel_names)
+        if received:
+            self.stdout.write(
+                f"Delivered {received}/{frames} frames to "
+                f"{len(channel_names)} consumers, "
+                f"{received / (last_received_at - started_at):.1f} frames/s"
+            )
+        else:
+            self.stdout.write(f"Delivered 0/{frames} frames")
+        if invalid:
+            self.stdout.write(f"Invalid frames: {invalid}")
+        self.stdout.write(
+            f"Encoder: {'orjson' if encoders.orjson is not None else 'json'}, "
+            f"publishing: {'sync' if options['baseline'] else 'background'}"
+        )
@@ -4,6 +4,8 @@ from django.contrib.auth.models import AnonymousUser
 from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import AccessToken
 
+from common.utils import current_user
+
 User = get_user_model()
 
 
@@ -38,11 +40,13 @@ class QueryAuthMiddleware:
         self.app = app
 
     async def __call__(self, scope, receive, send, *args, **kwargs):
-        if "user" in scope:
-            return await self.app(scope, receive, send)
-
-        token = scope["query_string"].decode().replace("token=", "")
+        if "user" not in scope:
+            token = scope["query_string"].decode().replace("token=", "")
+            scope["user"] = await get_user(token)
 
-        scope["user"] = await get_user(token)
-
-        return await self.app(scope, receive, send)
+        # Makes user available for common.utils.get_current_user
+        context_token = current_user.set(scope["user"])
+        try:
+            return await self.app(scope, receive, send)
+        finally:
+            current_user.reset(context_token)
@@ -0,0 +1,103 @@
+# Generated by Django 4.1.7 on 2026-10-17 13:07
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_last_message(apps, schema_editor):
+    Chat = apps.get_model("chat", "Chat")
+    Message = apps.get_model("chat", "Message")
+    Chat.objects.update(
+        last_message=models.Subquery(
+            Message.objects.filter(chat=models.OuterRef("pk"))
+            .order_by("-created_at", "-id")
+            .values("id")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("chat", "0004_alter_message_options"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chat",
+            name="last_message",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="chat.message",
+                verbose_name="Последнее сообщение",
+            ),
+        ),
+        migrations.CreateModel(
+            name="ChatReadCursor",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "unread_count",
+                    models.PositiveIntegerField(
+                        default=0,
+                        verbose_name="Количество непрочитанных сообщений",
+                    ),
+                ),
+                (
+                    "chat",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="read_cursors",
+                        to="chat.chat",
+                        verbose_name="Чат",
+                    ),
+                ),
+                (
+                    "last_read_message",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="chat.message",
+                        verbose_name="Последнее прочитанное сообщение",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="chat_read_cursors",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Прочитанные сообщения чата",
+                "verbose_name_plural": "Прочитанные сообщения чатов",
+                "db_table": "chat_read_cursors",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="chatreadcursor",
+            constraint=models.UniqueConstraint(
+                fields=("user", "chat"), name="unique_chat_read_cursor"
+            ),
+        ),
+        migrations.RunPython(fill_last_message, migrations.RunPython.noop),
+    ]
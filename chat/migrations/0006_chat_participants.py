@@ -0,0 +1,144 @@
+# Generated by Django 4.1.7 on 2026-10-17 13:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_participants(apps, schema_editor):
+    """
+    Companies of the deals and logists of the offers with companies
+    of their transport applications participate in their chats
+    """
+    ChatParticipant = apps.get_model("chat", "ChatParticipant")
+    RecyclablesDeal = apps.get_model("exchange", "RecyclablesDeal")
+    EquipmentDeal = apps.get_model("exchange", "EquipmentDeal")
+    LogisticsOffer = apps.get_model("logistics", "LogisticsOffer")
+
+    participants = set()
+    for deal_model in (RecyclablesDeal, EquipmentDeal):
+        for chat_id, *company_ids in (
+            deal_model.objects.filter(chat__isnull=False)
+            .values_list("chat_id", "supplier_company_id", "buyer_company_id")
+            .iterator()
+        ):
+            for company_id in company_ids:
+                participants.add((chat_id, company_id, None))
+    for chat_id, user_id, company_id in (
+        LogisticsOffer.objects.filter(chat__isnull=False)
+        .values_list(
+            "chat_id", "logist_id", "application__created_by__company_id"
+        )
+        .iterator()
+    ):
+        participants.add((chat_id, None, user_id))
+        participants.add((chat_id, company_id, None))
+
+    ChatParticipant.objects.bulk_create(
+        (
+            ChatParticipant(
+                chat_id=chat_id, company_id=company_id, user_id=user_id
+            )
+            for chat_id, company_id, user_id in participants
+            if company_id is not None or user_id is not None
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("company", "0018_alter_company_bank_name_alter_company_bic_and_more"),
+        ("exchange", "0027_recyclablesapplication_coordinates_index"),
+        ("logistics", "0020_alter_contractor_address"),
+        ("chat", "0005_chat_read_cursors"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChatParticipant",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "chat",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="participants",
+                        to="chat.chat",
+                        verbose_name="Чат",
+                    ),
+                ),
+                (
+                    "company",
+                    models.ForeignKey(
+                        blank=True,
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="chat_participants",
+                        to="company.company",
+                        verbose_name="Компания",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="chat_participants",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Участник чата",
+                "verbose_name_plural": "Участники чатов",
+                "db_table": "chat_participants",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="chatparticipant",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("company__isnull", False)),
+                fields=("company", "chat"),
+                name="unique_chat_participant_company",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="chatparticipant",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("user__isnull", False)),
+                fields=("user", "chat"),
+                name="unique_chat_participant_user",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="chatparticipant",
+            constraint=models.CheckConstraint(
+                check=models.Q(
+                    models.Q(
+                        ("company__isnull", False), ("user__isnull", True)
+                    ),
+                    models.Q(
+                        ("company__isnull", True), ("user__isnull", False)
+                    ),
+                    _connector="OR",
+                ),
+                name="chat_participant_company_or_user",
+            ),
+        ),
+        migrations.RunPython(fill_participants, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.1.7 on 2026-10-17 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0006_chat_participants"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["chat", "created_at", "id"],
+                name="chat_messag_chat_id_01b68d_idx",
+            ),
+        ),
+    ]
@@ -2,48 +2,49 @@
 from bulk_update_or_create import BulkUpdateOrCreateQuerySet
 from django.conf import settings
 from django.db import models
-from django.db.models import Count, Q, Max
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.urls import reverse
 
 from common.models import BaseModel, BaseNameModel
+from notification.push import push_chat_unread_count
 from user.models import UserRole
 
 
 class ChatsQuerySet(BulkUpdateOrCreateQuerySet, models.QuerySet):
     def annotate_unread_messages(self, user, *args, **kwargs):
         return self.annotate(
-            unread_count=Count(
-                "messages",
-                filter=(
-                    Q(messages__is_read=False) & ~Q(messages__author=user)
+            unread_count=Coalesce(
+                Subquery(
+                    ChatReadCursor.objects.filter(
+                        chat=OuterRef("pk"), user=user
+                    ).values("unread_count")[:1]
                 ),
+                0,
             )
         )
 
     def annotate_latest_message(self, *args, **kwargs):
-        return self.annotate(latest_created_at=Max("messages__created_at"))
+        return self.annotate(latest_created_at=F("last_message__created_at"))
+
+    def refresh_last_message(self):
+        return self.update(
+            last_message=Subquery(
+                Message.objects.filter(chat=OuterRef("pk"))
+                .order_by("-created_at", "-id")
+                .values("id")[:1]
+            )
+        )
 
     def filter_user_chats(self, user):
         if user.role == UserRole.COMPANY_ADMIN:
-            return self.__filter_for_company_admin(user)
+            if user.company_id is None:
+                return self.none()
+            return self.filter(participants__company=user.company_id)
         if user.role == UserRole.LOGIST:
-            return self.__filter_for_logist(user)
+            return self.filter(participants__user=user)
         return self
 
-    def __filter_for_company_admin(self, user):
-        return self.filter(
-            Q(deal__buyer_company=user.company)
-            | Q(deal__supplier_company=user.company)
-            | Q(equipment_deal__buyer_company=user.company)
-            | Q(equipment_deal__supplier_company=user.company)
-            | Q(
-                logisticsoffer__transportapplication__created_by__company=user.company
-            )
-        )
-
-    def __filter_for_logist(self, user):
-        return self.filter(logisticsoffer__logist=user)
-
 
 class Chat(BaseNameModel):
     class Meta:
@@ -51,6 +52,15 @@ class Chat(BaseNameModel):
         verbose_name = "Чат"
         verbose_name_plural = "Чаты"
 
+    last_message = models.ForeignKey(
+        "Message",
+        verbose_name="Последнее сообщение",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+
     objects = ChatsQuerySet.as_manager()
 
     def get_absolute_url(self):
@@ -74,8 +84,274 @@ class Message(BaseModel):
         db_table = "chat_messages"
         verbose_name = "Сообщение чата"
         verbose_name_plural = "Сообщения чата"
+        # History of the chat is paginated by (created_at, id)
+        indexes = [models.Index(fields=["chat", "created_at", "id"])]
 
     def get_absolute_url(self):
         return reverse(
             "messages", kwargs={"chat_pk": self.chat.pk, "pk": self.pk}
         )
+
+
+def get_unread_count_subquery(user, last_read_message_id: int):
+    """
+    Number of messages of the chat of the cursor after the last read message,
+    except messages of the user
+    """
+    return Coalesce(
+        Subquery(
+            Message.objects.filter(
+                chat=OuterRef("chat"), id__gt=last_read_message_id
+            )
+            .exclude(author=user)
+            .order_by()
+            .values("chat")
+            .annotate(count=Count("id"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+class ChatReadCursorQuerySet(models.QuerySet):
+    def create_missing(self, user, chats: models.QuerySet) -> int:
+        """
+        Creates cursors of the user for the chats without them. Messages
+        not marked as read before the cursors are counted as unread.
+        Only participants of the chats (company admins and logists) get
+        cursors, other users get cursors of the chats they read
+        """
+        if user.role not in (UserRole.COMPANY_ADMIN, UserRole.LOGIST):
+            return 0
+        chat_ids = list(
+            chats.exclude(
+                pk__in=self.filter(user=user).values("chat_id")
+            ).values_list("pk", flat=True)
+        )
+        if not chat_ids:
+            return 0
+        unread_counts = dict(
+            Message.objects.filter(chat_id__in=chat_ids, is_read=False)
+            .exclude(author=user)
+            .order_by()
+            .values("chat_id")
+            .annotate(count=Count("id"))
+            .values_list("chat_id", "count")
+        )
+        created = self.bulk_create(
+            (
+                ChatReadCursor(
+                    chat_id=chat_id,
+                    user=user,
+                    unread_count=unread_counts.get(chat_id, 0),
+                )
+                for chat_id in chat_ids
+            ),
+            ignore_conflicts=True,
+        )
+        return len(created)
+
+    def mark_read(self, chat_id: int, user, message_id: int) -> bool:
+        """
+        Moves cursor of the user forward to the message, recounts
+        messages left unread and pushes the count to other connections
+        of the user. Returns whether the cursor is moved
+        """
+        updated = self.filter(
+            Q(last_read_message__isnull=True)
+            | Q(last_read_message__lt=message_id),
+            chat_id=chat_id,
+            user=user,
+        ).update(
+            last_read_message_id=message_id,
+            # Expressions of UPDATE see the previous cursor
+            unread_count=get_unread_count_subquery(user, message_id),
+        )
+        if not updated:
+            if self.filter(chat_id=chat_id, user=user).exists():
+                # Cursor is ahead of the message already
+                return False
+            self.bulk_create(
+                [
+                    ChatReadCursor(
+                        chat_id=chat_id,
+                        user=user,
+                        last_read_message_id=message_id,
+                        unread_count=Message.objects.filter(
+                            chat_id=chat_id, id__gt=message_id
+                        )
+                        .exclude(author=user)
+                        .count(),
+                    )
+                ],
+                ignore_conflicts=True,
+            )
+        push_chat_unread_count(
+            chat_id, user.pk, self.get_unread_count(chat_id, user)
+        )
+        return True
+
+    def get_read_marks(self, chat_id: int) -> dict:
+        """
+        Returns ids of the last messages read by the users of the chat
+        """
+        return dict(
+            self.filter(
+                chat_id=chat_id, last_read_message__isnull=False
+            ).values_list("user_id", "last_read_message_id")
+        )
+
+    def get_unread_count(self, chat_id: int, user) -> int:
+        unread_count = (
+            self.filter(chat_id=chat_id, user=user)
+            .values_list("unread_count", flat=True)
+            .first()
+        )
+        if unread_count is not None:
+            return unread_count
+        # Messages read before the cursors were marked one by one
+        return (
+            Message.objects.filter(chat_id=chat_id, is_read=False)
+            .exclude(author=user)
+            .count()
+        )
+
+    def get_total_unread_count(self, user) -> int:
+        """
+        Number of unread messages of the chats the user participates in,
+        cursors of chats the user left are skipped
+        """
+        return (
+            self.filter(
+                user=user, chat__in=Chat.objects.filter_user_chats(user)
+            ).aggregate(total_unread_count=Sum("unread_count"))[
+                "total_unread_count"
+            ]
+            or 0
+        )
+
+
+class ChatReadCursor(models.Model):
+    """
+    Last message of the chat read by the user and number of messages
+    received after it, so unread messages aren't counted on every request
+    """
+
+    chat = models.ForeignKey(
+        Chat,
+        verbose_name="Чат",
+        on_delete=models.CASCADE,
+        related_name="read_cursors",
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name="Пользователь",
+        on_delete=models.CASCADE,
+        related_name="chat_read_cursors",
+        # Lookups by user use the unique index
+        db_index=False,
+    )
+    last_read_message = models.ForeignKey(
+        Message,
+        verbose_name="Последнее прочитанное сообщение",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    unread_count = models.PositiveIntegerField(
+        "Количество непрочитанных сообщений", default=0
+    )
+
+    objects = ChatReadCursorQuerySet.as_manager()
+
+    class Meta:
+        db_table = "chat_read_cursors"
+        verbose_name = "Прочитанные сообщения чата"
+        verbose_name_plural = "Прочитанные сообщения чатов"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "chat"], name="unique_chat_read_cursor"
+            )
+        ]
+
+
+class ChatParticipantQuerySet(models.QuerySet):
+    def set_companies(self, chat_id: int, company_ids):
+        """
+        Makes the companies the only companies participating in the chat
+        """
+        company_ids = [pk for pk in company_ids if pk is not None]
+        self.filter(chat_id=chat_id, company__isnull=False).exclude(
+            company__in=company_ids
+        ).delete()
+        self.bulk_create(
+            (
+                ChatParticipant(chat_id=chat_id, company_id=company_id)
+                for company_id in company_ids
+            ),
+            ignore_conflicts=True,
+        )
+
+    def add_user(self, chat_id: int, user_id: int):
+        self.bulk_create(
+            [ChatParticipant(chat_id=chat_id, user_id=user_id)],
+            ignore_conflicts=True,
+        )
+
+
+class ChatParticipant(models.Model):
+    """
+    Company or user participating in the chat. Companies participate in
+    chats of their deals, logists in chats of their offers
+    """
+
+    chat = models.ForeignKey(
+        Chat,
+        verbose_name="Чат",
+        on_delete=models.CASCADE,
+        related_name="participants",
+    )
+    company = models.ForeignKey(
+        "company.Company",
+        verbose_name="Компания",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="chat_participants",
+        # Lookups by company use the unique index
+        db_index=False,
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name="Пользователь",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="chat_participants",
+        db_index=False,
+    )
+
+    objects = ChatParticipantQuerySet.as_manager()
+
+    class Meta:
+        db_table = "chat_participants"
+        verbose_name = "Участник чата"
+        verbose_name_plural = "Участники чатов"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["company", "chat"],
+                condition=Q(company__isnull=False),
+                name="unique_chat_participant_company",
+            ),
+            models.UniqueConstraint(
+                fields=["user", "chat"],
+                condition=Q(user__isnull=False),
+                name="unique_chat_participant_user",
+            ),
+            models.CheckConstraint(
+                check=Q(company__isnull=False, user__isnull=True)
+                | Q(company__isnull=True, user__isnull=False),
+                name="chat_participant_company_or_user",
+            ),
+        ]
@@ -0,0 +1,38 @@
+from django.db.models import F, Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from chat.models import Chat, ChatParticipant, ChatReadCursor, Message
+from exchange.models import EquipmentDeal, RecyclablesDeal
+from notification.push import push_chat_message
+
+
+@receiver(post_save, sender=Message)
+def handle_new_message(sender, instance: Message, created, **kwargs):
+    if not created:
+        return
+    # Messages created out of order don't replace the later one
+    Chat.objects.filter(
+        Q(last_message__isnull=True) | Q(last_message__lt=instance.pk),
+        pk=instance.chat_id,
+    ).update(last_message=instance)
+    ChatReadCursor.objects.filter(chat_id=instance.chat_id).exclude(
+        user_id=instance.author_id
+    ).update(unread_count=F("unread_count") + 1)
+    push_chat_message(
+        instance,
+        ChatParticipant.objects.filter(chat_id=instance.chat_id).values_list(
+            "company_id", "user_id"
+        ),
+    )
+
+
+@receiver(post_save, sender=RecyclablesDeal)
+@receiver(post_save, sender=EquipmentDeal)
+def handle_deal_save(sender, instance, **kwargs):
+    # Companies of the deal can be changed after its creation
+    if instance.chat_id:
+        ChatParticipant.objects.set_companies(
+            instance.chat_id,
+            [instance.supplier_company_id, instance.buyer_company_id],
+        )
@@ -0,0 +1,123 @@
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from chat.consumers import ChatConsumer
+from chat.models import Chat, ChatParticipant, Message
+from company.models import Company
+from user.models import UserRole
+
+User = get_user_model()
+
+
+class MessagesAccessTest(APITestCase):
+    """
+    Messages of the chat are available only to its participants
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.participant, cls.stranger = (
+            User.objects.create(
+                phone=f"+7999000000{i}", role=UserRole.COMPANY_ADMIN
+            )
+            for i in range(2)
+        )
+        for i, user in enumerate((cls.participant, cls.stranger)):
+            user.company = Company.objects.create(
+                name=f"Компания {i}", inn=f"{i:010d}", owner=user
+            )
+            user.save()
+        cls.chat = Chat.objects.create(name="Чат")
+        ChatParticipant.objects.set_companies(
+            cls.chat.pk, [cls.participant.company_id]
+        )
+        cls.message = Message.objects.create(
+            chat=cls.chat, author=cls.participant, content="Сообщение"
+        )
+        cls.stranger_chat = Chat.objects.create(name="Чат другой компании")
+        ChatParticipant.objects.set_companies(
+            cls.stranger_chat.pk, [cls.stranger.company_id]
+        )
+
+    def test_participant(self):
+        self.client.force_authenticate(self.participant)
+        url = f"/api/chats/{self.chat.pk}/messages/"
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(
+            self.client.get(f"{url}{self.message.pk}/").status_code, 200
+        )
+        response = self.client.post(
+            url, {"chat": self.chat.pk, "content": "Ответ"}
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def test_non_participant(self):
+        self.client.force_authenticate(self.stranger)
+        url = f"/api/chats/{self.chat.pk}/messages/"
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(
+            self.client.get(f"{url}{self.message.pk}/").status_code, 404
+        )
+        response = self.client.post(
+            url, {"chat": self.chat.pk, "content": "Сообщение"}
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(self.chat.messages.filter(author=self.stranger))
+
+    def test_create_in_other_chat(self):
+        self.client.force_authenticate(self.stranger)
+        response = self.client.post(
+            f"/api/chats/{self.stranger_chat.pk}/messages/",
+            {"chat": self.chat.pk, "content": "Сообщение"},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["chat"], self.stranger_chat.pk)
+        self.assertFalse(self.chat.messages.filter(author=self.stranger))
+
+
+class ChatMessageFrameTest(APITestCase):
+    """
+    Frame of the created message is encoded once by the sender
+    and sent by consumers as is
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            phone="+79990000000", role=UserRole.COMPANY_ADMIN
+        )
+        cls.user.company = Company.objects.create(
+            name="Компания", inn="0000000000", owner=cls.user
+        )
+        cls.user.save()
+        cls.chat = Chat.objects.create(name="Чат")
+        ChatParticipant.objects.set_companies(
+            cls.chat.pk, [cls.user.company_id]
+        )
+
+    @mock.patch("chat.api.serializers.publish")
+    def test_frame(self, publish):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            f"/api/chats/{self.chat.pk}/messages/", {"content": "Сообщение"}
+        )
+        self.assertEqual(response.status_code, 201)
+
+        publish.assert_called_once()
+        group_names, event = publish.call_args.args
+        self.assertEqual(group_names, [str(self.chat.pk)])
+        self.assertEqual(event["type"], "chat_message")
+        # Plain JSON object, not a JSON string with the encoded object
+        frame = json.loads(event["text"])
+        self.assertIsInstance(frame, dict)
+        self.assertEqual(frame["id"], response.data["id"])
+        self.assertEqual(frame["content"], "Сообщение")
+
+        consumer = ChatConsumer()
+        with mock.patch.object(consumer, "send") as send:
+            async_to_sync(consumer.chat_message)(event)
+        send.assert_called_once_with(text_data=event["text"])
@@ -0,0 +1,15 @@
+from importlib import import_module
+
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class CommonConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "common"
+
+    def ready(self):
+        # Cached responses are invalidated by receivers connected on import
+        # of the views, so processes not serving requests (commands,
+        # workers) invalidate them as well
+        import_module(settings.ROOT_URLCONF)
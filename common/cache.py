@@ -0,0 +1,179 @@
+import hashlib
+import json
+import uuid
+from functools import wraps
+from typing import Iterable
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from rest_framework.response import Response
+
+RESPONSE_CACHE_PREFIX = "response_cache"
+RESPONSE_CACHE_TIMEOUT = 60 * 5
+
+# Names of cached actions (f.e. "StatisticsViewSet.total_deals")
+_cached_actions = set()
+
+
+def _get_version_key(model_label: str) -> str:
+    return f"{RESPONSE_CACHE_PREFIX}:version:{model_label}"
+
+
+def _get_counter_key(action_name: str, counter: str) -> str:
+    return f"{RESPONSE_CACHE_PREFIX}:{counter}:{action_name}"
+
+
+def _increment_counter(action_name: str, counter: str):
+    key = _get_counter_key(action_name, counter)
+    # Counters never expire, add() creates the key only once
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Key was evicted between add() and incr()
+        cache.set(key, 1, None)
+
+
+def invalidate_cached_responses(*model_labels: str):
+    """
+    Invalidates all cached responses which depend on given models.
+    Responses are not deleted, instead version of the models is changed,
+    so keys of the cached responses are not used anymore
+    """
+    cache.set_many(
+        {_get_version_key(label): uuid.uuid4().hex for label in model_labels},
+        None,
+    )
+
+
+def get_response_cache_key(
+    request, action_name: str, depends_on: Iterable[str], per_user: bool
+) -> str:
+    """
+    Makes key of the response from the action, normalized query params,
+    user role (and user itself, if response is user specific) and
+    versions of the models response depends on
+    """
+    user = request.user
+    versions = cache.get_many(
+        [_get_version_key(label) for label in depends_on]
+    )
+    key_data = {
+        "action": action_name,
+        "host": request.get_host(),
+        "path": request.path,
+        "params": sorted(
+            (key, sorted(values))
+            for key, values in request.query_params.lists()
+        ),
+        "role": user.role if user.is_authenticated else None,
+        "user": user.pk if per_user else None,
+        "versions": sorted(versions.items()),
+    }
+    key_hash = hashlib.md5(
+        json.dumps(key_data, default=str).encode()
+    ).hexdigest()
+    return f"{RESPONSE_CACHE_PREFIX}:{action_name}:{key_hash}"
+
+
+def cache_response(
+    depends_on: Iterable[str],
+    timeout: int = RESPONSE_CACHE_TIMEOUT,
+    per_user_params: Iterable[str] = ("is_my",),
+):
+    """
+    Caches successful responses of viewset action.
+
+    depends_on: labels of models response is built from. Cached responses
+    are invalidated when any of these models is saved or deleted.
+    QuerySet.update() and bulk_create() don't send the signals, so code
+    using them must call invalidate_cached_responses itself.
+    per_user_params: query params which make response user specific.
+
+    f.e.:
+        @action(methods=["get"], detail=False)
+        @cache_response(depends_on=("exchange.RecyclablesDeal",))
+        def total_deals(self, request):
+            ...
+    """
+    depends_on = tuple(depends_on)
+    for model_label in depends_on:
+        connect_invalidation(model_label)
+
+    def decorator(func):
+        # Registered on import, so stats include actions not requested
+        # by this process
+        _cached_actions.add(func.__qualname__)
+
+        @wraps(func)
+        def wrapper(self, request, *args, **kwargs):
+            action_name = f"{self.__class__.__name__}.{func.__name__}"
+            per_user = any(
+                param in request.query_params for param in per_user_params
+            )
+            key = get_response_cache_key(
+                request, action_name, depends_on, per_user
+            )
+            cached = cache.get(key)
+            if cached is not None:
+                _increment_counter(func.__qualname__, "hits")
+                data, status = cached
+                return Response(data, status=status)
+
+            _increment_counter(func.__qualname__, "misses")
+            response = func(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, (response.data, response.status_code), timeout)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def get_response_cache_stats() -> dict:
+    """
+    Returns hits, misses and hit ratio of cached actions
+    f.e.: {"StatisticsViewSet.total_deals":
+        {"hits": 10, "misses": 2, "hit_ratio": 0.83}}
+    """
+    counters = cache.get_many(
+        [
+            _get_counter_key(action_name, counter)
+            for action_name in _cached_actions
+            for counter in ("hits", "misses")
+        ]
+    )
+    stats = {}
+    for action_name in sorted(_cached_actions):
+        hits, misses = (
+            counters.get(_get_counter_key(action_name, counter), 0)
+            for counter in ("hits", "misses")
+        )
+        stats[action_name] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 2)
+            if hits + misses
+            else None,
+        }
+    return stats
+
+
+def handle_cached_model_change(sender, **kwargs):
+    invalidate_cached_responses(sender._meta.label)
+
+
+def connect_invalidation(model_label: str):
+    """
+    Invalidates cached responses on save and delete of the model.
+    Only models cached responses depend on are connected, so saving
+    of other models doesn't touch the cache
+    """
+    for signal in (post_save, post_delete):
+        signal.connect(
+            handle_cached_model_change,
+            # Resolved when the model is loaded
+            sender=model_label,
+            dispatch_uid=f"{RESPONSE_CACHE_PREFIX}:{model_label}",
+        )
@@ -0,0 +1,109 @@
+"""
+Publishing to the channel layer from sync code without waiting for it.
+
+async_to_sync(channel_layer.group_send) blocks the request thread until
+the layer (Redis) answers. Instead every process runs an event loop in
+a background thread, messages are sent to the layer there and the caller
+returns immediately. In-memory layer (DEBUG) wakes only consumers waiting
+in the loop of the sender, so messages are sent to it synchronously.
+"""
+import asyncio
+import atexit
+import logging
+import os
+import threading
+from typing import Iterable, Optional
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+log = logging.getLogger(__name__)
+
+# Messages above this number waiting for the layer are dropped,
+# clients get them with the API
+MAX_PENDING_MESSAGES = 10000
+
+# Seconds to wait for the pending messages on exit of the process
+FLUSH_TIMEOUT = 5
+
+
+def is_redis_layer(channel_layer) -> bool:
+    return type(channel_layer).__module__.startswith("channels_redis.")
+
+
+class Publisher:
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.pending = 0
+        self.idle = threading.Condition()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever,
+            name="channel-layer-publisher",
+            daemon=True,
+        )
+        self.thread.start()
+
+    def group_send(self, group_name: str, message: dict):
+        channel_layer = get_channel_layer()
+        if not is_redis_layer(channel_layer):
+            async_to_sync(channel_layer.group_send)(group_name, message)
+            return
+        with self.idle:
+            if self.pending >= MAX_PENDING_MESSAGES:
+                log.warning("Message to %s is dropped", group_name)
+                return
+            self.pending += 1
+        future = asyncio.run_coroutine_threadsafe(
+            channel_layer.group_send(group_name, message), self.loop
+        )
+        future.add_done_callback(self.message_sent)
+
+    def message_sent(self, future):
+        with self.idle:
+            self.pending -= 1
+            if not self.pending:
+                self.idle.notify_all()
+        if not future.cancelled() and future.exception() is not None:
+            log.error(
+                "Publishing to the channel layer failed",
+                exc_info=future.exception(),
+            )
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until pending messages are sent
+        """
+        with self.idle:
+            return self.idle.wait_for(lambda: not self.pending, timeout)
+
+
+_publisher: Optional[Publisher] = None
+_publisher_pid: Optional[int] = None
+_publisher_lock = threading.Lock()
+
+
+def get_publisher() -> Publisher:
+    global _publisher, _publisher_pid
+    with _publisher_lock:
+        # Thread of the publisher isn't copied to the forked processes
+        if _publisher is None or _publisher_pid != os.getpid():
+            _publisher = Publisher()
+            _publisher_pid = os.getpid()
+            atexit.register(_publisher.flush, FLUSH_TIMEOUT)
+        return _publisher
+
+
+def publish(group_names: Iterable[str], message: dict):
+    """
+    Sends message to the groups after the current transaction is
+    committed, doesn't wait for the layer
+    """
+    group_names = list(group_names)
+
+    def send():
+        publisher = get_publisher()
+        for group_name in group_names:
+            publisher.group_send(group_name, message)
+
+    transaction.on_commit(send)
@@ -0,0 +1,46 @@
+"""
+JSON encoding of API responses and websocket frames.
+
+orjson is used when it's installed, otherwise json of the standard library.
+Values orjson can't encode natively (Decimal, lazy translations, querysets)
+and dates are passed to the encoder of DRF, so the output is the same
+with both libraries.
+"""
+import json
+
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = JSONEncoder()
+
+
+def dumps(data) -> bytes:
+    """
+    Compact UTF-8 JSON, like rendered by JSONRenderer of DRF
+    """
+    if orjson is not None:
+        encoded = orjson.dumps(
+            data,
+            default=_encoder.default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+    else:
+        encoded = json.dumps(
+            data, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":")
+        ).encode()
+    # Line separators are escaped by DRF, so JSON is a subset of javascript
+    return encoded.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+        b"\xe2\x80\xa9", b"\\u2029"
+    )
+
+
+def encode_frame(data) -> str:
+    """
+    Text of the websocket frame. Frame sent to the group is encoded once
+    by the sender, consumers send the text as is
+    """
+    return dumps(data).decode()
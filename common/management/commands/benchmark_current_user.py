@@ -0,0 +1,90 @@
+import sys
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.http import HttpRequest
+from django.template import RequestContext
+
+from common.utils import current_request, get_current_user_id
+
+
+def get_current_request_by_frames():
+    """
+    Previous implementation of get_current_request: walks frames of the
+    stack looking for an HttpRequest argument
+    """
+    request = None
+    frame = sys._getframe(1)
+
+    while frame:
+        for arg in frame.f_code.co_varnames[: frame.f_code.co_argcount]:
+            request = frame.f_locals[arg]
+
+            if isinstance(request, HttpRequest):
+                break
+
+            if isinstance(request, RequestContext):
+                request = request.request
+                break
+        else:
+            frame = frame.f_back
+            continue
+
+        break
+
+    return request if isinstance(request, HttpRequest) else None
+
+
+def get_current_user_id_by_frames():
+    request = get_current_request_by_frames()
+    user = getattr(request, "user", None)
+    return user.pk if user and user.is_authenticated else None
+
+
+def call_deep(request, depth: int, func, calls: int):
+    """
+    Calls func `calls` times `depth` frames below the frame with request
+    """
+    if depth:
+        return call_deep(None, depth - 1, func, calls)
+    for _ in range(calls):
+        func()
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures get_current_user_id called deep in the stack of the "
+        "request: walking of the frames against the context variable"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--depth",
+            type=int,
+            default=40,
+            help="Number of frames between the request and the call",
+        )
+        parser.add_argument(
+            "--calls", type=int, default=200000, help="Number of calls"
+        )
+
+    def handle(self, *args, **options):
+        request = HttpRequest()
+        request.user = AnonymousUser()
+        depth, calls = options["depth"], options["calls"]
+
+        for name, func in (
+            ("frame walking", get_current_user_id_by_frames),
+            ("context var", get_current_user_id),
+        ):
+            token = current_request.set(request)
+            try:
+                started_at = time.perf_counter()
+                call_deep(request, depth, func, calls)
+                duration = time.perf_counter() - started_at
+            finally:
+                current_request.reset(token)
+            self.stdout.write(
+                f"{name}: {duration / calls * 1e6:.2f} us per call"
+            )
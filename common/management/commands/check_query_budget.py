@@ -0,0 +1,75 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from common.query_budget import (
+    check_query_budget,
+    create_dataset,
+    make_report,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Checks number of SQL queries and wall time of API endpoints on a "
+        "synthetic dataset in a test database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale", type=int, default=1, help="Size of the dataset"
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Number of requests to each endpoint",
+        )
+        parser.add_argument(
+            "--output", help="Path to the JSON report, stdout by default"
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            # Do not touch the real cache. Queries are logged only while
+            # they are captured, as in tests
+            with override_settings(
+                CACHES={
+                    "default": {
+                        "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+                    }
+                },
+                DEBUG=False,
+            ):
+                dataset = create_dataset(options["scale"])
+                results = check_query_budget(dataset, options["repeat"])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        report = make_report(results)
+        report_json = json.dumps(report, indent=2, sort_keys=True)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(report_json)
+        else:
+            self.stdout.write(report_json)
+
+        failed = [
+            f"{result.name}: {result.queries}/{result.max_queries} queries, "
+            f"{result.time_ms}/{result.max_time_ms} ms, "
+            f"status {result.status_code}"
+            for result in results
+            if not result.passed
+        ]
+        if failed:
+            raise CommandError("Query budget exceeded:\n" + "\n".join(failed))
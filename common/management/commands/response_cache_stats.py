@@ -0,0 +1,12 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from common.cache import get_response_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Shows hits, misses and hit ratio of cached API responses"
+
+    def handle(self, *args, **options):
+        self.stdout.write(json.dumps(get_response_cache_stats(), indent=2))
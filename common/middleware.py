@@ -1,4 +1,11 @@
+import random
+from contextlib import ExitStack
+
 from django.conf import settings
+from django.db import connections
+
+from common.sql_profiling import QueryCollector, log_profile, record_profile
+from common.utils import current_request
 
 
 class MiddlewareMixin(object):
@@ -17,6 +24,58 @@ class MiddlewareMixin(object):
         return response
 
 
+class RequestContextMiddleware:
+    """
+    Stores current request in request context, so it can be
+    accessed with common.utils.get_current_request.
+    User is taken from the request lazily, so user authenticated
+    by rest framework is available as well.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            current_request.reset(token)
+
+
+class SQLProfilingMiddleware:
+    """
+    Profiles SQL queries of sampled requests (SQL_PROFILING_SAMPLE_RATE):
+    number of queries, DB time, the slowest and duplicated statements.
+    Profiles are written to stderr by the "common.sql_profiling" logger
+    (see LOGGING) and aggregated by endpoint in the cache, see
+    common.sql_profiling. Unsampled requests are not affected.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.SQL_PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+
+        collector = QueryCollector()
+        with ExitStack() as stack:
+            for db_connection in connections.all():
+                stack.enter_context(db_connection.execute_wrapper(collector))
+            response = self.get_response(request)
+
+        resolver_match = request.resolver_match
+        view_name = (
+            resolver_match.view_name if resolver_match else request.path_info
+        )
+        endpoint = f"{request.method} {view_name}"
+        profile = collector.get_profile()
+        log_profile(endpoint, profile, settings.SQL_PROFILING_SLOW_QUERY_MS)
+        record_profile(endpoint, profile)
+        return response
+
+
 """
 Print sql on console for debug
 """
@@ -1,16 +1,255 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from typing import Optional
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+PAGE_MODE = "page"
+CURSOR_MODE = "cursor"
+
+# Planner estimates of small querysets are inaccurate and exact count
+# of them is cheap
+EXACT_COUNT_THRESHOLD = 1000
+
+
+def get_estimated_count(queryset) -> int:
+    """
+    Returns number of rows estimated by the query planner of Postgres,
+    exact count on other databases
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count()
+
+    sql, params = queryset.order_by().values("pk").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    estimated_count = plan[0]["Plan"]["Plan Rows"]
+    if estimated_count < EXACT_COUNT_THRESHOLD:
+        return queryset.count()
+    return estimated_count
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor paginator by (created_at, id). Page is selected by the position
+    of the first or the last object of the neighbour page, so neither
+    OFFSET nor COUNT over the whole queryset is executed.
+    Count is added to the response only if it's requested
+    with ?count=estimate or ?count=exact.
+    Instead of the cursor page can be selected by the object next to it:
+    ?before=<id> returns objects older than the object, ?after=<id> newer.
+    Objects are always ordered by the cursor fields, other ?ordering
+    is rejected
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    before_query_param = "before"
+    after_query_param = "after"
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.check_ordering(request)
+        self.page_size = self.get_page_size(request)
+        self.count = self.get_count(queryset, request)
+
+        position = self.decode_cursor(request)
+        if position is None:
+            position = self.get_object_position(queryset, request)
+        reverse = False
+        if position is not None:
+            created_at, pk, reverse = position
+            if reverse:
+                queryset = queryset.filter(
+                    Q(created_at__gt=created_at)
+                    | Q(created_at=created_at, pk__gt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at)
+                    | Q(created_at=created_at, pk__lt=pk)
+                )
+
+        ordering = self.ordering
+        if reverse:
+            # Previous page is fetched in the reverse order from the cursor
+            ordering = [field.lstrip("-") for field in ordering]
+        objects = list(queryset.order_by(*ordering)[: self.page_size + 1])
+        has_more = len(objects) > self.page_size
+        objects = objects[: self.page_size]
+        if reverse:
+            objects.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        self.next_position = self.previous_position = None
+        if objects and has_next:
+            self.next_position = self.get_position(objects[-1])
+        if objects and has_previous:
+            self.previous_position = self.get_position(objects[0])
+        return objects
+
+    def check_ordering(self, request):
+        ordering = request.query_params.get(api_settings.ORDERING_PARAM)
+        if not ordering:
+            return
+        fields = tuple(field.strip() for field in ordering.split(","))
+        if fields != self.ordering[: len(fields)]:
+            raise ValidationError(
+                {
+                    api_settings.ORDERING_PARAM: "Сортировка с курсором "
+                    f"возможна только по {', '.join(self.ordering)}"
+                }
+            )
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_count(self, queryset, request) -> Optional[int]:
+        count = request.query_params.get(self.count_query_param)
+        if count == "estimate":
+            return get_estimated_count(queryset)
+        if count == "exact":
+            return queryset.count()
+        return None
+
+    @staticmethod
+    def get_position(obj) -> tuple:
+        return obj.created_at, obj.pk
+
+    def decode_cursor(self, request) -> Optional[tuple]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            created_at = parse_datetime(data["created_at"])
+            pk = int(data["id"])
+            reverse = bool(data.get("reverse"))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound("Неверный курсор")
+        if created_at is None:
+            raise NotFound("Неверный курсор")
+        return created_at, pk, reverse
+
+    def get_object_position(self, queryset, request) -> Optional[tuple]:
+        for query_param, reverse in (
+            (self.before_query_param, False),
+            (self.after_query_param, True),
+        ):
+            value = request.query_params.get(query_param)
+            if not value:
+                continue
+            try:
+                pk = int(value)
+                created_at = (
+                    queryset.filter(pk=pk)
+                    .values_list("created_at", flat=True)
+                    .get()
+                )
+            except (ValueError, ObjectDoesNotExist):
+                raise NotFound("Объект не найден")
+            return created_at, pk, reverse
+        return None
+
+    def get_cursor_link(self, position: tuple, reverse: bool) -> str:
+        created_at, pk = position
+        data = {"created_at": created_at.isoformat(), "id": pk}
+        if reverse:
+            data["reverse"] = True
+        encoded = base64.urlsafe_b64encode(json.dumps(data).encode())
+        url = self.request.build_absolute_uri()
+        for query_param in (self.before_query_param, self.after_query_param):
+            url = remove_query_param(url, query_param)
+        return replace_query_param(
+            url, self.cursor_query_param, encoded.decode()
+        )
+
+    def get_next_link(self) -> Optional[str]:
+        if self.next_position is None:
+            return None
+        return self.get_cursor_link(self.next_position, reverse=False)
+
+    def get_previous_link(self) -> Optional[str]:
+        if self.previous_position is None:
+            return None
+        return self.get_cursor_link(self.previous_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        response = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+        if self.count is not None:
+            response = {"count": self.count, **response}
+        return Response(response)
 
 
 class PageSizePagination(PageNumberPagination):
     """
     Paginator with page number and page size as query params. Both page count and total
     count added to the response Extended PageNumber paginator of DRF.
+
+    Views can allow cursor pagination by (created_at, id) with
+    pagination_modes = ("page", "cursor"), the first mode is used
+    by default, the other one is selected with ?pagination=cursor
+    (or ?pagination=page)
     """
 
     page_size_query_param = "size"
+    pagination_mode_query_param = "pagination"
+    cursor_pagination_class = KeysetPagination
+    cursor_pagination = None
+
+    def get_pagination_mode(self, request, view) -> str:
+        modes = getattr(view, "pagination_modes", (PAGE_MODE,))
+        mode = request.query_params.get(self.pagination_mode_query_param)
+        if mode in modes:
+            return mode
+        if CURSOR_MODE in modes and any(
+            request.query_params.get(query_param)
+            for query_param in (
+                KeysetPagination.cursor_query_param,
+                KeysetPagination.before_query_param,
+                KeysetPagination.after_query_param,
+            )
+        ):
+            return CURSOR_MODE
+        return modes[0]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.get_pagination_mode(request, view) == CURSOR_MODE:
+            self.cursor_pagination = self.cursor_pagination_class()
+            return self.cursor_pagination.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
 
     def get_paginated_response(self, data):
+        if self.cursor_pagination is not None:
+            return self.cursor_pagination.get_paginated_response(data)
         return Response(
             {
                 "count": self.page.paginator.count,
@@ -0,0 +1,152 @@
+"""
+Prefetching of generic relations.
+
+prefetch_related() of Django can't use custom querysets for
+GenericForeignKey and doesn't fill GenericForeignKey of objects
+prefetched through a GenericRelation, so serializers which go back
+from the related object to its owner make a query per row.
+"""
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from django.contrib.contenttypes.fields import (
+    GenericForeignKey,
+    GenericRelation,
+)
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Prefetch, QuerySet, prefetch_related_objects
+
+
+class GenericPrefetch:
+    """
+    Lookup of prefetch_generic_related_objects.
+
+    lookup: name of GenericForeignKey or GenericRelation field.
+    querysets: querysets of the related models, f.e. to select_related
+        objects used by serializers. Models without queryset are fetched
+        with their base manager.
+    to_attr: for GenericRelation, name of the attribute to store list of
+        related objects (like to_attr of Prefetch).
+
+    f.e.:
+        GenericPrefetch(
+            "content_object",
+            querysets=[Message.objects.select_related("chat")],
+        )
+    """
+
+    def __init__(
+        self,
+        lookup: str,
+        querysets: Iterable[QuerySet] = (),
+        to_attr: Optional[str] = None,
+    ):
+        self.lookup = lookup
+        self.querysets = {queryset.model: queryset for queryset in querysets}
+        self.to_attr = to_attr
+
+    def get_queryset(self, model) -> QuerySet:
+        if model in self.querysets:
+            return self.querysets[model]
+        return model._base_manager.all()
+
+
+def _get_generic_foreign_key(model, ct_field: str, fk_field: str):
+    for field in model._meta.private_fields:
+        if (
+            isinstance(field, GenericForeignKey)
+            and field.ct_field == ct_field
+            and field.fk_field == fk_field
+        ):
+            return field
+    return None
+
+
+def _prefetch_generic_foreign_key(
+    instances: list, field: GenericForeignKey, lookup: GenericPrefetch
+):
+    """
+    Fetches objects of GenericForeignKey with one query per content type
+    """
+    ct_attname = field.model._meta.get_field(field.ct_field).get_attname()
+
+    ids_by_content_type = defaultdict(set)
+    for instance in instances:
+        ct_id = getattr(instance, ct_attname)
+        if ct_id is not None and not field.is_cached(instance):
+            ids_by_content_type[ct_id].add(getattr(instance, field.fk_field))
+
+    objects = {}
+    for ct_id, ids in ids_by_content_type.items():
+        model = ContentType.objects.get_for_id(ct_id).model_class()
+        for obj in lookup.get_queryset(model).filter(pk__in=ids):
+            objects[(ct_id, obj.pk)] = obj
+
+    for instance in instances:
+        if field.is_cached(instance):
+            continue
+        ct_id = getattr(instance, ct_attname)
+        field.set_cached_value(
+            instance, objects.get((ct_id, getattr(instance, field.fk_field)))
+        )
+
+
+def _prefetch_generic_relation(
+    instances: list, field: GenericRelation, lookup: GenericPrefetch
+):
+    """
+    Fetches objects of GenericRelation with one query
+    and sets owner of them to their GenericForeignKey
+    """
+    prefetch_related_objects(
+        instances,
+        Prefetch(
+            lookup.lookup,
+            queryset=lookup.get_queryset(field.related_model),
+            to_attr=lookup.to_attr,
+        ),
+    )
+    generic_foreign_key = _get_generic_foreign_key(
+        field.related_model,
+        field.content_type_field_name,
+        field.object_id_field_name,
+    )
+    if generic_foreign_key is None:
+        return
+
+    for instance in instances:
+        if lookup.to_attr:
+            related_objects = getattr(instance, lookup.to_attr)
+        else:
+            related_objects = getattr(instance, lookup.lookup).all()
+        for obj in related_objects:
+            generic_foreign_key.set_cached_value(obj, instance)
+
+
+def prefetch_generic_related_objects(instances: Iterable, *lookups):
+    """
+    Prefetches generic relations of instances of the same model.
+    Lookups are names of GenericForeignKey or GenericRelation fields
+    or GenericPrefetch objects.
+
+    Objects of GenericForeignKey are fetched with one query per content
+    type, objects of GenericRelation with one query and know their owner
+    """
+    instances = [instance for instance in instances if instance is not None]
+    if not instances:
+        return
+
+    model = type(instances[0])
+    for lookup in lookups:
+        if isinstance(lookup, str):
+            lookup = GenericPrefetch(lookup)
+
+        field = model._meta.get_field(lookup.lookup)
+        if isinstance(field, GenericForeignKey):
+            _prefetch_generic_foreign_key(instances, field, lookup)
+        elif isinstance(field, GenericRelation):
+            _prefetch_generic_relation(instances, field, lookup)
+        else:
+            raise ValueError(
+                f"{model.__name__}.{lookup.lookup} is not a generic relation"
+            )
@@ -0,0 +1,443 @@
+"""
+Query budget of API endpoints.
+
+Every endpoint from ENDPOINT_BUDGETS is requested on a synthetic dataset
+and the number of SQL queries of the request is compared with the budget
+of the endpoint. Wall time depends on the machine, so its limit is
+generous and only catches endpoints which became several times slower.
+Used by `manage.py check_query_budget` and
+common.tests.
+"""
+import random
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from decimal import Decimal
+from typing import Optional
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from chat.models import Chat, Message
+from company.models import City, Company, CompanyStatus, Region
+from exchange.models import (
+    DealStatus,
+    DealType,
+    RecyclablesApplication,
+    RecyclablesDeal,
+    Review,
+    UrgencyType,
+)
+from logistics.models import (
+    Contractor,
+    ContractorType,
+    LoadingType,
+    LogisticsOffer,
+    TransportApplication,
+)
+from notification.models import Notification
+from product.models import Recyclables, RecyclablesCategory
+from user.models import UserRole
+
+User = get_user_model()
+
+
+@dataclass
+class EndpointBudget:
+    app: str
+    name: str
+    # Formatted with ids of the dataset objects, f.e. "/api/companies/{company}/"
+    url: str
+    # Key of the dataset user, None for anonymous requests
+    user: Optional[str]
+    max_queries: int
+    # Median wall time, several times more than the endpoint takes now
+    max_time_ms: int = 1000
+
+
+@dataclass
+class EndpointResult:
+    app: str
+    name: str
+    url: str
+    status_code: int
+    queries: int
+    max_queries: int
+    time_ms: float
+    max_time_ms: int
+
+    @property
+    def passed(self) -> bool:
+        return (
+            self.status_code == 200
+            and self.queries <= self.max_queries
+            and self.time_ms <= self.max_time_ms
+        )
+
+
+ENDPOINT_BUDGETS = [
+    # exchange
+    EndpointBudget(
+        app="exchange",
+        name="recyclables_applications-list",
+        url="/api/recyclables_applications/",
+        user=None,
+        max_queries=4,
+    ),
+    EndpointBudget(
+        app="exchange",
+        name="recyclables_applications-detail",
+        url="/api/recyclables_applications/{application}/",
+        user=None,
+        max_queries=3,
+    ),
+    EndpointBudget(
+        app="exchange",
+        name="recyclables_deals-list",
+        url="/api/recyclables_deals/",
+        user="admin",
+        max_queries=20,
+    ),
+    EndpointBudget(
+        app="exchange",
+        name="recyclables_deals-detail",
+        url="/api/recyclables_deals/{deal}/",
+        user="admin",
+        max_queries=8,
+    ),
+    EndpointBudget(
+        app="exchange",
+        name="exchange_recyclables-list",
+        url="/api/exchange_recyclables/",
+        user=None,
+        max_queries=2,
+    ),
+    # company
+    EndpointBudget(
+        app="company",
+        name="companies-list",
+        url="/api/companies/",
+        user=None,
+        max_queries=7,
+    ),
+    EndpointBudget(
+        app="company",
+        name="companies-detail",
+        url="/api/companies/{company}/",
+        user=None,
+        max_queries=7,
+    ),
+    # logistics
+    EndpointBudget(
+        app="logistics",
+        name="transport_applications-list",
+        url="/api/transport_applications/",
+        user="logist",
+        max_queries=8,
+    ),
+    EndpointBudget(
+        app="logistics",
+        name="transport_applications-detail",
+        url="/api/transport_applications/{transport_application}/",
+        user="admin",
+        max_queries=4,
+    ),
+    EndpointBudget(
+        app="logistics",
+        name="logistic_offers-list",
+        url="/api/transport_applications/{transport_application}/logistic_offers/",
+        user="logist",
+        max_queries=15,
+    ),
+    EndpointBudget(
+        app="logistics",
+        name="contractors-list",
+        url="/api/contractors/",
+        user="logist",
+        max_queries=4,
+    ),
+    # chat
+    EndpointBudget(
+        app="chat",
+        name="chats-list",
+        url="/api/chats/",
+        user="company_admin",
+        max_queries=42,
+        max_time_ms=2000,
+    ),
+    EndpointBudget(
+        app="chat",
+        name="messages-list",
+        url="/api/chats/{chat}/messages/",
+        user="company_admin",
+        max_queries=19,
+    ),
+    # notification
+    EndpointBudget(
+        app="notification",
+        name="notification-list",
+        url="/api/notification/",
+        user="company_admin",
+        max_queries=5,
+    ),
+    # finance
+    EndpointBudget(
+        app="finance",
+        name="invoice_payments-list",
+        url="/api/invoice_payments/",
+        user="admin",
+        max_queries=4,
+    ),
+    # statistic
+    EndpointBudget(
+        app="statistic",
+        name="statistics-recyclables_price",
+        url="/api/statistics/recyclables_price/",
+        user=None,
+        max_queries=1,
+    ),
+    EndpointBudget(
+        app="statistic",
+        name="statistics-recyclables_volume",
+        url="/api/statistics/recyclables_volume/",
+        user=None,
+        max_queries=1,
+    ),
+    EndpointBudget(
+        app="statistic",
+        name="statistics-total_applications",
+        url="/api/statistics/total_applications/",
+        user=None,
+        max_queries=2,
+    ),
+    EndpointBudget(
+        app="statistic",
+        name="statistics-exchange_volume",
+        url="/api/statistics/exchange_volume/",
+        user=None,
+        max_queries=1,
+    ),
+    EndpointBudget(
+        app="statistic",
+        name="statistics-total_deals",
+        url="/api/statistics/total_deals/",
+        user=None,
+        max_queries=2,
+    ),
+    EndpointBudget(
+        app="statistic",
+        name="statistics-total_companies",
+        url="/api/statistics/total_companies/",
+        user=None,
+        max_queries=2,
+    ),
+    EndpointBudget(
+        app="statistic",
+        name="statistics-total_employee",
+        url="/api/statistics/total_employee/",
+        user=None,
+        max_queries=5,
+    ),
+]
+
+
+def create_dataset(scale: int = 1) -> dict:
+    """
+    Creates synthetic dataset and returns ids of the objects
+    used in the urls of ENDPOINT_BUDGETS and users to request them.
+    Dataset size is proportional to scale: 200 companies,
+    500 applications, 300 deals (with chats), 100 transport applications
+    """
+    rand = random.Random(0)
+    region = Region.objects.create(name="Регион")
+    cities = [
+        City.objects.create(name=f"Город {i}", region=region)
+        for i in range(10)
+    ]
+    admin = User.objects.create(
+        phone="+79990000001", role=UserRole.ADMIN, is_staff=True
+    )
+    logist = User.objects.create(phone="+79990000002", role=UserRole.LOGIST)
+
+    companies = []
+    for i in range(200 * scale):
+        owner = User.objects.create(
+            phone=f"+7980{i:07d}", role=UserRole.COMPANY_ADMIN
+        )
+        company = Company.objects.create(
+            name=f"Компания {i}",
+            inn=f"{i:010d}",
+            phone=f"+7970{i:07d}",
+            city=rand.choice(cities),
+            owner=owner,
+            status=CompanyStatus.VERIFIED,
+        )
+        owner.company = company
+        owner.save()
+        companies.append(company)
+
+    category = RecyclablesCategory.objects.create(name="Категория")
+    recyclables = [
+        Recyclables.objects.create(name=f"Вторсырье {i}", category=category)
+        for i in range(20)
+    ]
+
+    applications = [
+        RecyclablesApplication.objects.create(
+            company=rand.choice(companies),
+            recyclables=rand.choice(recyclables),
+            deal_type=rand.choice(DealType.values),
+            urgency_type=rand.choice(UrgencyType.values),
+            bale_count=rand.randint(1, 10),
+            bale_weight=rand.randint(50, 500),
+            volume=rand.randint(100, 10000),
+            price=Decimal(rand.randint(5, 50)),
+            lot_size=1,
+            city=rand.choice(cities),
+            latitude=Decimal(str(round(rand.uniform(50, 60), 6))),
+            longitude=Decimal(str(round(rand.uniform(30, 50), 6))),
+        )
+        for _ in range(500 * scale)
+    ]
+
+    deals = []
+    for i in range(300 * scale):
+        supplier, buyer = rand.sample(companies, 2)
+        deal = RecyclablesDeal.objects.create(
+            supplier_company=supplier,
+            buyer_company=buyer,
+            application=rand.choice(applications),
+            weight=rand.randint(100, 10000),
+            price=Decimal(rand.randint(5, 50)),
+            chat=Chat.objects.create(name=f"Сделка {i}"),
+            created_by=admin,
+            status=rand.choice([DealStatus.AGREEMENT, DealStatus.COMPLETED]),
+        )
+        deals.append(deal)
+        Message.objects.bulk_create(
+            Message(
+                chat=deal.chat,
+                author=rand.choice([supplier.owner, buyer.owner]),
+                content=f"Сообщение {j}",
+            )
+            for j in range(5)
+        )
+        # Bulk created messages don't send post_save
+        Chat.objects.filter(pk=deal.chat_id).refresh_last_message()
+        if deal.status == DealStatus.COMPLETED:
+            Review.objects.create(
+                rate=rand.randint(1, 5),
+                comment="Отзыв",
+                company=supplier,
+                created_by=buyer.owner,
+                content_object=deal,
+            )
+
+    contractor = Contractor.objects.create(
+        name="Перевозчик",
+        contractor_type=ContractorType.TRANSPORT,
+        created_by=logist,
+    )
+    transport_applications = []
+    for deal in deals[: 100 * scale]:
+        transport_application = TransportApplication.objects.create(
+            sender=deal.supplier_company.name,
+            recipient=deal.buyer_company.name,
+            cargo_type="Вторсырье",
+            loading_type=LoadingType.REAR,
+            weight=deal.weight,
+            created_by=deal.supplier_company.owner,
+            deal=deal,
+        )
+        LogisticsOffer.objects.create(
+            name="Предложение",
+            amount=Decimal(rand.randint(1000, 10000)),
+            shipping_date=deal.created_at,
+            logist=logist,
+            application=transport_application,
+            contractor=contractor,
+        )
+        transport_applications.append(transport_application)
+
+    company_admin = deals[0].supplier_company.owner
+    Notification.objects.bulk_create(
+        Notification(
+            name=f"Уведомление {i}",
+            company=company_admin.company,
+            content_object=deals[0],
+        )
+        for i in range(50)
+    )
+
+    return {
+        "users": {
+            "admin": admin,
+            "logist": logist,
+            "company_admin": company_admin,
+        },
+        "ids": {
+            "application": applications[0].pk,
+            "deal": deals[0].pk,
+            "company": deals[0].supplier_company.pk,
+            "chat": deals[0].chat_id,
+            "transport_application": transport_applications[0].pk,
+        },
+    }
+
+
+def measure_endpoint(client: Client, url: str, repeat: int):
+    """
+    Requests url several times, returns status code, number of queries
+    of the first request and median wall time in milliseconds
+    """
+    queries, timings, status_code = None, [], None
+    for _ in range(repeat):
+        # Measure the work of the endpoint, not of the response cache
+        cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started_at = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - started_at) * 1000)
+        if queries is None:
+            queries, status_code = len(captured), response.status_code
+    return status_code, queries, round(statistics.median(timings), 2)
+
+
+def check_query_budget(dataset: dict, repeat: int = 3) -> list:
+    clients = {None: Client()}
+    for key, user in dataset["users"].items():
+        token = AccessToken.for_user(user)
+        clients[key] = Client(HTTP_AUTHORIZATION=f"JWT {token}")
+
+    results = []
+    for budget in ENDPOINT_BUDGETS:
+        url = budget.url.format(**dataset["ids"])
+        status_code, queries, time_ms = measure_endpoint(
+            clients[budget.user], url, repeat
+        )
+        results.append(
+            EndpointResult(
+                app=budget.app,
+                name=budget.name,
+                url=url,
+                status_code=status_code,
+                queries=queries,
+                max_queries=budget.max_queries,
+                time_ms=time_ms,
+                max_time_ms=budget.max_time_ms,
+            )
+        )
+    return results
+
+
+def make_report(results: list) -> dict:
+    return {
+        "passed": all(result.passed for result in results),
+        "endpoints": [
+            asdict(result) | {"passed": result.passed} for result in results
+        ],
+    }
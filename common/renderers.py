@@ -0,0 +1,25 @@
+from djangorestframework_camel_case.render import (
+    CamelCaseJSONRenderer as BaseCamelCaseJSONRenderer,
+)
+from djangorestframework_camel_case.util import camelize
+
+from common.encoders import dumps
+
+
+class CamelCaseJSONRenderer(BaseCamelCaseJSONRenderer):
+    """
+    Renders compact responses with common.encoders, indented ones
+    (f.e. requested with "application/json; indent=4") with DRF
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if (
+            self.get_indent(accepted_media_type, renderer_context or {})
+            is not None
+            or not self.compact
+            or self.ensure_ascii
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(camelize(data, **self.json_underscoreize))
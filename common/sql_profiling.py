@@ -0,0 +1,183 @@
+"""
+Sampled SQL profiling of requests.
+
+Queries are collected with connection.execute_wrapper, so profiling
+does not depend on DEBUG and connection.queries.
+"""
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import Counter
+
+from django.core.cache import cache
+
+log = logging.getLogger(__name__)
+
+SQL_PROFILING_PREFIX = "sql_profiling"
+SQL_PROFILING_TIMEOUT = 60 * 60 * 24
+# Number of the slowest statements kept per request and per endpoint
+SLOWEST_QUERIES_COUNT = 10
+
+_in_params_re = re.compile(r"\(\s*%s(?:\s*,\s*%s)*\s*\)")
+_whitespace_re = re.compile(r"\s+")
+
+
+def get_sql_fingerprint(sql: str) -> str:
+    """
+    Normalizes SQL statement, so statements which differ only in
+    parameters (including the number of IN parameters) are equal
+    """
+    sql = _in_params_re.sub("(...)", sql)
+    return _whitespace_re.sub(" ", sql).strip()
+
+
+def get_fingerprint_hash(fingerprint: str) -> str:
+    return hashlib.md5(fingerprint.encode()).hexdigest()[:12]
+
+
+class QueryCollector:
+    """
+    Execute wrapper which collects SQL statements, parameters and
+    execution time of them
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started_at = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started_at) * 1000
+            self.queries.append((sql, params, duration))
+
+    def get_profile(self) -> dict:
+        """
+        Makes profile of the collected queries:
+            queries - number of queries
+            db_time_ms - total execution time
+            duplicates - number of exactly the same queries (with the
+                same parameters) executed more than once
+            similar - fingerprints executed more than once (N+1 queries)
+            slowest - the slowest statements
+        """
+        fingerprints = Counter()
+        statements = Counter()
+        for sql, params, _ in self.queries:
+            fingerprints[get_sql_fingerprint(sql)] += 1
+            statements[(sql, repr(params))] += 1
+
+        slowest = sorted(self.queries, key=lambda query: query[2])[
+            -SLOWEST_QUERIES_COUNT:
+        ]
+        return {
+            "queries": len(self.queries),
+            "db_time_ms": round(sum(query[2] for query in self.queries), 2),
+            "duplicates": sum(
+                count - 1 for count in statements.values() if count > 1
+            ),
+            "similar": {
+                get_fingerprint_hash(fingerprint): count
+                for fingerprint, count in fingerprints.items()
+                if count > 1
+            },
+            "slowest": [
+                {
+                    "fingerprint": get_fingerprint_hash(
+                        get_sql_fingerprint(sql)
+                    ),
+                    "sql": get_sql_fingerprint(sql),
+                    "time_ms": round(duration, 2),
+                }
+                for sql, _, duration in reversed(slowest)
+            ],
+        }
+
+
+def _get_endpoint_key(endpoint: str) -> str:
+    return f"{SQL_PROFILING_PREFIX}:endpoint:{endpoint}"
+
+
+def _get_endpoints_key() -> str:
+    return f"{SQL_PROFILING_PREFIX}:endpoints"
+
+
+def log_profile(endpoint: str, profile: dict, slow_query_ms: float):
+    log.info(json.dumps({"endpoint": endpoint, **profile}))
+    for query in profile["slowest"]:
+        if query["time_ms"] >= slow_query_ms:
+            log.warning(json.dumps({"endpoint": endpoint, **query}))
+
+
+def record_profile(endpoint: str, profile: dict):
+    """
+    Adds request profile to the aggregated profile of the endpoint.
+    Aggregation is not atomic, so a few samples can be lost
+    under concurrent requests, which is fine for sampled statistics
+    """
+    key = _get_endpoint_key(endpoint)
+    stats = cache.get(key) or {
+        "requests": 0,
+        "queries": 0,
+        "max_queries": 0,
+        "db_time_ms": 0.0,
+        "duplicates": 0,
+        "slowest": {},
+    }
+    stats["requests"] += 1
+    stats["queries"] += profile["queries"]
+    stats["max_queries"] = max(stats["max_queries"], profile["queries"])
+    stats["db_time_ms"] = round(stats["db_time_ms"] + profile["db_time_ms"], 2)
+    stats["duplicates"] += profile["duplicates"]
+
+    slowest = stats["slowest"]
+    for query in profile["slowest"]:
+        statement = slowest.setdefault(
+            query["fingerprint"],
+            {"sql": query["sql"], "count": 0, "max_time_ms": 0.0},
+        )
+        statement["count"] += 1
+        statement["max_time_ms"] = max(
+            statement["max_time_ms"], query["time_ms"]
+        )
+    stats["slowest"] = dict(
+        sorted(
+            slowest.items(),
+            key=lambda item: item[1]["max_time_ms"],
+            reverse=True,
+        )[:SLOWEST_QUERIES_COUNT]
+    )
+    cache.set(key, stats, SQL_PROFILING_TIMEOUT)
+
+    endpoints = cache.get(_get_endpoints_key()) or set()
+    if endpoint not in endpoints:
+        endpoints.add(endpoint)
+        cache.set(_get_endpoints_key(), endpoints, SQL_PROFILING_TIMEOUT)
+
+
+def get_profiling_stats() -> list:
+    """
+    Returns aggregated profiles of the sampled endpoints,
+    ordered by total DB time
+    """
+    endpoints = cache.get(_get_endpoints_key()) or set()
+    stats = cache.get_many(
+        [_get_endpoint_key(endpoint) for endpoint in endpoints]
+    )
+    result = [
+        {
+            "endpoint": endpoint,
+            **item,
+            "average_queries": round(item["queries"] / item["requests"], 2),
+            "average_db_time_ms": round(
+                item["db_time_ms"] / item["requests"], 2
+            ),
+            "slowest": list(item["slowest"].values()),
+        }
+        for endpoint in endpoints
+        if (item := stats.get(_get_endpoint_key(endpoint)))
+    ]
+    return sorted(result, key=lambda item: item["db_time_ms"], reverse=True)
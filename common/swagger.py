@@ -1,7 +1,9 @@
-from drf_yasg import inspectors
+from drf_yasg import inspectors, openapi
 from drf_yasg.app_settings import swagger_settings
 from drf_yasg.inspectors import ChoiceFieldInspector
 
+from common.pagination import CURSOR_MODE, PAGE_MODE
+
 
 class BaseAutoSchema(inspectors.SwaggerAutoSchema):
     field_inspectors = [
@@ -18,3 +20,49 @@ class BaseAutoSchema(inspectors.SwaggerAutoSchema):
             return self.view.yasg_parser_classes
 
         return super().get_parser_classes()
+
+    def get_pagination_parameters(self):
+        """
+        Adds parameters of the cursor pagination for views allowing it
+        """
+        parameters = super().get_pagination_parameters()
+        modes = getattr(self.view, "pagination_modes", (PAGE_MODE,))
+        if CURSOR_MODE not in modes or not self.should_page():
+            return parameters
+
+        return parameters + [
+            openapi.Parameter(
+                "pagination",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                enum=list(modes),
+                description=f"Режим пагинации, по умолчанию {modes[0]}. "
+                "В режиме cursor сортировка только по -created_at, -id",
+            ),
+            openapi.Parameter(
+                "cursor",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description="Курсор страницы из ссылок next и previous",
+            ),
+            openapi.Parameter(
+                "before",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_INTEGER,
+                description="Страница объектов старше объекта с этим id",
+            ),
+            openapi.Parameter(
+                "after",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_INTEGER,
+                description="Страница объектов новее объекта с этим id",
+            ),
+            openapi.Parameter(
+                "count",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                enum=["estimate", "exact"],
+                description="Добавить в ответ курсорной пагинации "
+                "оценку или точное количество объектов",
+            ),
+        ]
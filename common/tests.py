@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from common.cache import get_response_cache_stats
+from common.query_budget import (
+    ENDPOINT_BUDGETS,
+    check_query_budget,
+    create_dataset,
+)
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+)
+class QueryBudgetTest(TestCase):
+    """
+    Endpoints of ENDPOINT_BUDGETS don't exceed their number of queries
+    and wall time
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = create_dataset()
+
+    def test_query_budget(self):
+        results = check_query_budget(self.dataset, repeat=1)
+        self.assertEqual(len(results), len(ENDPOINT_BUDGETS))
+        for result in results:
+            with self.subTest(result.name):
+                self.assertEqual(result.status_code, 200)
+                self.assertLessEqual(result.queries, result.max_queries)
+                self.assertLessEqual(result.time_ms, result.max_time_ms)
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+)
+class ResponseCacheStatsTest(TestCase):
+    """
+    Hits and misses of cached actions are counted
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_hits_and_misses(self):
+        url = "/api/statistics/total_applications/"
+        for _ in range(3):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(
+            get_response_cache_stats()["StatisticsViewSet.total_applications"],
+            {"hits": 2, "misses": 1, "hit_ratio": 0.67},
+        )
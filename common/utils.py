@@ -1,11 +1,6 @@
-import json
-import sys
-
-from _decimal import Decimal
+from contextvars import ContextVar
 
 from django.conf import settings
-from django.http import HttpRequest
-from django.template import RequestContext
 from rest_framework.settings import api_settings
 
 
@@ -56,9 +51,16 @@ Current request
 """
 
 
+# Set by RequestContextMiddleware (HTTP) and QueryAuthMiddleware (websocket)
+current_request = ContextVar("current_request", default=None)
+current_user = ContextVar("current_user", default=None)
+
+
 def get_current_request():
     """
-    Get the current request using introspection.
+    Get the current request from request context.
+    Returns None outside of HTTP request (f.e. in websocket consumers,
+    management commands or shell).
 
     Be careful when getting request.user because you can get a recursion
     if this code will be used in User manager. You need override ModelBackend.get_user:
@@ -67,28 +69,7 @@ def get_current_request():
 
     custom_manager - manager without calling get_current_request()
     """
-    request = None
-    frame = sys._getframe(1)  # sys._getframe(0).f_back
-
-    while frame:
-        # check the instance of each funtion argument
-        for arg in frame.f_code.co_varnames[: frame.f_code.co_argcount]:
-            request = frame.f_locals[arg]
-
-            if isinstance(request, HttpRequest):
-                break
-
-            # from template tag
-            if isinstance(request, RequestContext):
-                request = request.request
-                break
-        else:
-            frame = frame.f_back
-            continue
-
-        break
-
-    return request if isinstance(request, HttpRequest) else None
+    return current_request.get()
 
 
 def get_current_user():
@@ -99,8 +80,10 @@ def get_current_user():
         if user and user.is_authenticated:
             ...
     """
-    request = get_current_request()
-    return getattr(request, "user", None)
+    request = current_request.get()
+    if request is not None:
+        return getattr(request, "user", None)
+    return current_user.get()
 
 
 def get_current_user_id():
@@ -167,18 +150,6 @@ def generate_random_sequence(length: int = 8):
     return pin
 
 
-class DecimalEncoder(json.JSONEncoder):
-    """
-    Because default encoder can't encode Decimal, we should use custom encoder to do it.
-    Used code from: https://stackoverflow.com/a/52319674
-    """
-
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return json.JSONEncoder.default(self, obj)
-
-
 MONTH_MAPPING = {
     1: "январь",
     2: "февраль",
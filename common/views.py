@@ -2,11 +2,13 @@ from django.contrib.contenttypes.models import ContentType
 from django.db.models import Exists, OuterRef
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
-from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 
+from common.prefetch import prefetch_generic_related_objects
 from common.serializers import EmptySerializer
+from common.sql_profiling import get_profiling_stats
 from exchange.api.serializers import (
     CreateImageModelSerializer,
     CreateDocumentModelSerializer,
@@ -35,6 +37,27 @@ class MultiSerializerMixin:
         )
 
 
+class GenericPrefetchMixin:
+    """
+    Prefetches generic relations of the objects serialized
+    by list and retrieve actions, see prefetch_generic_related_objects
+    """
+
+    generic_prefetch_lookups = ()
+
+    def get_serializer(self, *args, **kwargs):
+        if (
+            args
+            and self.generic_prefetch_lookups
+            and self.action in ("list", "retrieve")
+        ):
+            instances = args[0] if kwargs.get("many") else [args[0]]
+            prefetch_generic_related_objects(
+                instances, *self.generic_prefetch_lookups
+            )
+        return super().get_serializer(*args, **kwargs)
+
+
 class BulkCreateMixin:
     """
     Overridden to support bulk creation
@@ -277,3 +300,12 @@ class ExcludeMixin:
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def sql_profiling(request):
+    """
+    Aggregated SQL profiles of the sampled requests by endpoint
+    """
+    return Response(get_profiling_stats())
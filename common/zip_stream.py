@@ -0,0 +1,97 @@
+"""
+Streaming of ZIP archives of stored files.
+
+Archive is written to the response chunk by chunk while the files are
+read, so memory used by the worker doesn't depend on the size of the
+archive. Documents (docx, pdf, images) are compressed already,
+so they are stored in the archive without compression.
+"""
+import io
+import logging
+import os
+import zipfile
+from typing import Iterable, Iterator, Tuple
+from urllib.parse import quote
+
+from django.db.models.fields.files import FieldFile
+from django.http import StreamingHttpResponse
+
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class StreamBuffer(io.RawIOBase):
+    """
+    Unseekable file collecting written data until it's taken
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def get_unique_name(name: str, used_names: set) -> str:
+    """
+    Adds number to the name of the file if the name is used already
+    """
+    root, ext = os.path.splitext(name)
+    unique_name, number = name, 1
+    while unique_name in used_names:
+        number += 1
+        unique_name = f"{root} ({number}){ext}"
+    used_names.add(unique_name)
+    return unique_name
+
+
+def stream_zip(files: Iterable[Tuple[str, FieldFile]]) -> Iterator[bytes]:
+    """
+    Yields ZIP archive of (name in the archive, file) pairs.
+    Missing files are skipped
+    """
+    buffer = StreamBuffer()
+    used_names = set()
+    archive = zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_STORED)
+    for name, file in files:
+        try:
+            file.open("rb")
+        except FileNotFoundError:
+            log.warning("File %s of the archive is not found", file.name)
+            continue
+        try:
+            with archive.open(
+                get_unique_name(name, used_names), mode="w", force_zip64=True
+            ) as archive_file:
+                for chunk in file.chunks(CHUNK_SIZE):
+                    archive_file.write(chunk)
+                    data = buffer.take()
+                    if data:
+                        yield data
+        finally:
+            file.close()
+    # Central directory
+    archive.close()
+    yield buffer.take()
+
+
+def get_zip_response(
+    files: Iterable[Tuple[str, FieldFile]], file_name: str
+) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(
+        stream_zip(files), content_type="application/zip"
+    )
+    response[
+        "Content-Disposition"
+    ] = f"attachment; filename*=UTF-8''{quote(file_name)}"
+    return response
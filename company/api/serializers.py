@@ -33,6 +33,32 @@ from product.api.serializers import RecyclablesSerializer
 from user.models import UserRole
 
 
+def get_company_reviews_count(company: Company) -> int:
+    # Annotated by CompanyQuerySet.annotate_reviews
+    if hasattr(company, "reviews_count"):
+        return company.reviews_count
+    return company.review_set.count()
+
+
+def get_company_deals_count(company: Company) -> int:
+    # Annotated by CompanyQuerySet.annotate_deals_count
+    if hasattr(company, "deals_count"):
+        return company.deals_count
+    return (
+        company.recyclables_sell_deals.count()
+        + company.recyclables_buy_deals.count()
+        + company.equipment_buy_deals.count()
+        + company.equipment_sell_deals.count()
+    )
+
+
+def get_company_average_review_rate(company: Company) -> float:
+    # Annotated by CompanyQuerySet.annotate_reviews
+    if hasattr(company, "average_review_rate"):
+        return company.average_review_rate
+    return company.review_set.aggregate(models.Avg("rate"))["rate__avg"] or 0.0
+
+
 class CreateMyCompanyMixin:
     def to_internal_value(self, data):
         internal = super().to_internal_value(data)
@@ -297,27 +323,26 @@ class ListCompanySerializer(NonNullDynamicFieldsModelSerializer):
         model = Company
 
     def get_activities(self, obj):
-        # FIXME: оптимизировать по запросам в БД
-        activity_types = obj.activity_types.values_list(
-            "activity", flat=True
-        ).distinct()
+        # Activity types are prefetched by CompanyViewSet
+        activity_types = dict.fromkeys(
+            item.activity for item in obj.activity_types.all()
+        )
         return [ActivityType(item).label for item in activity_types]
 
     def get_application_types(self, obj):
-        # FIXME: оптимизировать по запросам в БД
-        application_types = obj.recyclables.values_list(
-            "action", flat=True
-        ).distinct()
+        # Company recyclables are prefetched by CompanyViewSet
+        application_types = dict.fromkeys(
+            item.action for item in obj.recyclables.all()
+        )
         return [
             CompanyRecyclablesActionType(item).label
             for item in application_types
         ]
 
     def get_recyclables_type(self, obj):
-        # FIXME: оптимизировать по запросам в БД
-        company_recyclables = obj.recyclables.select_related(
-            "recyclables"
-        ).first()
+        company_recyclables = min(
+            obj.recyclables.all(), key=lambda item: item.pk, default=None
+        )
         if company_recyclables:
             return company_recyclables.recyclables.name
         return None
@@ -328,22 +353,13 @@ class ListCompanySerializer(NonNullDynamicFieldsModelSerializer):
         return obj.recyclables_count
 
     def get_reviews_count(self, instance: Company):
-        return instance.review_set.count()
+        return get_company_reviews_count(instance)
 
-    # FIXME: сделать через аннотацию
     def get_deals_count(self, instance: Company):
-        return (
-            instance.recyclables_sell_deals.count()
-            + instance.recyclables_buy_deals.count()
-            + instance.equipment_buy_deals.count()
-            + instance.equipment_sell_deals.count()
-        )
+        return get_company_deals_count(instance)
 
     def get_average_review_rate(self, instance: Company):
-        return (
-            instance.review_set.aggregate(models.Avg("rate"))["rate__avg"]
-            or 0.0
-        )
+        return get_company_average_review_rate(instance)
 
 
 class CompanySerializer(NonNullDynamicFieldsModelSerializer):
@@ -374,20 +390,13 @@ class CompanySerializer(NonNullDynamicFieldsModelSerializer):
         return DealReviewSerializer(instance.review_set, many=True).data
 
     def get_reviews_count(self, instance: Company):
-        return instance.review_set.count()
+        return get_company_reviews_count(instance)
 
-    # FIXME: сделать через аннотацию и добавить кол-во сделок по оборудованию
     def get_deals_count(self, instance: Company):
-        return (
-            instance.recyclables_sell_deals.count()
-            + instance.recyclables_buy_deals.count()
-        )
+        return get_company_deals_count(instance)
 
     def get_average_review_rate(self, instance: Company):
-        return (
-            instance.review_set.aggregate(models.Avg("rate"))["rate__avg"]
-            or 0.0
-        )
+        return get_company_average_review_rate(instance)
 
     class Meta:
         model = Company
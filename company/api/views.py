@@ -79,16 +79,18 @@ class CompanyViewSet(
     viewsets.ModelViewSet,
 ):
     queryset = (
-        Company.objects.select_related("city")
+        Company.objects.select_related("city__region")
         .prefetch_related(
             "documents",
-            "recyclables",
+            "recyclables__recyclables__category",
             "contacts",
             "activity_types",
             "review_set",
         )
         .annotate(recyclables_count=Count("recyclables"))
         .annotate(monthly_volume=models.Sum("recyclables__monthly_volume"))
+        .annotate_reviews()
+        .annotate_deals_count()
     )
 
     serializer_classes = {
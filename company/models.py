@@ -1,8 +1,12 @@
 import uuid
 
+from bulk_update_or_create import BulkUpdateOrCreateQuerySet
 from colorfield.fields import ColorField
+from django.apps import apps
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import Avg, Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.urls import reverse
 from model_utils import FieldTracker
 from phonenumber_field.modelfields import PhoneNumberField
@@ -58,6 +62,74 @@ class CompanyStatus(models.IntegerChoices):
     RELIABLE = 3, "Надежная"
 
 
+class CompanyQuerySet(BulkUpdateOrCreateQuerySet, models.QuerySet):
+    @staticmethod
+    def _get_count_subquery(model_label, company_field):
+        qs = (
+            apps.get_model(model_label)
+            .objects.filter(**{company_field: OuterRef("pk")})
+            .order_by()
+            .values(company_field)
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return Coalesce(Subquery(qs), 0)
+
+    def annotate_reviews(self, *args, **kwargs):
+        reviews = (
+            apps.get_model("exchange.Review")
+            .objects.filter(company=OuterRef("pk"))
+            .order_by()
+            .values("company")
+        )
+        return self.annotate(
+            reviews_count=self._get_count_subquery(
+                "exchange.Review", "company"
+            ),
+            average_review_rate=Coalesce(
+                Subquery(reviews.annotate(rate=Avg("rate")).values("rate")),
+                0.0,
+                output_field=models.FloatField(),
+            ),
+        )
+
+    def annotate_deals_count(self, *args, **kwargs):
+        return self.annotate(
+            deals_count=(
+                self._get_count_subquery(
+                    "exchange.RecyclablesDeal", "supplier_company"
+                )
+                + self._get_count_subquery(
+                    "exchange.RecyclablesDeal", "buyer_company"
+                )
+                + self._get_count_subquery(
+                    "exchange.EquipmentDeal", "supplier_company"
+                )
+                + self._get_count_subquery(
+                    "exchange.EquipmentDeal", "buyer_company"
+                )
+            )
+        )
+
+    def prefetch_for_serializer(self, *args, **kwargs):
+        """
+        Selects and prefetches objects read by CompanySerializer nested
+        into serializers of other models, except reviews
+        """
+        return (
+            self.select_related("city__region", "manager", "owner")
+            .prefetch_related(
+                "documents",
+                "recyclables__recyclables__category",
+                "contacts",
+                "activity_types__rec_col_types",
+                "activity_types__advantages",
+            )
+            .annotate_reviews()
+            .annotate_deals_count()
+        )
+
+
 class Company(AddressFieldsModelMixin, BaseNameDescModel):
     # Main
     image = models.ImageField(
@@ -115,6 +187,8 @@ class Company(AddressFieldsModelMixin, BaseNameDescModel):
     email = models.EmailField("Электронная почта", default="", blank=True)
     phone = PhoneNumberField("Номер телефона", db_index=True)
 
+    objects = CompanyQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Компания"
         verbose_name_plural = "Компании"
@@ -0,0 +1,116 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from chat.models import Chat
+from company.models import (
+    ActivityType,
+    City,
+    Company,
+    CompanyActivityType,
+    CompanyAdditionalContact,
+    CompanyRecyclables,
+    CompanyRecyclablesActionType,
+    ContactType,
+    Region,
+)
+from exchange.models import (
+    DealType,
+    RecyclablesApplication,
+    RecyclablesDeal,
+    Review,
+    UrgencyType,
+)
+from product.models import Recyclables, RecyclablesCategory
+
+User = get_user_model()
+
+
+class CompanyListQueriesTest(TestCase):
+    """
+    Counters of the companies (reviews, deals) are annotated, so the number
+    of queries of the list doesn't depend on the page size
+    """
+
+    # Count, page and prefetched documents, company recyclables,
+    # recyclables, their categories, contacts, activity types and reviews
+    LIST_QUERIES = 9
+
+    @classmethod
+    def setUpTestData(cls):
+        region = Region.objects.create(name="Регион")
+        city = City.objects.create(name="Город", region=region)
+        recyclables = Recyclables.objects.create(
+            name="Вторсырье",
+            category=RecyclablesCategory.objects.create(name="Категория"),
+        )
+        author = User.objects.create(phone="+79990000000")
+        companies = [
+            Company.objects.create(
+                name=f"Компания {i}", inn=f"{i:010d}", city=city
+            )
+            for i in range(10)
+        ]
+        for i, company in enumerate(companies):
+            CompanyRecyclables.objects.create(
+                company=company,
+                recyclables=recyclables,
+                action=CompanyRecyclablesActionType.SELL,
+                monthly_volume=100,
+                price=Decimal(10),
+            )
+            CompanyAdditionalContact.objects.create(
+                company=company,
+                contact_type=ContactType.PHONE,
+                value=f"+7970{i:07d}",
+            )
+            CompanyActivityType.objects.create(
+                company=company, activity=ActivityType.SUPPLIER
+            )
+            application = RecyclablesApplication.objects.create(
+                company=company,
+                recyclables=recyclables,
+                deal_type=DealType.SELL,
+                urgency_type=UrgencyType.READY_FOR_SHIPMENT,
+                price=Decimal(10),
+                lot_size=1,
+            )
+            deal = RecyclablesDeal.objects.create(
+                supplier_company=company,
+                buyer_company=companies[i - 1],
+                application=application,
+                weight=100,
+                price=Decimal(10),
+                chat=Chat.objects.create(name=f"Сделка {i}"),
+                created_by=author,
+            )
+            Review.objects.create(
+                rate=i % 5 + 1,
+                comment="Отзыв",
+                company=company,
+                created_by=author,
+                content_object=deal,
+            )
+
+    def get_list_queries(self, size: int) -> int:
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(f"/api/companies/?size={size}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), size)
+        return len(captured)
+
+    def test_list_queries(self):
+        with self.assertNumQueries(self.LIST_QUERIES):
+            self.client.get("/api/companies/?size=10")
+
+    def test_list_queries_do_not_depend_on_page_size(self):
+        self.assertEqual(self.get_list_queries(2), self.get_list_queries(10))
+
+    def test_counters(self):
+        response = self.client.get("/api/companies/?size=10")
+        for company in response.json()["results"]:
+            self.assertEqual(company["reviewsCount"], 1)
+            self.assertEqual(company["dealsCount"], 2)
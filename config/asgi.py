@@ -21,12 +21,20 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 django_asgi_app = get_asgi_application()
 
 import chat.routing
+import document_generator.routing
+import notification.routing
 
 application = ProtocolTypeRouter(
     {
         "http": django_asgi_app,
         "websocket": AllowedHostsOriginValidator(
-            QueryAuthMiddleware(URLRouter(chat.routing.websocket_urlpatterns))
+            QueryAuthMiddleware(
+                URLRouter(
+                    chat.routing.websocket_urlpatterns
+                    + document_generator.routing.websocket_urlpatterns
+                    + notification.routing.websocket_urlpatterns
+                )
+            )
         ),
         # Just HTTP for now. (We can add other protocols later.)
     }
@@ -65,6 +65,7 @@ INSTALLED_APPS = [
     "import_export",
     "colorfield",
     # Local apps
+    "common",
     "user",
     "chat",
     "company",
@@ -84,6 +85,8 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "common.middleware.RequestContextMiddleware",
+    "common.middleware.SQLProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -186,7 +189,7 @@ else:
 
 REST_FRAMEWORK = {
     "DEFAULT_RENDERER_CLASSES": (
-        "djangorestframework_camel_case.render.CamelCaseJSONRenderer",
+        "common.renderers.CamelCaseJSONRenderer",
         "djangorestframework_camel_case.render.CamelCaseBrowsableAPIRenderer",
         "rest_framework.renderers.JSONRenderer",
         "rest_framework.renderers.BrowsableAPIRenderer",
@@ -324,6 +327,63 @@ READY_FOR_SHIPMENT_MAX_TOTAL_WEIGHT = os.getenv(
 # Using because when we have two instances on same server we need to have different ports
 BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
 
+# Share of requests which SQL queries are profiled (from 0 to 1)
+SQL_PROFILING_SAMPLE_RATE = float(os.getenv("SQL_PROFILING_SAMPLE_RATE", 0))
+# Profiled queries slower than this are logged as warnings
+SQL_PROFILING_SLOW_QUERY_MS = float(
+    os.getenv("SQL_PROFILING_SLOW_QUERY_MS", 100)
+)
+
+# Logging
+# https://docs.djangoproject.com/en/4.1/topics/logging/
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "default": {
+            "format": "{asctime} {levelname} {name} {message}",
+            "style": "{",
+        },
+    },
+    "handlers": {
+        "console": {
+            "class": "logging.StreamHandler",
+            "formatter": "default",
+        },
+    },
+    "loggers": {
+        # Profiles of sampled requests are logged at INFO,
+        # slow queries at WARNING
+        "common.sql_profiling": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}
+
+# Documents are generated in background by `manage.py run_document_worker`,
+# otherwise they are generated inside the request
+DOCUMENT_GENERATION_ASYNC = os.getenv(
+    "DOCUMENT_GENERATION_ASYNC", str(not DEBUG)
+).lower() in ("true", "1")
+# Number of processes generating documents in the worker
+DOCUMENT_GENERATION_WORKERS = int(os.getenv("DOCUMENT_GENERATION_WORKERS", 2))
+# Generated documents are also converted to PDF by the document worker
+DOCUMENT_PDF_ENABLED = os.getenv("DOCUMENT_PDF_ENABLED", "False").lower() in (
+    "true",
+    "1",
+)
+# Command starting LibreOffice in listener mode with the conversion server,
+# see https://github.com/unoconv/unoserver
+DOCUMENT_PDF_CONVERTER_COMMAND = os.getenv(
+    "DOCUMENT_PDF_CONVERTER_COMMAND", "unoserver"
+)
+# Seconds to wait for conversion of one document to PDF
+DOCUMENT_PDF_CONVERSION_TIMEOUT = int(
+    os.getenv("DOCUMENT_PDF_CONVERSION_TIMEOUT", 60)
+)
+
 # Debug Toolbar settings
 if DEBUG:
     INSTALLED_APPS.append("debug_toolbar")
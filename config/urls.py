@@ -22,6 +22,7 @@ from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
 from chat.routing import websocket_urlpatterns
+from common.views import sql_profiling
 
 api_urlpatterns = [
     path("", include("user.api.urls")),
@@ -34,6 +35,7 @@ api_urlpatterns = [
     path("", include("notification.api.urls")),
     path("", include("statistic.api.urls")),
     path("", include("finance.api.urls")),
+    path("sql_profiling/", sql_profiling, name="sql_profiling"),
 ]
 
 urlpatterns = [
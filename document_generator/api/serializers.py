@@ -5,3 +5,4 @@ from document_generator.models import GeneratedDocumentModel
 class GeneratedDocumentSerializer(NonNullDynamicFieldsModelSerializer):
     class Meta:
         model = GeneratedDocumentModel
+        exclude = ("content_hash",)
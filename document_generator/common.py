@@ -1,16 +1,163 @@
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+
 from document_generator.generators.document_generators import BaseGenerator
-from document_generator.models import GeneratedDocumentModel
+from document_generator.models import (
+    GeneratedDocumentModel,
+    GeneratedDocumentStatus,
+)
+from document_generator.storage import deduplicate_document
+from document_generator.tasks import enqueue_document, regenerate_document
+from exchange.models import DocumentModel
+
+# Locks of the generation when database has no advisory locks,
+# keys are distributed between them by hash
+_local_generation_locks = [threading.Lock() for _ in range(64)]
+
+
+def get_document_lock_key(document_filter_kwargs: dict) -> str:
+    return "generated_document:" + ":".join(
+        f"{name}={getattr(value, 'pk', value)}"
+        for name, value in sorted(document_filter_kwargs.items())
+    )
+
 
+@contextmanager
+def generation_lock(key: str):
+    """
+    Lock of the generation of the document with the key. On Postgres it's
+    advisory lock held until the end of the transaction, so it's shared
+    by all processes, otherwise lock of the process
+    """
+    if connection.vendor == "postgresql":
+        if not connection.in_atomic_block:
+            raise RuntimeError("Generation lock requires transaction")
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [key])
+        yield
+        return
 
-def get_or_generate_document(generator: BaseGenerator, document_filter_kwargs):
-    if not GeneratedDocumentModel.objects.filter(
+    lock_index = zlib.crc32(key.encode()) % len(_local_generation_locks)
+    with _local_generation_locks[lock_index]:
+        yield
+
+
+def get_or_generate_document(
+    generator: BaseGenerator, document_filter_kwargs, requested_by=None
+):
+    """
+    Returns existing document or generates it. With
+    DOCUMENT_GENERATION_ASYNC document is returned with PENDING status
+    and generated by `manage.py run_document_worker`.
+    Concurrent requests of the same document wait for the one generating it
+    """
+    document = GeneratedDocumentModel.objects.filter(
         **document_filter_kwargs
-    ).exists():
-        document_path = generator.replace_all_and_save()
-        document = GeneratedDocumentModel.objects.create(
-            **document_filter_kwargs, document=document_path
-        )
+    ).first()
+    if document is not None and not is_regenerated(document):
         return document
-    return GeneratedDocumentModel.objects.filter(
-        **document_filter_kwargs
-    ).get()
+
+    with transaction.atomic(), generation_lock(
+        get_document_lock_key(document_filter_kwargs)
+    ):
+        # Document could be generated while waiting for the lock
+        document = GeneratedDocumentModel.objects.filter(
+            **document_filter_kwargs
+        ).first()
+        if document is not None:
+            if is_regenerated(document):
+                return regenerate_document(document, generator, requested_by)
+            return document
+
+        if settings.DOCUMENT_GENERATION_ASYNC:
+            return enqueue_document(
+                generator, document_filter_kwargs, requested_by
+            )
+
+        document_path, content_hash = deduplicate_document(
+            generator.replace_all_and_save()
+        )
+        return GeneratedDocumentModel.objects.create(
+            **document_filter_kwargs,
+            document=document_path,
+            content_hash=content_hash,
+        )
+
+
+def is_regenerated(document: GeneratedDocumentModel) -> bool:
+    return (
+        settings.DOCUMENT_GENERATION_ASYNC
+        and document.status == GeneratedDocumentStatus.FAILED
+    )
+
+
+def get_archive_documents(
+    folders: dict, company=None, all_companies: bool = False
+) -> list:
+    """
+    Returns (name in the archive, file) of uploaded and generated
+    documents of the objects for common.zip_stream.
+    folders maps (content_type_id, object_id) of the objects to the folder
+    of their documents in the archive ("" for the root).
+    Documents generated for other companies than the given one (for any
+    company if it isn't given) are skipped unless all_companies is set,
+    file shared by several documents is added once
+    """
+    if not folders:
+        return []
+
+    objects_filter = reduce(
+        or_,
+        (
+            Q(content_type_id=content_type_id, object_id__in=object_ids)
+            for content_type_id, object_ids in _group_by_content_type(
+                folders
+            ).items()
+        ),
+    )
+    files = []
+    for document in DocumentModel.objects.filter(objects_filter).order_by(
+        "id"
+    ):
+        name = os.path.basename(document.document.name)
+        if document.name:
+            name = document.name + os.path.splitext(name)[1]
+        files.append((document, name, document.document))
+
+    generated_documents = GeneratedDocumentModel.objects.filter(
+        objects_filter, status=GeneratedDocumentStatus.READY
+    ).order_by("id")
+    if not all_companies:
+        companies_filter = Q(company__isnull=True)
+        if company is not None:
+            companies_filter |= Q(company=company)
+        generated_documents = generated_documents.filter(companies_filter)
+    for document in generated_documents:
+        for file in (document.document, document.pdf):
+            if file:
+                files.append((document, os.path.basename(file.name), file))
+
+    archive_documents = []
+    added_files = set()
+    for document, name, file in files:
+        if file.name in added_files:
+            continue
+        added_files.add(file.name)
+        folder = folders[(document.content_type_id, document.object_id)]
+        archive_documents.append((os.path.join(folder, name), file))
+    return archive_documents
+
+
+def _group_by_content_type(objects) -> dict:
+    object_ids = {}
+    for content_type_id, object_id in objects:
+        object_ids.setdefault(content_type_id, []).append(object_id)
+    return object_ids
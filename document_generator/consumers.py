@@ -0,0 +1,28 @@
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from document_generator.tasks import get_documents_group_name
+
+
+class DocumentConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Notifies user about documents generated in background
+    """
+
+    async def connect(self):
+        self.user = self.scope["user"]
+        if not self.user or self.user.is_anonymous:
+            await self.close()
+            return
+
+        self.group_name = get_documents_group_name(self.user.pk)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if hasattr(self, "group_name"):
+            await self.channel_layer.group_discard(
+                self.group_name, self.channel_name
+            )
+
+    async def document_generated(self, event):
+        await self.send_json(event["document"])
@@ -1,9 +1,12 @@
 import datetime
 import os
-from docx import Document
 from rest_framework import serializers
 
 from config import settings
+from document_generator.generators.template_engine import (
+    get_compiled_template,
+    substitute_placeholders,
+)
 from finance.models import InvoicePayment
 from logistics.models import TransportApplication
 from exchange.models import RecyclablesDeal, EquipmentApplication
@@ -12,51 +15,46 @@ from exchange.models import RecyclablesDeal, EquipmentApplication
 class BaseGenerator:
     replacing_mapping: dict[str, str] = None
     template_file_path: str = None
-    document = None
     output_file_name: str = None
     input_template_file_path = None
+    _document = None
+    _placeholder_positions = None
 
     def __init__(self):
         if not os.path.exists(f"{settings.MEDIA_ROOT}/generated_storage"):
             os.makedirs(f"{settings.MEDIA_ROOT}/generated_storage")
 
+    @property
+    def document(self):
+        """
+        Template is loaded only when document is rendered,
+        so existing and queued documents don't parse it.
+        Document is cloned from the template parsed once per process
+        """
+        if self._document is None:
+            template = get_compiled_template(self.input_template_file_path)
+            self._document = template.clone()
+            self._placeholder_positions = template.positions
+        return self._document
+
     def replace_all_and_save(self):
-        for template_string in self.replacing_mapping.keys():
-            self.replace_string(
-                template_string, self.replacing_mapping[template_string]
-            )
-            self.replace_string_in_table(
-                template_string, self.replacing_mapping[template_string]
-            )
+        substitute_placeholders(
+            self.document, self.replacing_mapping, self._placeholder_positions
+        )
         return self.save()
 
     def save(self):
         self.document.save(f"{settings.MEDIA_ROOT}/{self.output_file_name}")
         return self.output_file_name
 
-    def replace_string(self, string_to_replace, replace_to):
-        """Replaces given string to another in documents paragraph"""
-        for p in self.document.paragraphs:
-            if string_to_replace in p.text:
-                p.text = p.text.replace(string_to_replace, str(replace_to))
-                inline = p.runs
-                for i in range(len(inline)):
-                    if string_to_replace in inline[i].text:
-                        text = inline[i].text.replace(
-                            string_to_replace, replace_to
-                        )
-                        inline[i].text = text
-
-    def replace_string_in_table(self, string_to_replace, replace_to):
-        """Replaces given string to another in documents table"""
-        for table in self.document.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        if string_to_replace in paragraph.text:
-                            paragraph.text = paragraph.text.replace(
-                                string_to_replace, str(replace_to)
-                            )
+    def get_replacing_mapping(self) -> dict[str, str]:
+        """
+        Returns mapping with string values, as they are put to the document
+        """
+        return {
+            template_string: str(replace_to)
+            for template_string, replace_to in self.replacing_mapping.items()
+        }
 
     def convert_num_to_string(self, num):
         import num2words
@@ -64,6 +62,24 @@ class BaseGenerator:
         return num2words.num2words(num, lang="ru")
 
 
+class TemplateGenerator(BaseGenerator):
+    """
+    Renders template with already built replacing mapping,
+    used by the background document generation
+    """
+
+    def __init__(
+        self,
+        input_template_file_path: str,
+        output_file_name: str,
+        replacing_mapping: dict[str, str],
+    ):
+        super().__init__()
+        self.input_template_file_path = input_template_file_path
+        self.output_file_name = output_file_name
+        self.replacing_mapping = replacing_mapping
+
+
 class TransportApplicationGeneratorMixin:
     def __init__(self, transport_application: TransportApplication):
         super().__init__()
@@ -142,7 +158,6 @@ class UnloadingAgreement(ContractorWithDeliveryInfoMixin, BaseGenerator):
         self.output_file_name = f"generated_storage/Договор на отгрузку по заявке №{self.transport_application.id}.docx"
         self.replacing_mapping = self.build_replacing_mapping()
         self.input_template_file_path = f"{settings.PROJECT_DIR}/document_generator/templates/Copy of Доверенность на отгрузку.docx"
-        self.document = Document(self.input_template_file_path)
 
     def build_replacing_mapping(self):
         return super().build_replacing_mapping()
@@ -154,7 +169,6 @@ class Waybill(ContractorWithDeliveryInfoMixin, BaseGenerator):
         super().__init__(transport_application)
         self.output_file_name = f"generated_storage/ТТН по заявке №{self.transport_application.id}.docx"
         self.input_template_file_path = f"{settings.PROJECT_DIR}/document_generator/templates/trn-2021.docx"
-        self.document = Document(self.input_template_file_path)
         self.replacing_mapping = self.build_replacing_mapping()
 
     def build_replacing_mapping(self):
@@ -182,7 +196,6 @@ class Invoice(ContractorWithDeliveryInfoMixin, BaseGenerator):
         super().__init__(transport_application)
         self.output_file_name = f"generated_storage/Счет-фактура по заявке №{self.transport_application.id}.docx"
         self.input_template_file_path = f"{settings.PROJECT_DIR}/document_generator/templates/Счет-фактура.docx"
-        self.document = Document(self.input_template_file_path)
         self.replacing_mapping = self.build_replacing_mapping()
 
     def build_replacing_mapping(self):
@@ -212,7 +225,6 @@ class AgreementSpecification(BaseGenerator):
     def __init__(self, deal: RecyclablesDeal):
         super().__init__()
         self.input_template_file_path = f"{settings.PROJECT_DIR}/document_generator/templates/Договор_приложение_спецификация.docx"
-        self.document = Document(self.input_template_file_path)
         self.deal = deal
         self.output_file_name = f"generated_storage/Договор_приложение_спецификация по заявке {deal.id}.docx"
 
@@ -294,7 +306,6 @@ class AgreementApplication(ContractorApplicationGeneratorMixin, BaseGenerator):
     def __init__(self, transport_application: TransportApplication):
         super().__init__(transport_application)
         self.input_template_file_path = f"{settings.PROJECT_DIR}/document_generator/templates/Договор-Заявка.docx"
-        self.document = Document(self.input_template_file_path)
         self.output_file_name = f"generated_storage/Договор-Заявка по заявке №{self.transport_application.id}.docx"
 
         self.replacing_mapping = self.build_replacing_mapping()
@@ -342,7 +353,6 @@ class UniformTransferDocument(
         self.input_template_file_path = (
             f"{settings.PROJECT_DIR}/document_generator/templates/УПД.docx"
         )
-        self.document = Document(self.input_template_file_path)
         self.replacing_mapping = self.build_replacing_mapping()
         self.output_file_name = f"generated_storage/УПД по заявке 3 № {self.transport_application.id}.docx"
 
@@ -369,7 +379,6 @@ class Act(BaseGenerator):
         self.input_template_file_path = (
             f"{settings.PROJECT_DIR}/document_generator/templates/Акт.docx"
         )
-        self.document = Document(self.input_template_file_path)
         self.company = company
         self.deal: RecyclablesDeal = deal
         self.price_per_kg = 1
@@ -396,7 +405,6 @@ class InvoiceDocument(AgreementSpecification, BaseGenerator):
         super().__init__(invoice.deal)
 
         self.input_template_file_path = f"{settings.PROJECT_DIR}/document_generator/templates/Счёт поставка.docx"
-        self.document = Document(self.input_template_file_path)
         self.output_file_name = (
             f"generated_storage/Счёт поставка {invoice.id}.docx"
         )
@@ -0,0 +1,191 @@
+"""
+Substitution of placeholders (f.e. "%deal_number%") in docx documents.
+
+Paragraphs which may contain placeholders are found once per document,
+then all placeholders are substituted in a single pass with one regular
+expression. Values are put to the run where the placeholder starts,
+so formatting of the runs is kept, even if Word split the placeholder
+to several runs.
+
+Parsed templates are cached by the process, documents are cloned from them.
+"""
+import copy
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import Iterable
+
+from docx import Document
+from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
+
+PLACEHOLDER_SIGN = "%"
+
+_paragraph_tag = qn("w:p")
+_text_tag = qn("w:t")
+
+
+@lru_cache(maxsize=128)
+def get_placeholders_pattern(placeholders: tuple) -> re.Pattern:
+    """
+    Compiles pattern matching any of the placeholders. Longer placeholders
+    go first, so "%date%" is not substituted as "%date" and "%"
+    """
+    return re.compile(
+        "|".join(
+            re.escape(placeholder)
+            for placeholder in sorted(placeholders, key=len, reverse=True)
+        )
+    )
+
+
+def get_paragraph_text(paragraph_element) -> str:
+    return "".join(
+        text.text or "" for text in paragraph_element.iter(_text_tag)
+    )
+
+
+def index_placeholder_paragraphs(document) -> list:
+    """
+    Returns positions of paragraphs which contain placeholder sign,
+    in order of document.element.body.iter("w:p"). It includes
+    paragraphs of the tables at any level of nesting
+    """
+    return [
+        position
+        for position, paragraph_element in enumerate(
+            document.element.body.iter(_paragraph_tag)
+        )
+        if PLACEHOLDER_SIGN in get_paragraph_text(paragraph_element)
+    ]
+
+
+def get_indexed_paragraphs(document, positions: Iterable[int]) -> list:
+    positions = set(positions)
+    return [
+        Paragraph(paragraph_element, None)
+        for position, paragraph_element in enumerate(
+            document.element.body.iter(_paragraph_tag)
+        )
+        if position in positions
+    ]
+
+
+def substitute_in_runs(runs: list, pattern: re.Pattern, mapping: dict) -> int:
+    """
+    Substitutes placeholders in the text of runs.
+    Placeholder split to several runs is replaced in its first run
+    and removed from the others. Returns number of substitutions
+    """
+    texts = [run.text for run in runs]
+    text = "".join(texts)
+    matches = list(pattern.finditer(text))
+    if not matches:
+        return 0
+
+    # Offset of the end of each run in the paragraph text
+    run_ends = []
+    offset = 0
+    for run_text in texts:
+        offset += len(run_text)
+        run_ends.append(offset)
+
+    new_texts = [""] * len(runs)
+    run_index = 0
+
+    def copy_text(start, end):
+        nonlocal run_index
+        while start < end:
+            while run_ends[run_index] <= start:
+                run_index += 1
+            chunk_end = min(end, run_ends[run_index])
+            new_texts[run_index] += text[start:chunk_end]
+            start = chunk_end
+
+    position = 0
+    for match in matches:
+        copy_text(position, match.start())
+        while run_ends[run_index] <= match.start():
+            run_index += 1
+        new_texts[run_index] += mapping[match.group()]
+        position = match.end()
+    copy_text(position, len(text))
+
+    for run, old_text, new_text in zip(runs, texts, new_texts):
+        if old_text != new_text:
+            run.text = new_text
+    return len(matches)
+
+
+def substitute_placeholders(
+    document, mapping: dict, positions: Iterable[int] = None
+) -> int:
+    """
+    Substitutes keys of mapping with their values in the document.
+    Positions of the paragraphs can be taken from
+    index_placeholder_paragraphs of the same template.
+    Returns number of substitutions
+    """
+    mapping = {
+        placeholder: str(value)
+        for placeholder, value in mapping.items()
+        if placeholder
+    }
+    if not mapping:
+        return 0
+
+    if positions is None:
+        positions = index_placeholder_paragraphs(document)
+    pattern = get_placeholders_pattern(tuple(mapping))
+    return sum(
+        substitute_in_runs(paragraph.runs, pattern, mapping)
+        for paragraph in get_indexed_paragraphs(document, positions)
+    )
+
+
+class CompiledTemplate:
+    """
+    Parsed docx template with positions of the paragraphs
+    which may contain placeholders
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.mtime = os.stat(path).st_mtime_ns
+        self.document = Document(path)
+        self.positions = index_placeholder_paragraphs(self.document)
+
+    def clone(self):
+        """
+        Returns new document of the template. Only the main document part
+        is copied, other parts (styles, numbering, images, etc.) are not
+        changed by generators and shared with the template
+        """
+        main_part = self.document.part
+        memo = {
+            id(part): part
+            for part in main_part.package.iter_parts()
+            if part is not main_part
+        }
+        return copy.deepcopy(self.document, memo)
+
+
+_compiled_templates: dict[str, CompiledTemplate] = {}
+_compiled_templates_lock = threading.Lock()
+
+
+def get_compiled_template(path: str) -> CompiledTemplate:
+    """
+    Returns parsed template from the process cache.
+    Template is parsed again when its file is changed
+    """
+    mtime = os.stat(path).st_mtime_ns
+    template = _compiled_templates.get(path)
+    if template is None or template.mtime != mtime:
+        with _compiled_templates_lock:
+            template = _compiled_templates.get(path)
+            if template is None or template.mtime != mtime:
+                template = CompiledTemplate(path)
+                _compiled_templates[path] = template
+    return template
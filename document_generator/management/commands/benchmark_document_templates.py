@@ -0,0 +1,87 @@
+import io
+import re
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from docx import Document
+
+from document_generator.generators.template_engine import (
+    get_compiled_template,
+    get_paragraph_text,
+    index_placeholder_paragraphs,
+    get_indexed_paragraphs,
+    substitute_placeholders,
+)
+
+TEMPLATES_DIR = Path(settings.PROJECT_DIR) / "document_generator" / "templates"
+
+_placeholder_re = re.compile(r"%\w+%?")
+
+
+def get_template_placeholders(document) -> list:
+    return sorted(
+        {
+            placeholder
+            for paragraph in get_indexed_paragraphs(
+                document, index_placeholder_paragraphs(document)
+            )
+            for placeholder in _placeholder_re.findall(
+                get_paragraph_text(paragraph._p)
+            )
+        }
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures throughput of document generation (loading of the "
+        "template, substitution of placeholders and saving) in documents "
+        "per second for every template"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="Number of documents generated from each template",
+        )
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Parse template for every document instead of cloning it",
+        )
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        total_documents, total_time = 0, 0.0
+        for path in sorted(TEMPLATES_DIR.glob("*.docx")):
+            placeholders = get_template_placeholders(Document(path))
+            mapping = {
+                placeholder: f"Значение {i}"
+                for i, placeholder in enumerate(placeholders)
+            }
+
+            started_at = time.perf_counter()
+            for _ in range(iterations):
+                if options["no_cache"]:
+                    document, positions = Document(path), None
+                else:
+                    template = get_compiled_template(str(path))
+                    document = template.clone()
+                    positions = template.positions
+                substitute_placeholders(document, mapping, positions)
+                document.save(io.BytesIO())
+            duration = time.perf_counter() - started_at
+
+            total_documents += iterations
+            total_time += duration
+            self.stdout.write(
+                f"{path.name}: {len(placeholders)} placeholders, "
+                f"{iterations / duration:.1f} documents/s"
+            )
+        self.stdout.write(
+            f"Total: {total_documents / total_time:.1f} documents/s"
+        )
@@ -0,0 +1,249 @@
+import datetime
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils import timezone
+
+from common.prefetch import GenericPrefetch, prefetch_generic_related_objects
+from company.models import Company
+from document_generator.generators.document_generators import (
+    Act,
+    InvoiceDocument,
+)
+from document_generator.models import (
+    GeneratedDocumentModel,
+    GeneratedDocumentType,
+)
+from document_generator.pdf import get_stored_pdf
+from document_generator.storage import deduplicate_document
+from document_generator.tasks import init_worker_process, render_documents
+from exchange.models import EquipmentDeal, RecyclablesDeal
+from finance.models import InvoicePayment
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates acts and payment bills of the month for every company "
+        "with invoice payments. Companies are rendered in a pool of "
+        "processes, existing documents are skipped, so interrupted "
+        "generation can be continued by running the command again"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--month",
+            help="Month in format YYYY-MM, current month by default",
+        )
+        parser.add_argument(
+            "--company",
+            type=int,
+            action="append",
+            dest="companies",
+            help="Identifier of the company, can be repeated",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.DOCUMENT_GENERATION_WORKERS,
+            help="Number of processes generating documents",
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        invoices = InvoicePayment.objects.filter(is_deleted=False).for_month(
+            self.get_month_start_date(options["month"])
+        )
+        if options["companies"]:
+            invoices = invoices.filter(company__in=options["companies"])
+        companies = Company.objects.filter(
+            pk__in=invoices.values("company")
+        ).order_by("id")
+
+        existing_documents = self.get_existing_documents()
+        to_render = {}
+        for company in companies:
+            documents = self.build_company_documents(
+                company,
+                invoices.filter(company=company).order_by("id"),
+                existing_documents,
+            )
+            if documents:
+                to_render[company] = documents
+
+        total = len(to_render)
+        skipped = len(companies) - total
+        self.stdout.write(
+            f"Companies: {len(companies)}, "
+            f"already generated: {skipped}, to generate: {total}"
+        )
+        if not to_render:
+            return
+
+        started_at = time.perf_counter()
+        generated, failed = 0, []
+        # Processes must not share connections of the parent
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=options["workers"], initializer=init_worker_process
+        ) as pool:
+            futures = {
+                pool.submit(
+                    render_documents,
+                    [rendering for rendering, _ in documents],
+                ): company
+                for company, documents in to_render.items()
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                company = futures[future]
+                error = future.exception()
+                if error is None:
+                    models = [model for _, model in to_render[company]]
+                    for model in models:
+                        file_name, content_hash = deduplicate_document(
+                            model.document.name
+                        )
+                        model.document = file_name
+                        model.content_hash = content_hash
+                        model.pdf = get_stored_pdf(file_name)
+                    with transaction.atomic():
+                        GeneratedDocumentModel.objects.bulk_create(models)
+                    generated += len(models)
+                    result = f"{len(models)} documents"
+                else:
+                    failed.append(company)
+                    result = self.style.ERROR(f"error: {error!r}")
+                self.stdout.write(
+                    f"[{done}/{total}] {company.name} ({company.pk}): {result}"
+                )
+                if self.stopping:
+                    for future in futures:
+                        future.cancel()
+                    break
+
+        duration = time.perf_counter() - started_at
+        self.stdout.write(
+            f"Generated {generated} documents in {duration:.1f} s"
+        )
+        if self.stopping:
+            self.stdout.write("Interrupted, run the command again to continue")
+        if failed:
+            raise CommandError(
+                "Documents are not generated for companies: "
+                + ", ".join(str(company.pk) for company in failed)
+            )
+
+    def stop(self, signum, frame):
+        """
+        Stops after the next company, its documents are saved
+        """
+        self.stopping = True
+
+    @staticmethod
+    def get_month_start_date(month: str) -> datetime.date:
+        if not month:
+            return timezone.localdate().replace(day=1)
+        try:
+            return datetime.datetime.strptime(month, "%Y-%m").date()
+        except ValueError:
+            raise CommandError("Month must be in format YYYY-MM")
+
+    @staticmethod
+    def get_existing_documents() -> set:
+        return set(
+            GeneratedDocumentModel.objects.filter(
+                type__in=[
+                    GeneratedDocumentType.ACT_BUYER,
+                    GeneratedDocumentType.ACT_SELLER,
+                    GeneratedDocumentType.INVOICE_DOCUMENT,
+                ]
+            ).values_list("content_type", "object_id", "type", "company")
+        )
+
+    @staticmethod
+    def build_company_documents(
+        company, invoices, existing_documents: set
+    ) -> list:
+        """
+        Returns documents of the company not generated yet as pairs of
+        arguments of render_document and GeneratedDocumentModel.
+        Mappings are built here, as workers don't use the database
+        """
+        invoices = list(invoices)
+        prefetch_generic_related_objects(
+            invoices,
+            GenericPrefetch(
+                "deal",
+                querysets=[
+                    RecyclablesDeal.objects.select_related(
+                        "application__recyclables",
+                        "buyer_company__city",
+                        "supplier_company",
+                    ),
+                    EquipmentDeal.objects.select_related(
+                        "application",
+                        "buyer_company__city",
+                        "supplier_company",
+                    ),
+                ],
+            ),
+        )
+        invoice_content_type = ContentType.objects.get_for_model(
+            InvoicePayment
+        )
+
+        documents = []
+        for invoice in invoices:
+            deal = invoice.deal
+            if deal is None:
+                continue
+
+            key = (
+                invoice_content_type.pk,
+                invoice.pk,
+                GeneratedDocumentType.INVOICE_DOCUMENT,
+                None,
+            )
+            if key not in existing_documents:
+                existing_documents.add(key)
+                documents.append((InvoiceDocument(invoice), key))
+
+            act_type = (
+                GeneratedDocumentType.ACT_BUYER
+                if deal.buyer_company_id == company.pk
+                else GeneratedDocumentType.ACT_SELLER
+            )
+            key = (invoice.content_type_id, deal.pk, act_type, company.pk)
+            if key not in existing_documents:
+                existing_documents.add(key)
+                documents.append((Act(company=company, deal=deal), key))
+
+        return [
+            (
+                (
+                    generator.input_template_file_path,
+                    generator.output_file_name,
+                    generator.get_replacing_mapping(),
+                ),
+                GeneratedDocumentModel(
+                    content_type_id=content_type_id,
+                    object_id=object_id,
+                    type=document_type,
+                    company_id=company_id,
+                    document=generator.output_file_name,
+                ),
+            )
+            for generator, (
+                content_type_id,
+                object_id,
+                document_type,
+                company_id,
+            ) in documents
+        ]
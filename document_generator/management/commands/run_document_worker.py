@@ -0,0 +1,102 @@
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from document_generator.tasks import (
+    claim_tasks,
+    finish_task,
+    init_worker_process,
+    render_document,
+    requeue_stale_tasks,
+)
+
+
+class Command(BaseCommand):
+    help = "Generates queued documents in a pool of processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.DOCUMENT_GENERATION_WORKERS,
+            help="Number of processes generating documents",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait for new tasks",
+        )
+        parser.add_argument(
+            "--stale-timeout",
+            type=int,
+            default=600,
+            help=(
+                "Seconds after which running tasks are considered "
+                "abandoned by a stopped worker and queued again"
+            ),
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when there are no queued tasks",
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        workers = options["workers"]
+        stale_timeout = timedelta(seconds=options["stale_timeout"])
+        requeued = requeue_stale_tasks(stale_timeout)
+        if requeued:
+            self.stdout.write(f"Queued again {requeued} stale tasks")
+
+        # Processes must not share connections of the parent
+        connections.close_all()
+        running = {}
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=init_worker_process
+        ) as pool:
+            while not self.stopping or running:
+                free_workers = workers - len(running)
+                if free_workers and not self.stopping:
+                    for task in claim_tasks(free_workers):
+                        future = pool.submit(
+                            render_document,
+                            task.template_path,
+                            task.output_file_name,
+                            task.replacing_mapping,
+                        )
+                        running[future] = task
+
+                if not running:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+
+                done, _ = wait(
+                    running,
+                    timeout=options["poll_interval"],
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    task = running.pop(future)
+                    finish_task(task, future.exception())
+                    self.stdout.write(
+                        f"Task {task.pk}: "
+                        f"{task.get_status_display().lower()}"
+                    )
+
+    def stop(self, signum, frame):
+        """
+        Stops taking new tasks, running tasks are finished
+        """
+        self.stopping = True
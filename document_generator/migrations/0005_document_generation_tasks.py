@@ -0,0 +1,139 @@
+# Generated by Django 4.1.7 on 2026-10-17 12:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("document_generator", "0004_alter_generateddocumentmodel_type"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="generateddocumentmodel",
+            name="status",
+            field=models.PositiveSmallIntegerField(
+                choices=[
+                    (1, "Генерируется"),
+                    (2, "Готов"),
+                    (3, "Ошибка генерации"),
+                ],
+                default=2,
+                verbose_name="Статус",
+            ),
+        ),
+        migrations.CreateModel(
+            name="DocumentGenerationTask",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "is_deleted",
+                    models.BooleanField(
+                        default=False, verbose_name="Помечен как удаленный"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Дата добавления"
+                    ),
+                ),
+                (
+                    "status",
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (1, "В очереди"),
+                            (2, "Выполняется"),
+                            (3, "Выполнена"),
+                            (4, "Ошибка"),
+                        ],
+                        default=1,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "template_path",
+                    models.CharField(max_length=1024, verbose_name="Шаблон"),
+                ),
+                (
+                    "output_file_name",
+                    models.CharField(
+                        max_length=1024, verbose_name="Файл документа"
+                    ),
+                ),
+                (
+                    "replacing_mapping",
+                    models.JSONField(default=dict, verbose_name="Замены"),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Попытки"
+                    ),
+                ),
+                (
+                    "error",
+                    models.TextField(
+                        blank=True, default="", verbose_name="Ошибка"
+                    ),
+                ),
+                (
+                    "started_at",
+                    models.DateTimeField(
+                        null=True, verbose_name="Начало выполнения"
+                    ),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        null=True, verbose_name="Окончание выполнения"
+                    ),
+                ),
+                (
+                    "requested_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Задача генерации документа",
+                "verbose_name_plural": "Задачи генерации документов",
+                "db_table": "document_generation_tasks",
+            },
+        ),
+        migrations.AddField(
+            model_name="generateddocumentmodel",
+            name="task",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="documents",
+                to="document_generator.documentgenerationtask",
+                verbose_name="Задача генерации",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="documentgenerationtask",
+            index=models.Index(
+                fields=["status", "id"], name="document_ge_status_a010b4_idx"
+            ),
+        ),
+    ]
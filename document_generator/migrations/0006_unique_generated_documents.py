@@ -0,0 +1,73 @@
+# Generated by Django 4.1.7 on 2026-10-17 12:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def delete_duplicated_documents(apps, schema_editor):
+    """
+    Keeps the latest of the documents generated for the same object
+    """
+    GeneratedDocumentModel = apps.get_model(
+        "document_generator", "GeneratedDocumentModel"
+    )
+    latest_ids = (
+        GeneratedDocumentModel.objects.values(
+            "content_type", "object_id", "type"
+        )
+        .annotate(latest_id=models.Max("id"))
+        .values("latest_id")
+    )
+    GeneratedDocumentModel.objects.exclude(id__in=latest_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("company", "0018_alter_company_bank_name_alter_company_bic_and_more"),
+        ("document_generator", "0005_document_generation_tasks"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="generateddocumentmodel",
+            name="company",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Компания, для которой сгенерирован документ, если документ объекта различается для компаний",
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="company.company",
+                verbose_name="Компания",
+            ),
+        ),
+        migrations.AddField(
+            model_name="generateddocumentmodel",
+            name="content_hash",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                max_length=64,
+                verbose_name="Хэш содержимого",
+            ),
+        ),
+        migrations.RunPython(
+            delete_duplicated_documents, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="generateddocumentmodel",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("company__isnull", True)),
+                fields=("content_type", "object_id", "type"),
+                name="unique_generated_document",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="generateddocumentmodel",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("company__isnull", False)),
+                fields=("content_type", "object_id", "type", "company"),
+                name="unique_generated_company_document",
+            ),
+        ),
+    ]
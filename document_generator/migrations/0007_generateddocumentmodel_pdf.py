@@ -0,0 +1,23 @@
+# Generated by Django 4.1.7 on 2026-10-17 12:58
+
+from django.db import migrations, models
+import document_generator.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("document_generator", "0006_unique_generated_documents"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="generateddocumentmodel",
+            name="pdf",
+            field=models.FileField(
+                blank=True,
+                upload_to=document_generator.models.generated_document_storage,
+                verbose_name="Документ в PDF",
+            ),
+        ),
+    ]
@@ -1,6 +1,7 @@
 # Create your models here.
 import uuid
 
+from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
@@ -31,12 +32,86 @@ class GeneratedDocumentType(models.IntegerChoices):
     INVOICE_DOCUMENT = 10, "Платежный счет"
 
 
+class GeneratedDocumentStatus(models.IntegerChoices):
+    PENDING = 1, "Генерируется"
+    READY = 2, "Готов"
+    FAILED = 3, "Ошибка генерации"
+
+
+class DocumentGenerationTaskStatus(models.IntegerChoices):
+    PENDING = 1, "В очереди"
+    RUNNING = 2, "Выполняется"
+    COMPLETED = 3, "Выполнена"
+    FAILED = 4, "Ошибка"
+
+
+class DocumentGenerationTask(BaseModel):
+    """
+    Task of the background document generation,
+    executed by `manage.py run_document_worker`
+    """
+
+    status = get_field_from_choices(
+        "Статус",
+        DocumentGenerationTaskStatus,
+        default=DocumentGenerationTaskStatus.PENDING,
+    )
+    template_path = models.CharField("Шаблон", max_length=1024)
+    output_file_name = models.CharField("Файл документа", max_length=1024)
+    replacing_mapping = models.JSONField("Замены", default=dict)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name="Пользователь",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    attempts = models.PositiveSmallIntegerField("Попытки", default=0)
+    error = models.TextField("Ошибка", blank=True, default="")
+    started_at = models.DateTimeField("Начало выполнения", null=True)
+    finished_at = models.DateTimeField("Окончание выполнения", null=True)
+
+    class Meta:
+        verbose_name = "Задача генерации документа"
+        verbose_name_plural = "Задачи генерации документов"
+        db_table = "document_generation_tasks"
+        indexes = [models.Index(fields=["status", "id"])]
+
+
 class GeneratedDocumentModel(BaseModel):
     name = models.CharField(blank=True, max_length=512)
     document = models.FileField(
         "Документ", upload_to=generated_document_storage
     )
+    pdf = models.FileField(
+        "Документ в PDF", upload_to=generated_document_storage, blank=True
+    )
     type = get_field_from_choices("Тип документа", GeneratedDocumentType)
+    status = get_field_from_choices(
+        "Статус",
+        GeneratedDocumentStatus,
+        default=GeneratedDocumentStatus.READY,
+    )
+    task = models.ForeignKey(
+        DocumentGenerationTask,
+        verbose_name="Задача генерации",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="documents",
+    )
+    content_hash = models.CharField(
+        "Хэш содержимого", max_length=64, blank=True, db_index=True
+    )
+    company = models.ForeignKey(
+        "company.Company",
+        verbose_name="Компания",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        help_text="Компания, для которой сгенерирован документ, "
+        "если документ объекта различается для компаний",
+    )
     content_type = models.ForeignKey(
         ContentType, verbose_name="Тип контента", on_delete=models.CASCADE
     )
@@ -48,4 +123,16 @@ class GeneratedDocumentModel(BaseModel):
         verbose_name_plural = "Сгенерированные документы"
 
         indexes = [models.Index(fields=["content_type", "object_id"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_type", "object_id", "type"],
+                condition=models.Q(company__isnull=True),
+                name="unique_generated_document",
+            ),
+            models.UniqueConstraint(
+                fields=["content_type", "object_id", "type", "company"],
+                condition=models.Q(company__isnull=False),
+                name="unique_generated_company_document",
+            ),
+        ]
         db_table = "generated_documents"
@@ -0,0 +1,192 @@
+"""
+Conversion of generated documents to PDF.
+
+Starting of LibreOffice takes seconds, so every process generating
+documents starts its own LibreOffice in listener mode (with unoserver,
+which converts documents received by XML-RPC) once and reuses it for all
+conversions. Number of conversions running at the same time is bounded
+by the number of the worker processes.
+"""
+import logging
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import tempfile
+import time
+import xmlrpc.client
+from multiprocessing.util import Finalize
+from typing import Optional
+
+from django.conf import settings
+
+log = logging.getLogger(__name__)
+
+# Seconds to wait for LibreOffice to start listening
+STARTUP_TIMEOUT = 60
+
+
+def get_pdf_file_name(file_name: str) -> str:
+    """
+    PDF is stored near the document with the same name
+    """
+    return f"{os.path.splitext(file_name)[0]}.pdf"
+
+
+def get_stored_pdf(file_name: str) -> str:
+    """
+    Returns PDF of the document if it's converted, otherwise empty string
+    """
+    pdf_file_name = get_pdf_file_name(file_name)
+    if settings.DOCUMENT_PDF_ENABLED and os.path.exists(
+        os.path.join(settings.MEDIA_ROOT, pdf_file_name)
+    ):
+        return pdf_file_name
+    return ""
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TimeoutTransport(xmlrpc.client.Transport):
+    def __init__(self, timeout: float):
+        super().__init__()
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        connection = super().make_connection(host)
+        connection.timeout = self.timeout
+        return connection
+
+
+class PdfConverter:
+    """
+    LibreOffice listening for conversions on the local port.
+    It's started on the first conversion and restarted when it exits
+    or doesn't respond
+    """
+
+    def __init__(self):
+        self.process: Optional[subprocess.Popen] = None
+        self.port: Optional[int] = None
+        self.user_installation: Optional[str] = None
+
+    def start(self):
+        self.port = get_free_port()
+        # Instances of LibreOffice can't share profile
+        self.user_installation = tempfile.mkdtemp(prefix="libreoffice_")
+        self.process = subprocess.Popen(
+            [
+                settings.DOCUMENT_PDF_CONVERTER_COMMAND,
+                "--interface",
+                "127.0.0.1",
+                "--port",
+                str(self.port),
+                "--uno-port",
+                str(get_free_port()),
+                "--user-installation",
+                f"file://{self.user_installation}",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            # LibreOffice is stopped together with the server
+            start_new_session=True,
+        )
+        started_at = time.monotonic()
+        while not self.is_listening():
+            if self.process.poll() is not None:
+                self.stop()
+                raise RuntimeError("PDF converter exited on start")
+            if time.monotonic() - started_at > STARTUP_TIMEOUT:
+                self.stop()
+                raise RuntimeError("PDF converter is not started in time")
+            time.sleep(0.5)
+        log.info("PDF converter is started on port %s", self.port)
+
+    def is_listening(self) -> bool:
+        try:
+            self.get_server(timeout=1).system.listMethods()
+        except (OSError, xmlrpc.client.Error):
+            return False
+        return True
+
+    def is_running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def stop(self):
+        if self.process is not None:
+            self.signal(signal.SIGTERM)
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.signal(signal.SIGKILL)
+                self.process.wait()
+            self.process = None
+        if self.user_installation is not None:
+            shutil.rmtree(self.user_installation, ignore_errors=True)
+            self.user_installation = None
+
+    def signal(self, signum: int):
+        try:
+            os.killpg(self.process.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def get_server(self, timeout: float) -> xmlrpc.client.ServerProxy:
+        return xmlrpc.client.ServerProxy(
+            f"http://127.0.0.1:{self.port}",
+            transport=TimeoutTransport(timeout),
+            allow_none=True,
+        )
+
+    def convert(self, input_path: str, output_path: str):
+        if not self.is_running():
+            self.start()
+        try:
+            self.get_server(
+                timeout=settings.DOCUMENT_PDF_CONVERSION_TIMEOUT
+            ).convert(input_path, None, output_path, "pdf")
+        except (OSError, xmlrpc.client.ProtocolError):
+            # LibreOffice hangs or crashed, it's started again
+            # on the next conversion
+            self.stop()
+            raise
+
+
+_converter: Optional[PdfConverter] = None
+
+
+def get_pdf_converter() -> PdfConverter:
+    """
+    Returns converter of the process. It's stopped when
+    the worker process exits
+    """
+    global _converter
+    if _converter is None:
+        _converter = PdfConverter()
+        Finalize(_converter, _converter.stop, exitpriority=10)
+    return _converter
+
+
+def convert_to_pdf(file_name: str) -> Optional[str]:
+    """
+    Converts document in the media storage to PDF, returns file name
+    of PDF or None if conversion failed. Failed conversion doesn't fail
+    generation of the document, previous PDF of the document is removed
+    """
+    pdf_file_name = get_pdf_file_name(file_name)
+    pdf_path = os.path.join(settings.MEDIA_ROOT, pdf_file_name)
+    try:
+        get_pdf_converter().convert(
+            os.path.join(settings.MEDIA_ROOT, file_name), pdf_path
+        )
+    except Exception:
+        log.exception("Conversion of %s to PDF failed", file_name)
+        if os.path.exists(pdf_path):
+            os.remove(pdf_path)
+        return None
+    return pdf_file_name
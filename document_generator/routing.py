@@ -0,0 +1,7 @@
+from django.urls import re_path
+
+from document_generator import consumers
+
+websocket_urlpatterns = [
+    re_path(r"ws/documents/", consumers.DocumentConsumer.as_asgi()),
+]
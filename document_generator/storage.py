@@ -0,0 +1,73 @@
+"""
+Deduplication of generated documents.
+
+Documents with the same content (f.e. regenerated for another object
+with the same data) are stored once: the new file is removed and
+the document refers to the file stored before.
+"""
+import hashlib
+import zipfile
+from typing import Optional
+
+from django.core.files.storage import default_storage
+from django.db.models import QuerySet
+
+from document_generator.models import GeneratedDocumentModel
+from document_generator.pdf import get_pdf_file_name
+
+
+def get_document_hash(file_name: str) -> str:
+    """
+    Returns sha256 of the parts of docx document. Archive metadata
+    (f.e. modification time of the parts) differs between documents
+    saved at different time, so it isn't hashed
+    """
+    digest = hashlib.sha256()
+    with zipfile.ZipFile(default_storage.path(file_name)) as archive:
+        for name in sorted(archive.namelist()):
+            digest.update(name.encode())
+            digest.update(archive.read(name))
+    return digest.hexdigest()
+
+
+def get_stored_document(file_name: str, content_hash: str) -> Optional[str]:
+    """
+    Returns other file of the document with the same content
+    """
+    stored_files = (
+        GeneratedDocumentModel.objects.filter(content_hash=content_hash)
+        .exclude(document=file_name)
+        .values_list("document", flat=True)
+        .distinct()
+    )
+    for stored_file in stored_files:
+        # Files with the same name are overwritten by the generators,
+        # so content of the stored file is checked
+        if (
+            default_storage.exists(stored_file)
+            and get_document_hash(stored_file) == content_hash
+        ):
+            return stored_file
+    return None
+
+
+def deduplicate_document(
+    file_name: str, documents: Optional[QuerySet] = None
+) -> tuple[str, str]:
+    """
+    Returns file of the document and hash of its content. If the same
+    document is already stored, returns its file and removes file_name
+    with its PDF, unless it's used by other documents than the given ones
+    """
+    content_hash = get_document_hash(file_name)
+    stored_file = get_stored_document(file_name, content_hash)
+    if stored_file is None:
+        return file_name, content_hash
+
+    users = GeneratedDocumentModel.objects.filter(document=file_name)
+    if documents is not None:
+        users = users.exclude(pk__in=documents.values("pk"))
+    if not users.exists():
+        default_storage.delete(file_name)
+        default_storage.delete(get_pdf_file_name(file_name))
+    return stored_file, content_hash
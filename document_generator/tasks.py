@@ -0,0 +1,234 @@
+"""
+Background generation of documents.
+
+Requests put a DocumentGenerationTask with already built replacing mapping
+to the queue and return pending GeneratedDocumentModel. Tasks are executed
+by `manage.py run_document_worker` in a pool of processes, users are
+notified about generated documents with the channel layer.
+"""
+import logging
+import signal
+import traceback
+from datetime import timedelta
+from typing import Optional
+
+import django
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from document_generator.generators.document_generators import (
+    BaseGenerator,
+    TemplateGenerator,
+)
+from document_generator.models import (
+    DocumentGenerationTask,
+    DocumentGenerationTaskStatus,
+    GeneratedDocumentModel,
+    GeneratedDocumentStatus,
+)
+from document_generator.pdf import convert_to_pdf, get_stored_pdf
+from document_generator.storage import deduplicate_document
+
+log = logging.getLogger(__name__)
+
+# Failed tasks are retried until the number of attempts reaches this value.
+# Attempts are counted when tasks are finished or requeued as stale
+MAX_ATTEMPTS = 3
+
+
+class StaleTaskError(Exception):
+    """
+    Worker was stopped during execution of the task
+    """
+
+
+def get_documents_group_name(user_id: int) -> str:
+    return f"documents_{user_id}"
+
+
+def create_generation_task(
+    generator: BaseGenerator, requested_by=None
+) -> DocumentGenerationTask:
+    return DocumentGenerationTask.objects.create(
+        template_path=generator.input_template_file_path,
+        output_file_name=generator.output_file_name,
+        replacing_mapping=generator.get_replacing_mapping(),
+        requested_by=requested_by
+        if requested_by and requested_by.is_authenticated
+        else None,
+    )
+
+
+def enqueue_document(
+    generator: BaseGenerator, document_filter_kwargs: dict, requested_by=None
+) -> GeneratedDocumentModel:
+    """
+    Creates pending document and the task to generate it.
+    Document file name is known beforehand, so the document has it
+    from the start and the file is available when status is READY
+    """
+    with transaction.atomic():
+        task = create_generation_task(generator, requested_by)
+        return GeneratedDocumentModel.objects.create(
+            **document_filter_kwargs,
+            document=generator.output_file_name,
+            status=GeneratedDocumentStatus.PENDING,
+            task=task,
+        )
+
+
+def regenerate_document(
+    document: GeneratedDocumentModel,
+    generator: BaseGenerator,
+    requested_by=None,
+) -> GeneratedDocumentModel:
+    """
+    Queues generation of the document failed before
+    """
+    with transaction.atomic():
+        document.task = create_generation_task(generator, requested_by)
+        document.document = generator.output_file_name
+        document.status = GeneratedDocumentStatus.PENDING
+        document.save(update_fields=["task", "document", "status"])
+    return document
+
+
+def init_worker_process():
+    """
+    Initializer of the worker processes. Interruption is handled
+    by the worker command, which lets running tasks finish
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    django.setup()
+
+
+def render_document(
+    template_path: str, output_file_name: str, replacing_mapping: dict
+) -> str:
+    """
+    Executed in the worker processes, so doesn't use the database.
+    With DOCUMENT_PDF_ENABLED document is also converted to PDF
+    """
+    file_name = TemplateGenerator(
+        template_path, output_file_name, replacing_mapping
+    ).replace_all_and_save()
+    if settings.DOCUMENT_PDF_ENABLED:
+        convert_to_pdf(file_name)
+    return file_name
+
+
+def render_documents(documents: list) -> list:
+    """
+    Renders list of (template_path, output_file_name, replacing_mapping)
+    in one worker process, so templates are parsed once for the batch
+    """
+    return [render_document(*document) for document in documents]
+
+
+def claim_tasks(limit: int) -> list:
+    """
+    Marks up to limit pending tasks as running and returns them.
+    Locked rows are skipped, so several workers don't claim the same task
+    """
+    with transaction.atomic():
+        queryset = DocumentGenerationTask.objects.filter(
+            status=DocumentGenerationTaskStatus.PENDING
+        ).order_by("id")
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        tasks = list(queryset[:limit])
+        for task in tasks:
+            task.status = DocumentGenerationTaskStatus.RUNNING
+            task.started_at = timezone.now()
+        DocumentGenerationTask.objects.bulk_update(
+            tasks, ["status", "started_at"]
+        )
+    return tasks
+
+
+def requeue_stale_tasks(timeout: timedelta) -> int:
+    """
+    Returns to the queue tasks of the workers stopped during execution.
+    Stale execution is a failed attempt, so tasks stopping the worker
+    MAX_ATTEMPTS times are failed and the user requested them is notified
+    """
+    stale_tasks = DocumentGenerationTask.objects.filter(
+        status=DocumentGenerationTaskStatus.RUNNING,
+        started_at__lt=timezone.now() - timeout,
+    )
+    for task in stale_tasks.filter(attempts__gte=MAX_ATTEMPTS - 1):
+        finish_task(
+            task,
+            StaleTaskError(f"Task was not finished in {timeout}"),
+        )
+    return stale_tasks.update(
+        status=DocumentGenerationTaskStatus.PENDING,
+        attempts=F("attempts") + 1,
+    )
+
+
+def finish_task(
+    task: DocumentGenerationTask, error: Optional[BaseException] = None
+):
+    """
+    Saves result of the task, updates status of its documents
+    and notifies user requested them
+    """
+    task.finished_at = timezone.now()
+    task.attempts += 1
+    if error is None:
+        task.status = DocumentGenerationTaskStatus.COMPLETED
+        task.error = ""
+        file_name, content_hash = deduplicate_document(
+            task.output_file_name, task.documents.all()
+        )
+        documents_fields = {
+            "status": GeneratedDocumentStatus.READY,
+            "document": file_name,
+            "content_hash": content_hash,
+            "pdf": get_stored_pdf(file_name),
+        }
+    else:
+        task.error = "".join(
+            traceback.format_exception(type(error), error, error.__traceback__)
+        )
+        if task.attempts < MAX_ATTEMPTS:
+            task.status = DocumentGenerationTaskStatus.PENDING
+            task.save(
+                update_fields=["status", "attempts", "error", "finished_at"]
+            )
+            return
+        task.status = DocumentGenerationTaskStatus.FAILED
+        documents_fields = {"status": GeneratedDocumentStatus.FAILED}
+        log.error(
+            "Document generation task %s failed: %s", task.pk, task.error
+        )
+
+    with transaction.atomic():
+        task.save(update_fields=["status", "attempts", "error", "finished_at"])
+        task.documents.update(**documents_fields)
+
+    if task.requested_by_id:
+        notify_documents_generated(task)
+
+
+def notify_documents_generated(task: DocumentGenerationTask):
+    from document_generator.api.serializers import (
+        GeneratedDocumentSerializer,
+    )
+
+    channel_layer = get_channel_layer()
+    group_name = get_documents_group_name(task.requested_by_id)
+    for document in task.documents.all():
+        async_to_sync(channel_layer.group_send)(
+            group_name,
+            {
+                "type": "document_generated",
+                "document": GeneratedDocumentSerializer(document).data,
+            },
+        )
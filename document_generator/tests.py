@@ -1 +1,63 @@
-# Create your tests here.
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from document_generator.models import (
+    DocumentGenerationTask,
+    DocumentGenerationTaskStatus,
+    GeneratedDocumentModel,
+    GeneratedDocumentStatus,
+    GeneratedDocumentType,
+)
+from document_generator.tasks import MAX_ATTEMPTS, requeue_stale_tasks
+
+User = get_user_model()
+
+
+@mock.patch("document_generator.tasks.notify_documents_generated")
+class RequeueStaleTasksTest(TestCase):
+    """
+    Tasks of stopped workers are queued again until they reach
+    MAX_ATTEMPTS, then they are failed
+    """
+
+    def create_task(self, attempts: int) -> DocumentGenerationTask:
+        user = User.objects.create(phone=f"+7999000000{attempts}")
+        task = DocumentGenerationTask.objects.create(
+            status=DocumentGenerationTaskStatus.RUNNING,
+            template_path="template.docx",
+            output_file_name="document.docx",
+            requested_by=user,
+            attempts=attempts,
+            started_at=timezone.now() - timedelta(hours=1),
+        )
+        GeneratedDocumentModel.objects.create(
+            type=GeneratedDocumentType.INVOICE_DOCUMENT,
+            status=GeneratedDocumentStatus.PENDING,
+            task=task,
+            content_object=user,
+        )
+        return task
+
+    def test_requeued(self, notify):
+        task = self.create_task(attempts=0)
+        self.assertEqual(requeue_stale_tasks(timedelta(minutes=10)), 1)
+        task.refresh_from_db()
+        self.assertEqual(task.status, DocumentGenerationTaskStatus.PENDING)
+        self.assertEqual(task.attempts, 1)
+        notify.assert_not_called()
+
+    def test_failed_after_max_attempts(self, notify):
+        task = self.create_task(attempts=MAX_ATTEMPTS - 1)
+        self.assertEqual(requeue_stale_tasks(timedelta(minutes=10)), 0)
+        task.refresh_from_db()
+        self.assertEqual(task.status, DocumentGenerationTaskStatus.FAILED)
+        self.assertEqual(task.attempts, MAX_ATTEMPTS)
+        self.assertIn("StaleTaskError", task.error)
+        self.assertEqual(
+            task.documents.get().status, GeneratedDocumentStatus.FAILED
+        )
+        notify.assert_called_once_with(task)
@@ -26,7 +26,6 @@ from exchange.models import (
     DealType,
 )
 from exchange.utils import get_recyclables_application_total_weight
-from logistics.models import TransportApplication
 from product.api.serializers import (
     RecyclablesSerializer,
     EquipmentSerializer,
@@ -223,52 +222,11 @@ class ExchangeRecyclablesSerializer(NonNullDynamicFieldsModelSerializer):
         model = Recyclables
 
     def get_latest_deal_price(self, instance: Recyclables):
-        # FIXME: Попробовать сделать через аннотации в get_queryset
-        try:
-            latest_deal = RecyclablesDeal.objects.filter(
-                application__recyclables=instance,
-                status=DealStatus.COMPLETED,
-            ).latest("created_at")
-        except RecyclablesDeal.DoesNotExist:
-            latest_deal = None
-        return latest_deal.price if latest_deal else None
+        # Annotated from price ticker in RecyclablesQuerySet
+        return getattr(instance, "latest_deal_price", None)
 
     def get_deviation_percent(self, instance: Recyclables):
-        # FIXME: Попробовать сделать через аннотации в get_queryset
-        try:
-            latest_deal = RecyclablesDeal.objects.filter(
-                application__recyclables=instance,
-                status=DealStatus.COMPLETED,
-            ).latest("created_at")
-        except RecyclablesDeal.DoesNotExist:
-            latest_deal = None
-
-        if not latest_deal:
-            return None
-
-        try:
-            pre_latest_deal = (
-                RecyclablesDeal.objects.filter(
-                    application__recyclables=instance,
-                    status=DealStatus.COMPLETED,
-                )
-                .exclude(pk=latest_deal.pk)
-                .latest("created_at")
-            )
-        except RecyclablesDeal.DoesNotExist:
-            pre_latest_deal = None
-
-        if not pre_latest_deal:
-            return None
-
-        latest_deal_price = float(latest_deal.price)
-        pre_latest_deal_price = float(pre_latest_deal.price)
-        return round(
-            (latest_deal_price - pre_latest_deal_price)
-            / pre_latest_deal_price
-            * 100,
-            2,
-        )
+        return getattr(instance, "deviation_percent", None)
 
     def get_deviation(self, instance: Recyclables):
         deviation_percent = self.get_deviation_percent(instance)
@@ -388,16 +346,13 @@ class RecyclablesDealSerializer(
     def get_transport_application(self, instance: RecyclablesDeal):
         from logistics.api.serializers import TransportApplicationSerializer
 
-        try:
-            application = TransportApplication.objects.get(
-                content_type=ContentType.objects.get_for_model(instance),
-                object_id=instance.id,
-            )
-            return TransportApplicationSerializer(
-                context=self.context
-            ).to_representation(application)
-        except TransportApplication.DoesNotExist:
+        # Prefetched with owner deal by GenericPrefetchMixin of viewsets
+        application = next(iter(instance.transport_applications.all()), None)
+        if application is None:
             return None
+        return TransportApplicationSerializer(
+            context=self.context
+        ).to_representation(application)
 
 
 class UpdateRecyclablesDealSerializerUsingTransportApplication(
@@ -547,19 +502,16 @@ class EquipmentDealSerializer(
     class Meta:
         model = EquipmentDeal
 
-    def get_transport_application(self, instance: RecyclablesDeal):
+    def get_transport_application(self, instance: EquipmentDeal):
         from logistics.api.serializers import TransportApplicationSerializer
 
-        try:
-            application = TransportApplication.objects.get(
-                content_type=ContentType.objects.get_for_model(instance),
-                object_id=instance.id,
-            )
-            return TransportApplicationSerializer(
-                context=self.context
-            ).to_representation(application)
-        except TransportApplication.DoesNotExist:
+        # Prefetched with owner deal by GenericPrefetchMixin of viewsets
+        application = next(iter(instance.transport_applications.all()), None)
+        if application is None:
             return None
+        return TransportApplicationSerializer(
+            context=self.context
+        ).to_representation(application)
 
 
 class UpdateEquipmentDealSerializer(DynamicFieldsModelSerializer):
@@ -1,5 +1,5 @@
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Q
+from django.db.models import Prefetch, Q
 from django_filters import (
     MultipleChoiceFilter,
     NumberFilter,
@@ -15,22 +15,31 @@ from rest_framework import filters, generics, viewsets
 from drf_yasg import openapi as api
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework.decorators import action
-from rest_framework.exceptions import NotAuthenticated
+from rest_framework.exceptions import NotAuthenticated, NotFound
 from rest_framework.response import Response
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 from rest_framework_nested.viewsets import NestedViewSetMixin
 
+from common.cache import cache_response
 from common.filters import FavoriteFilterBackend
+from common.pagination import CURSOR_MODE, PAGE_MODE
+from common.prefetch import GenericPrefetch
 from common.views import (
+    GenericPrefetchMixin,
     MultiSerializerMixin,
     ImagesMixin,
     FavoritableMixin,
     DocumentsMixin,
     ExcludeMixin,
 )
+from common.zip_stream import get_zip_response
+from company.models import Company
 from document_generator.api.serializers import GeneratedDocumentSerializer
-from document_generator.common import get_or_generate_document
+from document_generator.common import (
+    get_archive_documents,
+    get_or_generate_document,
+)
 from document_generator.generators.document_generators import (
     AgreementSpecification,
     Act,
@@ -64,6 +73,7 @@ from exchange.models import (
     EquipmentDeal,
 )
 from exchange.services import filter_qs_by_coordinates
+from logistics.models import TransportApplication
 from exchange.utils import (
     validate_period,
     get_truncation_class,
@@ -93,7 +103,9 @@ class DealDocumentGeneratorMixin:
             "object_id": deal.id,
             "type": GeneratedDocumentType.AGREEMENT_SPECIFICATION,
         }
-        document = get_or_generate_document(generator, filter_kwargs)
+        document = get_or_generate_document(
+            generator, filter_kwargs, requested_by=request.user
+        )
 
         return Response(GeneratedDocumentSerializer(document).data)
 
@@ -116,10 +128,62 @@ class DealDocumentGeneratorMixin:
                 "content_type": content_type,
                 "object_id": deal.id,
                 "type": document_type,
+                "company": request.user.company,
             },
+            requested_by=request.user,
         )
         return Response(GeneratedDocumentSerializer(document).data)
 
+    @action(
+        methods=["GET"],
+        detail=True,
+        description="Получение ZIP-архива документов сделки и её перевозок",
+    )
+    def download_documents(self, request, pk):
+        user = self.request.user
+        if user.is_anonymous:
+            raise NotAuthenticated
+        deal = self.get_object()
+        # Admins and managers get documents generated for all companies,
+        # companies of the deal get their own
+        all_companies = user.role in (
+            UserRole.SUPER_ADMIN,
+            UserRole.ADMIN,
+            UserRole.MANAGER,
+        )
+        company = None
+        if user.company_id in (
+            deal.supplier_company_id,
+            deal.buyer_company_id,
+        ):
+            company = user.company
+        elif not all_companies and not (
+            user.role == UserRole.LOGIST
+            and deal.transport_applications.filter(
+                approved_logistics_offer__logist=user
+            ).exists()
+        ):
+            raise NotFound
+        deal_content_type = ContentType.objects.get_for_model(deal)
+        application_content_type = ContentType.objects.get_for_model(
+            TransportApplication
+        )
+        folders = {(deal_content_type.pk, deal.pk): ""}
+        application_ids = deal.transport_applications.values_list(
+            "id", flat=True
+        )
+        for application_id in application_ids:
+            folders[
+                (application_content_type.pk, application_id)
+            ] = "Перевозка"
+
+        documents = get_archive_documents(
+            folders, company=company, all_companies=all_companies
+        )
+        return get_zip_response(
+            documents, f"Документы сделки {deal.deal_number}.zip"
+        )
+
 
 class RecyclablesApplicationFilterSet(FilterSet):
     total_weight__gte = NumberFilter(
@@ -163,9 +227,16 @@ class RecyclablesApplicationViewSet(
     ExcludeMixin,
     viewsets.ModelViewSet,
 ):
-    queryset = RecyclablesApplication.objects.select_related(
-        "company", "recyclables"
-    ).annotate_total_weight()
+    pagination_modes = (PAGE_MODE, CURSOR_MODE)
+    queryset = (
+        RecyclablesApplication.objects.select_related("recyclables__category")
+        .prefetch_related(
+            # Average review rate of the company is serialized
+            Prefetch("company", Company.objects.annotate_reviews()),
+            "images",
+        )
+        .annotate_total_weight()
+    )
     serializer_classes = {
         "list": RecyclablesApplicationSerializer,
         "retrieve": RecyclablesApplicationSerializer,
@@ -268,6 +339,7 @@ class EquipmentApplicationViewSet(
     ExcludeMixin,
     viewsets.ModelViewSet,
 ):
+    pagination_modes = (PAGE_MODE, CURSOR_MODE)
     queryset = EquipmentApplication.objects.select_related(
         "company", "equipment"
     )
@@ -289,6 +361,15 @@ class EquipmentApplicationViewSet(
     filterset_class = EquipmentApplicationFilterSet
 
 
+EXCHANGE_RECYCLABLES_CACHE_DEPENDENCIES = (
+    "exchange.RecyclablesApplication",
+    "exchange.RecyclablesDeal",
+    "exchange.RecyclablesPriceTicker",
+    "product.Recyclables",
+    "product.RecyclablesCategory",
+)
+
+
 class ExchangeRecyclablesViewSet(
     generics.ListAPIView,
     viewsets.GenericViewSet,
@@ -328,6 +409,7 @@ class ExchangeRecyclablesViewSet(
             ),
         ],
     )
+    @cache_response(depends_on=EXCHANGE_RECYCLABLES_CACHE_DEPENDENCIES)
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
@@ -343,6 +425,7 @@ class ExchangeRecyclablesViewSet(
         ],
     )
     @action(methods=["GET"], detail=True)
+    @cache_response(depends_on=EXCHANGE_RECYCLABLES_CACHE_DEPENDENCIES)
     def graph(self, request, pk):
         period = request.query_params.get("period", "all")
         period = validate_period(period)
@@ -356,7 +439,7 @@ class ExchangeRecyclablesViewSet(
             TruncClass, lower_date_bound, recyclable
         )
 
-        graph_data = deals.values_list("price", "truncated_date")
+        graph_data = list(deals.values_list("price", "truncated_date"))
 
         return Response(graph_data)
 
@@ -377,6 +460,45 @@ class ExchangeRecyclablesViewSet(
         return deals
 
 
+# Transport application of the deal with the objects
+# used by TransportApplicationSerializer
+DEAL_TRANSPORT_APPLICATIONS_PREFETCH = GenericPrefetch(
+    "transport_applications",
+    querysets=[
+        TransportApplication.objects.select_related(
+            "shipping_city",
+            "delivery_city",
+            "approved_logistics_offer__logist",
+            "approved_logistics_offer__contractor",
+            "approved_logistics_offer__chat",
+        ).prefetch_related("documents")
+    ],
+)
+
+
+# Objects read by the serializers of the deals: company of the application,
+# documents and reviews with the companies of their authors
+DEAL_PREFETCH_LOOKUPS = (
+    Prefetch("application__company", Company.objects.annotate_reviews()),
+    "application__images",
+    Prefetch(
+        "documents__company",
+        Company.objects.prefetch_for_serializer().prefetch_related(
+            "review_set"
+        ),
+    ),
+    # UserSerializer prefers the company owned by the user
+    Prefetch(
+        "reviews__created_by__my_company",
+        Company.objects.prefetch_for_serializer(),
+    ),
+    Prefetch(
+        "reviews__created_by__company",
+        Company.objects.prefetch_for_serializer(),
+    ),
+)
+
+
 class RecyclablesDealFilterSet(FilterSet):
     status = MultipleChoiceFilter(choices=DealStatus.choices)
     is_my = BooleanFilter(method="is_my_filter")
@@ -414,15 +536,16 @@ class RecyclablesDealFilterSet(FilterSet):
 class RecyclablesDealViewSet(
     DealDocumentGeneratorMixin,
     DocumentsMixin,
+    GenericPrefetchMixin,
     MultiSerializerMixin,
     viewsets.ModelViewSet,
 ):
     queryset = RecyclablesDeal.objects.select_related(
-        "application",
-        "application__recyclables",
-        "supplier_company",
-        "buyer_company",
-    ).prefetch_related("reviews")
+        "application__recyclables__category",
+        "supplier_company__city__region",
+        "buyer_company__city__region",
+    ).prefetch_related(*DEAL_PREFETCH_LOOKUPS)
+    generic_prefetch_lookups = (DEAL_TRANSPORT_APPLICATIONS_PREFETCH,)
     serializer_classes = {
         "list": RecyclablesDealSerializer,
         "retrieve": RecyclablesDealSerializer,
@@ -524,6 +647,7 @@ class EquipmentDealFilterSet(FilterSet):
 class EquipmentDealViewSet(
     DealDocumentGeneratorMixin,
     DocumentsMixin,
+    GenericPrefetchMixin,
     MultiSerializerMixin,
     viewsets.ModelViewSet,
 ):
@@ -533,6 +657,7 @@ class EquipmentDealViewSet(
         "supplier_company",
         "buyer_company",
     ).prefetch_related("reviews")
+    generic_prefetch_lookups = (DEAL_TRANSPORT_APPLICATIONS_PREFETCH,)
     serializer_classes = {
         "list": EquipmentDealSerializer,
         "retrieve": EquipmentDealSerializer,
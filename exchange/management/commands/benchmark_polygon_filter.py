@@ -0,0 +1,159 @@
+import math
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from shapely import Point, Polygon
+
+from company.models import Company
+from exchange.models import DealType, RecyclablesApplication, UrgencyType
+from exchange.services import (
+    filter_qs_by_coordinates,
+    filter_qs_by_polygon_vectorized,
+    get_latitude_borders,
+    get_longitude_borders,
+    parse_coordinates,
+)
+from product.models import Recyclables, RecyclablesCategory
+
+# Points of the applications are uniformly distributed in the area
+LATITUDE_RANGE = (50.0, 60.0)
+LONGITUDE_RANGE = (30.0, 50.0)
+
+
+def get_triangle() -> list:
+    return ["51,31", "59,40", "51,49"]
+
+
+def get_circle(edges: int) -> list:
+    return [
+        f"{55 + 4 * math.cos(2 * math.pi * i / edges)},"
+        f"{40 + 8 * math.sin(2 * math.pi * i / edges)}"
+        for i in range(edges)
+    ]
+
+
+def filter_in_python(qs, raw_coordinates):
+    """
+    Filtering by polygon as it was done before the database and vectorized
+    paths: every object of the bounding box is checked in Python
+    """
+    list_of_coordinates = parse_coordinates(raw_coordinates)
+    min_latitude, max_latitude = get_latitude_borders(list_of_coordinates)
+    min_longitude, max_longitude = get_longitude_borders(list_of_coordinates)
+    polygon = Polygon(list_of_coordinates)
+    qs = qs.filter(
+        latitude__gte=min_latitude,
+        latitude__lte=max_latitude,
+        longitude__gte=min_longitude,
+        longitude__lte=max_longitude,
+    )
+    filtered_ids = [
+        obj.pk
+        for obj in qs
+        if polygon.contains(Point(float(obj.latitude), float(obj.longitude)))
+    ]
+    return qs.filter(id__in=filtered_ids)
+
+
+def filter_vectorized(qs, raw_coordinates):
+    list_of_coordinates = parse_coordinates(raw_coordinates)
+    min_latitude, max_latitude = get_latitude_borders(list_of_coordinates)
+    min_longitude, max_longitude = get_longitude_borders(list_of_coordinates)
+    qs = qs.filter(
+        latitude__gte=min_latitude,
+        latitude__lte=max_latitude,
+        longitude__gte=min_longitude,
+        longitude__lte=max_longitude,
+    )
+    return filter_qs_by_polygon_vectorized(qs, list_of_coordinates)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures filtering of recyclables applications by polygon in a test "
+        "database: Python loop over the objects, ray casting expression "
+        "in the database and vectorized check of the coordinates"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--applications",
+            type=int,
+            default=100000,
+            help="Number of applications in the database",
+        )
+        parser.add_argument(
+            "--edges",
+            type=int,
+            default=200,
+            help="Number of edges of the large polygon",
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            self.create_applications(options["applications"])
+            self.benchmark(options["edges"])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+    def create_applications(self, count: int):
+        rand = random.Random(0)
+        company = Company.objects.create(name="Компания", inn="0000000000")
+        recyclables = Recyclables.objects.create(
+            name="Вторсырье",
+            category=RecyclablesCategory.objects.create(name="Категория"),
+        )
+        RecyclablesApplication.objects.bulk_create(
+            (
+                RecyclablesApplication(
+                    company=company,
+                    recyclables=recyclables,
+                    deal_type=DealType.SELL,
+                    urgency_type=UrgencyType.READY_FOR_SHIPMENT,
+                    price=Decimal(10),
+                    lot_size=1,
+                    latitude=Decimal(
+                        str(round(rand.uniform(*LATITUDE_RANGE), 6))
+                    ),
+                    longitude=Decimal(
+                        str(round(rand.uniform(*LONGITUDE_RANGE), 6))
+                    ),
+                )
+                for _ in range(count)
+            ),
+            batch_size=5000,
+        )
+
+    def benchmark(self, edges: int):
+        qs = RecyclablesApplication.objects.all()
+        polygons = (
+            ("triangle", get_triangle()),
+            (f"{edges}-edge circle", get_circle(edges)),
+        )
+        paths = (
+            ("Python loop", filter_in_python),
+            ("filter_qs_by_coordinates", filter_qs_by_coordinates),
+            ("vectorized", filter_vectorized),
+        )
+        for polygon_name, coordinates in polygons:
+            for path_name, filter_qs in paths:
+                started_at = time.perf_counter()
+                found = len(
+                    filter_qs(qs, coordinates).values_list("pk", flat=True)
+                )
+                duration = time.perf_counter() - started_at
+                self.stdout.write(
+                    f"{polygon_name}, {path_name}: {found} applications, "
+                    f"{duration:.2f}s"
+                )
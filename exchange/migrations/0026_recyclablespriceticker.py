@@ -0,0 +1,139 @@
+# Generated by Django 4.1.7 on 2026-10-17 12:07
+
+import common.model_fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+DEAL_STATUS_COMPLETED = 6
+
+
+def fill_price_tickers(apps, schema_editor):
+    RecyclablesDeal = apps.get_model("exchange", "RecyclablesDeal")
+    RecyclablesPriceTicker = apps.get_model(
+        "exchange", "RecyclablesPriceTicker"
+    )
+
+    deals = (
+        RecyclablesDeal.objects.filter(status=DEAL_STATUS_COMPLETED)
+        .order_by("application__recyclables_id", "-created_at")
+        .values_list("application__recyclables_id", "id", "price")
+    )
+
+    latest_deals = {}
+    for recyclables_id, deal_id, price in deals:
+        recyclables_deals = latest_deals.setdefault(recyclables_id, [])
+        if len(recyclables_deals) < 2:
+            recyclables_deals.append((deal_id, price))
+
+    to_create = []
+    for recyclables_id, recyclables_deals in latest_deals.items():
+        latest_deal_id, latest_price = recyclables_deals[0]
+        previous_price = (
+            recyclables_deals[1][1] if len(recyclables_deals) > 1 else None
+        )
+        deviation_percent = None
+        if previous_price:
+            deviation_percent = round(
+                (float(latest_price) - float(previous_price))
+                / float(previous_price)
+                * 100,
+                2,
+            )
+        to_create.append(
+            RecyclablesPriceTicker(
+                recyclables_id=recyclables_id,
+                latest_deal_id=latest_deal_id,
+                latest_price=latest_price,
+                previous_price=previous_price,
+                deviation_percent=deviation_percent,
+            )
+        )
+
+    RecyclablesPriceTicker.objects.bulk_create(to_create)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0005_remove_recyclables_recycling_code"),
+        ("exchange", "0025_alter_documentmodel_document_type"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecyclablesPriceTicker",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "latest_price",
+                    common.model_fields.AmountField(
+                        blank=True,
+                        decimal_places=2,
+                        default=None,
+                        max_digits=10,
+                        null=True,
+                        verbose_name="Цена последней сделки",
+                    ),
+                ),
+                (
+                    "previous_price",
+                    common.model_fields.AmountField(
+                        blank=True,
+                        decimal_places=2,
+                        default=None,
+                        max_digits=10,
+                        null=True,
+                        verbose_name="Цена предыдущей сделки",
+                    ),
+                ),
+                (
+                    "deviation_percent",
+                    models.FloatField(
+                        blank=True,
+                        null=True,
+                        verbose_name="Отклонение цены в %",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Дата обновления"
+                    ),
+                ),
+                (
+                    "latest_deal",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="exchange.recyclablesdeal",
+                        verbose_name="Последняя сделка",
+                    ),
+                ),
+                (
+                    "recyclables",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="price_ticker",
+                        to="product.recyclables",
+                        verbose_name="Вторсырье",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Котировка вторсырья",
+                "verbose_name_plural": "Котировки вторсырья",
+                "db_table": "recyclables_price_tickers",
+            },
+        ),
+        migrations.RunPython(fill_price_tickers, migrations.RunPython.noop),
+    ]
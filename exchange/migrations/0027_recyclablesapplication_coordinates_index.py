@@ -0,0 +1,20 @@
+# Generated by Django 4.1.7 on 2026-10-17 12:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exchange", "0026_recyclablespriceticker"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="recyclablesapplication",
+            index=models.Index(
+                fields=["latitude", "longitude"],
+                name="recyclables_latitud_6a4071_idx",
+            ),
+        ),
+    ]
@@ -14,10 +14,14 @@ from decimal import Decimal
 from django.db.models import (
     Case,
     When,
+    DecimalField,
     F,
     FloatField,
     Q,
+    ExpressionWrapper,
+    Sum,
 )
+from django.db.models.functions import Cast, Coalesce
 from django.urls import reverse
 
 from chat.models import Chat
@@ -164,6 +168,11 @@ class ApplicationStatus(models.IntegerChoices):
     DECLINED = 4, "Отклонена"
 
 
+# Total prices annotated by the querysets
+PRICE_FIELD = DecimalField(max_digits=20, decimal_places=2)
+WEIGHT_FIELD = DecimalField(max_digits=20, decimal_places=3)
+
+
 class RecyclablesApplicationQuerySet(
     BulkUpdateOrCreateQuerySet, models.QuerySet
 ):
@@ -185,27 +194,37 @@ class RecyclablesApplicationQuerySet(
             )
         )
 
-    # TODO: make this stuff working
-    #
-    # def annotate_price(self):
-    #     return self.annotate(
-    #         actual_price=ExpressionWrapper(
-    #             Case(
-    #                 When(
-    #                     urgency_type=UrgencyType.SUPPLY_CONTRACT,
-    #                     then=Coalesce(F("volume"), 0) * F("price")
-    #                 ),
-    #                 When(
-    #                     urgency_type=UrgencyType.READY_FOR_SHIPMENT,
-    #                     then=Coalesce(F("bale_count"), 0) * Coalesce(F("bale_weight"), 0) * F("price"),
-    #                 )
-    #             ),
-    #             output_field=IntegerField(),
-    #         ),
-    #     )
-    #
-    # def aggregate_total_price(self):
-    #     return self.annotate_price().aggregate(Sum("actual_price"))
+    def annotate_price(self, *args, **kwargs):
+        """
+        Annotates total price of application the same way as
+        RecyclablesApplication.total_price does it
+        """
+
+        def get_price(weight):
+            # Weight is a float, it's multiplied by price as Decimal
+            return ExpressionWrapper(
+                Cast(Coalesce(weight, 0.0), WEIGHT_FIELD) * F("price"),
+                output_field=PRICE_FIELD,
+            )
+
+        return self.annotate_total_weight().annotate(
+            actual_price=Case(
+                When(
+                    urgency_type=UrgencyType.SUPPLY_CONTRACT,
+                    then=get_price(F("volume")),
+                ),
+                When(
+                    urgency_type=UrgencyType.READY_FOR_SHIPMENT,
+                    then=get_price(F("total_weight")),
+                ),
+                output_field=PRICE_FIELD,
+            )
+        )
+
+    def aggregate_total_price(self) -> Decimal:
+        return self.annotate_price().aggregate(
+            total_price=Sum("actual_price", output_field=PRICE_FIELD)
+        )["total_price"] or Decimal("0")
 
 
 class BaseRecyclablesApplication(BaseModel):
@@ -320,6 +339,7 @@ class RecyclablesApplication(BaseRecyclablesApplication, ApplicationSaveMixin):
         verbose_name = "Заявка по вторсырью"
         verbose_name_plural = "Заявки по вторсырью"
         db_table = "recyclables_applications"
+        indexes = [models.Index(fields=["latitude", "longitude"])]
 
     @staticmethod
     def get_total_weight(application):
@@ -586,6 +606,87 @@ class RecyclablesDeal(DeliveryFieldsModelMixin, BaseRecyclablesApplication):
             deal_completed.send_robust(sender=self.__class__, instance=self)
 
 
+class RecyclablesPriceTicker(models.Model):
+    """
+    Denormalized prices of the last two completed deals by recyclables.
+    Maintained on deal completion, so the exchange board reads prices
+    with a join instead of querying deals for every recyclable
+    """
+
+    recyclables = models.OneToOneField(
+        "product.Recyclables",
+        verbose_name="Вторсырье",
+        on_delete=models.CASCADE,
+        related_name="price_ticker",
+    )
+    latest_deal = models.ForeignKey(
+        RecyclablesDeal,
+        verbose_name="Последняя сделка",
+        on_delete=models.SET_NULL,
+        related_name="+",
+        null=True,
+        blank=True,
+    )
+    latest_price = AmountField(
+        "Цена последней сделки", default=None, null=True, blank=True
+    )
+    previous_price = AmountField(
+        "Цена предыдущей сделки", default=None, null=True, blank=True
+    )
+    deviation_percent = models.FloatField(
+        "Отклонение цены в %", null=True, blank=True
+    )
+    updated_at = models.DateTimeField("Дата обновления", auto_now=True)
+
+    class Meta:
+        verbose_name = "Котировка вторсырья"
+        verbose_name_plural = "Котировки вторсырья"
+        db_table = "recyclables_price_tickers"
+
+    @staticmethod
+    def get_deviation_percent(latest_price, previous_price):
+        if latest_price is None or not previous_price:
+            return None
+        latest_price, previous_price = float(latest_price), float(
+            previous_price
+        )
+        return round(
+            (latest_price - previous_price) / previous_price * 100,
+            2,
+        )
+
+    @classmethod
+    def refresh(cls, recyclables_id):
+        """
+        Recalculates ticker of given recyclables from its completed deals
+        """
+        latest_deals = list(
+            RecyclablesDeal.objects.filter(
+                application__recyclables_id=recyclables_id,
+                status=DealStatus.COMPLETED,
+            )
+            .order_by("-created_at")
+            .values_list("id", "price")[:2]
+        )
+        latest_deal_id, latest_price = (
+            latest_deals[0] if latest_deals else (None, None)
+        )
+        previous_price = latest_deals[1][1] if len(latest_deals) > 1 else None
+
+        ticker, _ = cls.objects.update_or_create(
+            recyclables_id=recyclables_id,
+            defaults={
+                "latest_deal_id": latest_deal_id,
+                "latest_price": latest_price,
+                "previous_price": previous_price,
+                "deviation_percent": cls.get_deviation_percent(
+                    latest_price, previous_price
+                ),
+            },
+        )
+        return ticker
+
+
 class Review(BaseModel):
     rate = models.PositiveSmallIntegerField(
         verbose_name="Оценка",
@@ -795,6 +896,12 @@ class EquipmentDeal(BaseModel, DeliveryFieldsModelMixin):
     reviews = GenericRelation("Review")
 
     documents = GenericRelation("DocumentModel")
+    transport_applications = GenericRelation(
+        "logistics.TransportApplication",
+        related_query_name="equipment_deals",
+        content_type_field="content_type",
+        object_id_field="object_id",
+    )
 
     class Meta:
         verbose_name = "Сделка по оборудованию"
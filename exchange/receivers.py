@@ -0,0 +1,21 @@
+from django.dispatch import receiver
+
+from common.cache import invalidate_cached_responses
+from exchange.models import RecyclablesDeal, RecyclablesPriceTicker
+from exchange.signals import deal_completed, application_status_changed
+
+
+@receiver(deal_completed, sender=RecyclablesDeal)
+def handle_completed_deal(sender, instance: RecyclablesDeal, **kwargs):
+    # Keep the price ticker of deal recyclables up to date
+    RecyclablesPriceTicker.refresh(instance.application.recyclables_id)
+
+
+@receiver(deal_completed)
+def invalidate_deal_responses(sender, **kwargs):
+    invalidate_cached_responses(sender._meta.label)
+
+
+@receiver(application_status_changed)
+def invalidate_application_responses(sender, **kwargs):
+    invalidate_cached_responses(sender._meta.label)
@@ -1,7 +1,19 @@
+import json
+import operator
+from functools import reduce
 from typing import List, Tuple
 
+import numpy as np
+from django.db import connections
+from django.db.models import Case, F, FloatField, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Mod
 from rest_framework.exceptions import ValidationError
-from shapely import Polygon, Point
+from shapely import Polygon, contains_xy
+
+# Polygons with more edges are checked in Python, because ray casting
+# expression grows with every edge of polygon
+MAX_POLYGON_EDGES_IN_DATABASE = 64
 
 
 def parse_coordinates(raw_coordinates: List) -> List[List[float]]:
@@ -54,19 +66,107 @@ def validate_coordinates(coordinates: List[List[float]]):
         raise ValidationError("Некорректный формат ввода точек.")
 
 
+def get_polygon_edges(
+    list_of_coordinates: List[List[float]],
+) -> List[Tuple[List[float], List[float]]]:
+    """
+    Makes list of polygon edges (pairs of adjacent points), closing polygon
+    if it is not closed yet
+    """
+    return list(
+        zip(
+            list_of_coordinates,
+            list_of_coordinates[1:] + list_of_coordinates[:1],
+        )
+    )
+
+
+def get_polygon_crossings_expression(
+    list_of_coordinates: List[List[float]],
+    latitude_field: str = "latitude",
+    longitude_field: str = "longitude",
+):
+    """
+    Builds database expression which counts crossings of polygon edges
+    by a ray casted from the object point (ray casting algorithm).
+    Point is inside polygon if the number of crossings is odd.
+
+    Each edge (x1, y1) -> (x2, y2) is crossed if y1 <= y < y2 (or vice versa)
+    and x < x1 + (x2 - x1) * (y - y1) / (y2 - y1), where x is latitude and y is
+    longitude. Horizontal edges are never crossed, so they are skipped.
+    """
+    longitude = Cast(F(longitude_field), output_field=FloatField())
+    crossings = []
+    for (x1, y1), (x2, y2) in get_polygon_edges(list_of_coordinates):
+        if y1 == y2:
+            continue
+        slope = (x2 - x1) / (y2 - y1)
+        crossings.append(
+            Case(
+                When(
+                    Q(
+                        **{
+                            f"{longitude_field}__gte": min(y1, y2),
+                            f"{longitude_field}__lt": max(y1, y2),
+                            f"{latitude_field}__lt": Value(x1 - slope * y1)
+                            + Value(slope) * longitude,
+                        }
+                    ),
+                    then=Value(1),
+                ),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        )
+    if not crossings:
+        return Value(0, output_field=IntegerField())
+    return reduce(operator.add, crossings)
+
+
+def get_ids_subquery(ids: List[int], vendor: str) -> RawSQL:
+    """
+    Makes subquery which selects given ids from a single bound parameter,
+    so query size and parsing time do not depend on the number of ids
+    (unlike plain id__in with a parameter per id).
+    """
+    if vendor == "postgresql":
+        return RawSQL("SELECT unnest(%s::bigint[])", (ids,))
+    return RawSQL("SELECT value FROM json_each(%s)", (json.dumps(ids),))
+
+
+def filter_qs_by_polygon_vectorized(qs, list_of_coordinates):
+    """
+    Filters given queryset (which must be already filtered by polygon
+    borders) by polygon in Python.
+    Only ids and coordinates are fetched and checked at once with
+    vectorized shapely.contains_xy.
+    """
+    candidates = np.array(
+        qs.values_list("pk", "latitude", "longitude"),
+        dtype=float,
+    ).reshape(-1, 3)
+    mask = contains_xy(
+        Polygon(list_of_coordinates), candidates[:, 1], candidates[:, 2]
+    )
+    ids = candidates[mask, 0].astype(np.int64).tolist()
+    return qs.filter(pk__in=get_ids_subquery(ids, connections[qs.db].vendor))
+
+
 def filter_qs_by_coordinates(qs, raw_coordinates):
     """
     Filters given queryset by given coordinates.
     Returns objects that satisfies given borders.
+
+    Both checks are evaluated by database, so only the objects inside
+    polygon are ever fetched. Polygons with lots of edges are checked
+    with filter_qs_by_polygon_vectorized.
     """
     list_of_coordinates = parse_coordinates(raw_coordinates)
     validate_coordinates(list_of_coordinates)
     # Finding min and max for each coordinate
     min_latitude, max_latitude = get_latitude_borders(list_of_coordinates)
     min_longitude, max_longitude = get_longitude_borders(list_of_coordinates)
-    # Creating polygon from coordinates
-    polygon = Polygon(list_of_coordinates)
-    # Filtering firstly by extremum values
+    # Filtering firstly by extremum values (uses coordinates index)
     qs = qs.filter(
         latitude__gte=min_latitude,
         latitude__lte=max_latitude,
@@ -74,19 +174,12 @@ def filter_qs_by_coordinates(qs, raw_coordinates):
         longitude__lte=max_longitude,
     )
     # Secondly, check if objects in given polygon
-    filtered_ids = list(
-        map(
-            lambda filtered_recyclable: filtered_recyclable.pk,
-            filter(
-                lambda recyclable: polygon.contains(
-                    Point(
-                        float(recyclable.latitude),
-                        float(recyclable.longitude),
-                    )
-                ),
-                qs,
-            ),
+    if len(list_of_coordinates) > MAX_POLYGON_EDGES_IN_DATABASE:
+        return filter_qs_by_polygon_vectorized(qs, list_of_coordinates)
+
+    qs = qs.alias(
+        polygon_crossings=Mod(
+            get_polygon_crossings_expression(list_of_coordinates), Value(2)
         )
-    )
-    qs = qs.filter(id__in=filtered_ids)
+    ).filter(polygon_crossings=1)
     return qs
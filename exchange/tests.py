@@ -0,0 +1,84 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from chat.models import Chat
+from company.models import Company
+from exchange.models import (
+    DealType,
+    RecyclablesApplication,
+    RecyclablesDeal,
+    UrgencyType,
+)
+from product.models import Recyclables, RecyclablesCategory
+from user.models import UserRole
+
+User = get_user_model()
+
+
+class DealDocumentsAccessTest(APITestCase):
+    """
+    ZIP archive of the deal documents is available only to the companies
+    of the deal, its logist, admins and managers
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.supplier, cls.buyer, cls.stranger = (
+            User.objects.create(
+                phone=f"+7999000000{i}", role=UserRole.COMPANY_ADMIN
+            )
+            for i in range(3)
+        )
+        for i, user in enumerate((cls.supplier, cls.buyer, cls.stranger)):
+            user.company = Company.objects.create(
+                name=f"Компания {i}", inn=f"{i:010d}", owner=user
+            )
+            user.save()
+        cls.admin = User.objects.create(
+            phone="+79990000010", role=UserRole.ADMIN
+        )
+        cls.logist = User.objects.create(
+            phone="+79990000011", role=UserRole.LOGIST
+        )
+        recyclables = Recyclables.objects.create(
+            name="Вторсырье",
+            category=RecyclablesCategory.objects.create(name="Категория"),
+        )
+        application = RecyclablesApplication.objects.create(
+            company=cls.supplier.company,
+            recyclables=recyclables,
+            deal_type=DealType.SELL,
+            urgency_type=UrgencyType.READY_FOR_SHIPMENT,
+            price=Decimal(10),
+            lot_size=1,
+        )
+        cls.deal = RecyclablesDeal.objects.create(
+            supplier_company=cls.supplier.company,
+            buyer_company=cls.buyer.company,
+            application=application,
+            weight=100,
+            price=Decimal(10),
+            chat=Chat.objects.create(name="Сделка"),
+            created_by=cls.supplier,
+        )
+        cls.url = f"/api/recyclables_deals/{cls.deal.pk}/download_documents/"
+
+    def get_status_code(self, user) -> int:
+        self.client.force_authenticate(user)
+        return self.client.get(self.url).status_code
+
+    def test_anonymous(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_company_outside_deal(self):
+        self.assertEqual(self.get_status_code(self.stranger), 404)
+
+    def test_logist_outside_deal(self):
+        self.assertEqual(self.get_status_code(self.logist), 404)
+
+    def test_allowed(self):
+        for user in (self.supplier, self.buyer, self.admin):
+            with self.subTest(role=user.role):
+                self.assertEqual(self.get_status_code(user), 200)
@@ -1,33 +1,50 @@
 from datetime import datetime, timedelta
 from typing import Optional, Union
 
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Count
 from drf_yasg.utils import swagger_auto_schema
 from pydantic import BaseModel
 from rest_framework import viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import NotAuthenticated, PermissionDenied
+from rest_framework.exceptions import (
+    NotAuthenticated,
+    PermissionDenied,
+    ValidationError,
+)
 from rest_framework.generics import get_object_or_404
 from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from drf_yasg import openapi as api
 
+from common.prefetch import GenericPrefetch, prefetch_generic_related_objects
 from common.views import MultiSerializerMixin
+from common.zip_stream import get_zip_response
 from company.models import Company
 from document_generator.api.serializers import GeneratedDocumentSerializer
-from document_generator.common import get_or_generate_document
+from document_generator.common import (
+    get_archive_documents,
+    get_or_generate_document,
+)
 from document_generator.generators.document_generators import (
     InvoiceDocument,
     Act,
 )
 from document_generator.models import (
-    GeneratedDocumentType,
     GeneratedDocumentModel,
+    GeneratedDocumentStatus,
+    GeneratedDocumentType,
+)
+from document_generator.storage import deduplicate_document
+from document_generator.tasks import create_generation_task
+from exchange.models import (
+    EquipmentApplication,
+    RecyclablesApplication,
+    RecyclablesDeal,
 )
-from exchange.models import RecyclablesApplication, EquipmentApplication
 from exchange.utils import get_truncation_class
 from finance.api.models import ManagerPaymentsOutput, TotalForMonth
 from finance.api.serializers import (
@@ -66,7 +83,7 @@ class PseudoInvoice(BaseModel):
 
 
 class InvoicePaymentViewSet(MultiSerializerMixin, viewsets.ModelViewSet):
-    queryset = InvoicePayment.objects.all()
+    queryset = InvoicePayment.objects.prefetch_related("paymentorder_set")
     permission_classes = [IsAuthenticated]
     default_serializer_class = InvoicePaymentSerializer
     parser_classes = [MultiPartParser, FormParser]
@@ -126,6 +143,7 @@ class InvoicePaymentViewSet(MultiSerializerMixin, viewsets.ModelViewSet):
                     "object_id": invoice_payment.id,
                     "type": document_type,
                 },
+                requested_by=request.user,
             )
         else:
             invoice_payment = self.get_queryset()
@@ -148,20 +166,45 @@ class InvoicePaymentViewSet(MultiSerializerMixin, viewsets.ModelViewSet):
             )
             invoice = PseudoInvoice(deal=deal)
             # Get total sum of all unpaid invoice payments
-            generated_document = InvoiceDocument(
-                invoice
-            ).replace_all_and_save()
+            generator = InvoiceDocument(invoice)
+            if settings.DOCUMENT_GENERATION_ASYNC:
+                # One document file is shared by documents of all invoices
+                task = create_generation_task(generator, request.user)
+                generated_document = generator.output_file_name
+                content_hash = ""
+                document_status = GeneratedDocumentStatus.PENDING
+            else:
+                task = None
+                generated_document, content_hash = deduplicate_document(
+                    generator.replace_all_and_save()
+                )
+                document_status = GeneratedDocumentStatus.READY
             to_create = []
+            replaced_documents = models.Q()
             for item in invoice_payment:
-                content_type = ContentType.objects.get_for_model(item)
+                document_kwargs = {
+                    "type": GeneratedDocumentType.INVOICE_DOCUMENT,
+                    "content_type_id": item.content_type_id,
+                    "object_id": item.object_id,
+                    "company_id": item.company_id,
+                }
+                replaced_documents |= models.Q(**document_kwargs)
                 to_create.append(
                     GeneratedDocumentModel(
+                        **document_kwargs,
                         document=generated_document,
-                        type=GeneratedDocumentType.INVOICE_DOCUMENT,
-                        content_object=item.deal,
+                        content_hash=content_hash,
+                        status=document_status,
+                        task=task,
                     )
                 )
-            created = GeneratedDocumentModel.objects.bulk_create(to_create)
+            with transaction.atomic():
+                # Bill of the month replaces bills of the deals made before
+                if to_create:
+                    GeneratedDocumentModel.objects.filter(
+                        replaced_documents
+                    ).delete()
+                created = GeneratedDocumentModel.objects.bulk_create(to_create)
             if created:
                 return Response(GeneratedDocumentSerializer(created[-1]).data)
             return Response(None)
@@ -190,10 +233,65 @@ class InvoicePaymentViewSet(MultiSerializerMixin, viewsets.ModelViewSet):
                 "content_type": content_type,
                 "object_id": deal.id,
                 "type": document_type,
+                "company": request.user.company,
             },
+            requested_by=request.user,
         )
         return Response(GeneratedDocumentSerializer(document).data)
 
+    @swagger_auto_schema(
+        method="get",
+        manual_parameters=[
+            api.Parameter(
+                "ids",
+                api.IN_QUERY,
+                description="Идентификаторы платежей через запятую",
+                type=api.TYPE_STRING,
+                required=False,
+            )
+        ],
+    )
+    @action(detail=False, methods=["get"])
+    def download_documents(self, request, *args, **kwargs):
+        """
+        Получить ZIP-архив документов счетов и их сделок
+        """
+        user = self.request.user
+        if user.is_anonymous:
+            raise NotAuthenticated
+
+        invoices = self.get_queryset().filter(is_deleted=False)
+        ids = request.query_params.get("ids")
+        if ids:
+            try:
+                ids = [int(pk) for pk in ids.split(",")]
+            except ValueError:
+                raise ValidationError("ID платежей должны быть числами")
+            invoices = invoices.filter(pk__in=ids)
+        invoices = list(invoices.order_by("id"))
+        prefetch_generic_related_objects(invoices, "deal")
+
+        invoice_content_type = ContentType.objects.get_for_model(
+            InvoicePayment
+        )
+        folders = {}
+        for invoice in invoices:
+            if invoice.deal is not None:
+                folder = f"Сделка {invoice.deal.deal_number}"
+                folders[(invoice.content_type_id, invoice.object_id)] = folder
+            else:
+                folder = f"Счет {invoice.pk}"
+            folders[(invoice_content_type.pk, invoice.pk)] = folder
+
+        # Managers and admins get documents of all companies
+        documents = get_archive_documents(
+            folders,
+            company=user.company,
+            all_companies=user.role
+            in (UserRole.SUPER_ADMIN, UserRole.ADMIN, UserRole.MANAGER),
+        )
+        return get_zip_response(documents, "Документы по счетам.zip")
+
     @action(detail=True, methods=["post"])
     def send_payment_order(self, request, pk=None, *args, **kwargs):
         """
@@ -344,7 +442,17 @@ class InvoicePaymentViewSet(MultiSerializerMixin, viewsets.ModelViewSet):
         return Response(TotalForMonth(total=total).dict())
 
     def __get_totals(self, queryset):
-        total_sum_of_sells = sum(map(lambda x: x.deal.total_price, queryset))
+        invoices = list(queryset)
+        prefetch_generic_related_objects(
+            invoices,
+            GenericPrefetch(
+                "deal",
+                querysets=[
+                    RecyclablesDeal.objects.select_related("application")
+                ],
+            ),
+        )
+        total_sum_of_sells = sum(map(lambda x: x.deal.total_price, invoices))
         invoices_id = queryset.values_list("id", flat=True)
         orders = PaymentOrder.objects.filter(
             invoice_payment__id__in=invoices_id
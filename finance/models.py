@@ -1,3 +1,4 @@
+import datetime
 import uuid
 
 from django.contrib.contenttypes.fields import GenericForeignKey
@@ -40,6 +41,18 @@ class InvoicePaymentQuerySet(models.QuerySet):
         )
         return self.filter(created_at__gte=current_month_start_date)
 
+    def for_month(self, month_start_date: datetime.date):
+        """
+        Invoices created in the month starting from month_start_date
+        """
+        next_month_start_date = (
+            month_start_date + datetime.timedelta(days=31)
+        ).replace(day=1)
+        return self.filter(
+            created_at__date__gte=month_start_date,
+            created_at__date__lt=next_month_start_date,
+        )
+
 
 class InvoicePayment(BaseModel):
     is_read = models.BooleanField("Прочитано", default=False)
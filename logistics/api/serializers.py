@@ -1,5 +1,4 @@
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Q
 from rest_framework import serializers
 from rest_framework.generics import get_object_or_404
 
@@ -94,9 +93,23 @@ class TransportApplicationSerializer(
             and not self.context.get("request").user.is_anonymous
             and self.context.get("request").user.role == UserRole.LOGIST
         ):
-            my_offer = LogisticsOffer.objects.filter(
-                logist=self.context.get("request").user, application=instance
-            ).first()
+            if hasattr(instance, "logist_offers"):
+                # Prefetched by TransportApplicationQuerySet, my offer is
+                # the one logist_status is annotated by
+                offer_id = getattr(instance, "logist_offer_id", None)
+                my_offer = next(
+                    (
+                        offer
+                        for offer in instance.logist_offers
+                        if offer.pk == offer_id
+                    ),
+                    next(iter(instance.logist_offers), None),
+                )
+            else:
+                my_offer = LogisticsOffer.objects.filter(
+                    logist=self.context.get("request").user,
+                    application=instance,
+                ).first()
             if my_offer:
                 return LogisticsOfferSerializer(
                     my_offer, exclude=("application",)
@@ -321,14 +334,14 @@ class LogisticsOfferSerializer(NonNullDynamicFieldsModelSerializer):
         model = LogisticsOffer
 
     def get_chat(self, instance):
-        from chat.models import Chat
+        from chat.models import Chat, ChatReadCursor
 
         chat: Chat = instance.chat
         if (
             self.context
         ):  # FIXME: разобраться почему не передается контекст при создании оффера
             user = self.context["request"].user
-            chat.unread_count = chat.messages.filter(
-                Q(is_read=False) & ~Q(author=user)
-            ).count()
+            chat.unread_count = ChatReadCursor.objects.get_unread_count(
+                chat.pk, user
+            )
         return ChatSerializer(chat, context=self.context).data
@@ -23,7 +23,11 @@ from rest_framework.viewsets import GenericViewSet
 from rest_framework_nested.viewsets import NestedViewSetMixin
 
 from common.serializers import EmptySerializer
-from common.views import MultiSerializerMixin, DocumentsMixin
+from common.views import (
+    DocumentsMixin,
+    GenericPrefetchMixin,
+    MultiSerializerMixin,
+)
 from company.models import City, Region
 from document_generator.api.serializers import GeneratedDocumentSerializer
 from document_generator.common import get_or_generate_document
@@ -121,7 +125,9 @@ class TransportApplicationFilterBackend(filters.BaseFilterBackend):
             return queryset.none()
         if user.role == UserRole.LOGIST:
             # Annotate with custom status for logist
-            queryset = queryset.annotate_logist_status(user)
+            queryset = queryset.annotate_logist_status(
+                user
+            ).prefetch_logist_offers(user)
             logist_status_filter: list = request.query_params.getlist(
                 "logistStatus", None
             )
@@ -152,11 +158,15 @@ class TransportApplicationFilterBackend(filters.BaseFilterBackend):
 
 
 class TransportApplicationViewSet(
-    DocumentsMixin, MultiSerializerMixin, viewsets.ModelViewSet
+    DocumentsMixin,
+    GenericPrefetchMixin,
+    MultiSerializerMixin,
+    viewsets.ModelViewSet,
 ):
     queryset = TransportApplication.objects.select_related(
         "shipping_city", "delivery_city", "created_by"
-    )
+    ).prefetch_related("documents")
+    generic_prefetch_lookups = ("deal",)
     serializer_classes = {
         "list": TransportApplicationSerializer,
         "retrieve": TransportApplicationSerializer,
@@ -204,7 +214,9 @@ class TransportApplicationViewSet(
             "object_id": application.id,
         }
 
-        document = get_or_generate_document(generator, filter_kwargs)
+        document = get_or_generate_document(
+            generator, filter_kwargs, requested_by=request.user
+        )
         return Response(GeneratedDocumentSerializer(document).data)
 
     @action(
@@ -220,7 +232,9 @@ class TransportApplicationViewSet(
             "object_id": application.id,
         }
 
-        document = get_or_generate_document(generator, filter_kwargs)
+        document = get_or_generate_document(
+            generator, filter_kwargs, requested_by=request.user
+        )
         return Response(GeneratedDocumentSerializer(document).data)
 
     @action(detail=True, methods=["get"], description="Получение УПД")
@@ -234,7 +248,9 @@ class TransportApplicationViewSet(
             "type": GeneratedDocumentType.UNIFORM_TRANSPORTATION_DOCUMENT,
             "object_id": application.id,
         }
-        document = get_or_generate_document(generator, filter_kwargs)
+        document = get_or_generate_document(
+            generator, filter_kwargs, requested_by=request.user
+        )
         return Response(GeneratedDocumentSerializer(document).data)
 
     @action(detail=True, methods=["get"], description="ТТН")
@@ -247,7 +263,9 @@ class TransportApplicationViewSet(
             "type": GeneratedDocumentType.WAYBILL,
             "object_id": application.id,
         }
-        document = get_or_generate_document(generator, filter_kwargs)
+        document = get_or_generate_document(
+            generator, filter_kwargs, requested_by=request.user
+        )
         return Response(GeneratedDocumentSerializer(document).data)
 
 
@@ -8,10 +8,22 @@ from django.contrib.contenttypes.fields import (
 )
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
-from django.db.models import Case, When, Q, OuterRef, Value, Avg, Sum
+from django.db.models import (
+    Case,
+    When,
+    OuterRef,
+    Value,
+    Avg,
+    Sum,
+    Subquery,
+    Prefetch,
+    F,
+    FilteredRelation,
+    Q,
+)
 from phonenumber_field.modelfields import PhoneNumberField
 
-from chat.models import Chat
+from chat.models import Chat, ChatParticipant
 from common.model_fields import get_field_from_choices, AmountField
 from common.models import (
     BaseNameModel,
@@ -112,39 +124,56 @@ class TransportApplicationQuerySet(
     BulkUpdateOrCreateQuerySet, models.QuerySet
 ):
     def annotate_logist_status(self, user, *args, **kwargs):
-        return self.annotate(
+        """
+        Annotates status of the application for the logist and id of the
+        most relevant offer of the logist: approved, pending or declined.
+        The offer is selected by one subquery and joined, so its status is
+        read from the join
+        """
+        offer_status_priority = Case(
+            When(status=LogisticOfferStatus.APPROVED, then=Value(0)),
+            When(status=LogisticOfferStatus.PENDING, then=Value(1)),
+            default=Value(2),
+        )
+        logist_offers = LogisticsOffer.objects.filter(
+            logist=user, application=OuterRef("pk")
+        ).order_by(offer_status_priority, "pk")
+        return self.alias(
+            _logist_offer_id=Subquery(logist_offers.values("id")[:1]),
+            logist_offer=FilteredRelation(
+                "offers", condition=Q(offers__pk=F("_logist_offer_id"))
+            ),
+        ).annotate(
+            logist_offer_id=F("logist_offer__pk"),
             logist_status=Case(
                 When(
-                    condition=Q(
-                        id__in=LogisticsOffer.objects.filter(
-                            logist=user,
-                            application=OuterRef("pk"),
-                            status=LogisticOfferStatus.APPROVED,
-                        ).values("application")
-                    ),
+                    logist_offer__status=LogisticOfferStatus.APPROVED,
                     then=Value(LogistTransportApplicationStatus.APPROVED),
                 ),
                 When(
-                    condition=Q(
-                        id__in=LogisticsOffer.objects.filter(
-                            logist=user,
-                            application=OuterRef("pk"),
-                            status=LogisticOfferStatus.PENDING,
-                        ).values("application")
-                    ),
+                    logist_offer__status=LogisticOfferStatus.PENDING,
                     then=Value(LogistTransportApplicationStatus.PENDING),
                 ),
                 When(
-                    condition=Q(
-                        id__in=LogisticsOffer.objects.filter(
-                            logist=user,
-                            application=OuterRef("pk"),
-                            status=LogisticOfferStatus.DECLINED,
-                        ).values("application")
-                    ),
+                    logist_offer__status=LogisticOfferStatus.DECLINED,
                     then=Value(LogistTransportApplicationStatus.DECLINED),
                 ),
                 default=Value(LogistTransportApplicationStatus.NEW),
+            ),
+        )
+
+    def prefetch_logist_offers(self, user, *args, **kwargs):
+        """
+        Prefetches offers of the logist to the logist_offers attribute
+        """
+        return self.prefetch_related(
+            Prefetch(
+                "offers",
+                queryset=LogisticsOffer.objects.filter(logist=user)
+                .select_related("logist", "contractor", "chat")
+                .prefetch_related("contractor__documents")
+                .order_by("pk"),
+                to_attr="logist_offers",
             )
         )
 
@@ -319,3 +348,7 @@ class LogisticsOffer(BaseNameModel):
                 name=f"Предложение по логистике № {self.pk} к заявке № {self.application.pk}"
             )
             self.save()
+            ChatParticipant.objects.add_user(self.chat_id, self.logist_id)
+            ChatParticipant.objects.set_companies(
+                self.chat_id, [self.application.created_by.company_id]
+            )
@@ -3,6 +3,7 @@ from rest_framework import serializers
 
 from common.serializers import NonNullDynamicFieldsModelSerializer
 from notification.models import Notification
+from notification.push import push_notification_read
 
 from pydantic import BaseModel
 
@@ -46,6 +47,13 @@ class UpdateNotificationSerializer(NonNullDynamicFieldsModelSerializer):
         model = Notification
         fields = ("is_read",)
 
+    def update(self, instance, validated_data):
+        was_read = instance.is_read
+        instance = super().update(instance, validated_data)
+        if instance.is_read != was_read:
+            push_notification_read(instance, instance.is_read)
+        return instance
+
     def to_representation(self, instance):
         return NotificationSerializer().to_representation(instance)
 
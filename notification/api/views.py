@@ -5,28 +5,40 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
-from common.views import MultiSerializerMixin
+from chat.models import Message
+from common.pagination import CURSOR_MODE, PAGE_MODE
+from common.prefetch import GenericPrefetch
+from common.views import GenericPrefetchMixin, MultiSerializerMixin
 from notification.api.serializers import (
     NotificationSerializer,
     UpdateNotificationSerializer,
     NotificationCount,
 )
 from notification.models import Notification
+from notification.push import push_notification_read
 from user.models import UserRole
 
 
 class NotificationViewSet(
+    GenericPrefetchMixin,
     GenericViewSet,
     generics.RetrieveAPIView,
     generics.ListAPIView,
     generics.UpdateAPIView,
     MultiSerializerMixin,
 ):
-    queryset = Notification.objects.all()
+    pagination_modes = (PAGE_MODE, CURSOR_MODE)
+    queryset = Notification.objects.select_related("content_type")
     serializer_class = UpdateNotificationSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = (filters.SearchFilter,)
     search_fields = ("name",)
+    generic_prefetch_lookups = (
+        GenericPrefetch(
+            "content_object",
+            querysets=[Message.objects.select_related("chat")],
+        ),
+    )
     serializer_classes = {
         "list": NotificationSerializer,
         "retrieve": NotificationSerializer,
@@ -63,6 +75,7 @@ class NotificationViewSet(
         if not notification.is_read:
             notification.is_read = True
             notification.save()
+            push_notification_read(notification)
         return Response(NotificationSerializer(notification).data)
 
     @action(detail=False, methods=["GET"])
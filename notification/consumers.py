@@ -0,0 +1,42 @@
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from notification.push import (
+    ADMINS_GROUP_NAME,
+    get_company_group_name,
+    get_user_group_name,
+)
+from user.models import UserRole
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Pushes new notifications and changes of unread counters of
+    notifications and chats to the user
+    """
+
+    async def connect(self):
+        self.user = self.scope["user"]
+        if not self.user or self.user.is_anonymous:
+            await self.close()
+            return
+
+        self.group_names = [get_user_group_name(self.user.pk)]
+        if self.user.role == UserRole.COMPANY_ADMIN and self.user.company_id:
+            self.group_names.append(
+                get_company_group_name(self.user.company_id)
+            )
+        if self.user.role in (UserRole.ADMIN, UserRole.SUPER_ADMIN):
+            self.group_names.append(ADMINS_GROUP_NAME)
+
+        for group_name in self.group_names:
+            await self.channel_layer.group_add(group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        for group_name in getattr(self, "group_names", ()):
+            await self.channel_layer.group_discard(
+                group_name, self.channel_name
+            )
+
+    async def notification_push(self, event):
+        await self.send(text_data=event["text"])
@@ -0,0 +1,145 @@
+"""
+Push of notifications and unread counters to websockets.
+
+Users connected to `ws/notifications/` are added to the groups of the
+channel layer: their own group, group of their company for company admins
+and group of all notifications for admins. Events are sent to the groups
+of the users who see the notification or the chat in the API after the
+transaction creating it is committed, so clients don't need to poll
+the counters.
+"""
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from django.db.models import prefetch_related_objects
+
+from common.channel_layer import publish
+from common.encoders import encode_frame
+
+ADMINS_GROUP_NAME = "notifications_admins"
+
+
+def get_user_group_name(user_id: int) -> str:
+    return f"notifications_user_{user_id}"
+
+
+def get_company_group_name(company_id: int) -> str:
+    return f"notifications_company_{company_id}"
+
+
+def get_notification_group_names(notification) -> list:
+    """
+    Groups of the users seeing the notification in NotificationViewSet
+    """
+    group_names = [ADMINS_GROUP_NAME]
+    if notification.user_id:
+        group_names.append(get_user_group_name(notification.user_id))
+    if notification.company_id:
+        group_names.append(get_company_group_name(notification.company_id))
+        manager_id = notification.company.manager_id
+        if manager_id:
+            group_names.append(get_user_group_name(manager_id))
+    return group_names
+
+
+def send_to_groups(group_names: Iterable[str], payload: dict):
+    """
+    Sends payload to the websockets of the groups when the current
+    transaction is committed
+    """
+    publish(
+        group_names,
+        {"type": "notification.push", "text": encode_frame(payload)},
+    )
+
+
+def push_notifications(notifications: Iterable):
+    """
+    Sends new notifications to the groups of their users. Groups receiving
+    the same notifications share a frame: `notification` with a single
+    notification or `notifications` with the list of them
+    """
+    from notification.api.serializers import NotificationSerializer
+
+    notifications = list(notifications)
+    if not notifications:
+        return
+    prefetch_related_objects(
+        notifications, "company", "content_type", "content_object"
+    )
+    serialized = NotificationSerializer(notifications, many=True).data
+
+    group_indexes = defaultdict(list)
+    for index, notification in enumerate(notifications):
+        for group_name in get_notification_group_names(notification):
+            group_indexes[group_name].append(index)
+    frame_groups = defaultdict(list)
+    for group_name, indexes in group_indexes.items():
+        frame_groups[tuple(indexes)].append(group_name)
+
+    for indexes, group_names in frame_groups.items():
+        if len(indexes) == 1:
+            payload = {
+                "type": "notification",
+                "notification": serialized[indexes[0]],
+                "unread_count_delta": 1,
+            }
+        else:
+            payload = {
+                "type": "notifications",
+                "notifications": [serialized[index] for index in indexes],
+                "unread_count_delta": len(indexes),
+            }
+        send_to_groups(group_names, payload)
+
+
+def push_notification_read(notification, is_read: bool = True):
+    send_to_groups(
+        get_notification_group_names(notification),
+        {
+            "type": "notification_read",
+            "notification": notification.pk,
+            "is_read": is_read,
+            "unread_count_delta": -1 if is_read else 1,
+        },
+    )
+
+
+def push_chat_message(message, participants: Iterable[tuple]):
+    """
+    Notifies (company_id, user_id) participants of the chat about the new
+    message. Message doesn't change the counter of its author, so clients
+    skip messages of their user
+    """
+    group_names = [
+        get_company_group_name(company_id)
+        if company_id
+        else get_user_group_name(user_id)
+        for company_id, user_id in participants
+    ]
+    send_to_groups(
+        group_names,
+        {
+            "type": "chat_message",
+            "chat": message.chat_id,
+            "message": message.pk,
+            "author": message.author_id,
+            "unread_count_delta": 1,
+        },
+    )
+
+
+def push_chat_unread_count(
+    chat_id: int, user_id: int, unread_count: Optional[int]
+):
+    """
+    Sends new unread count of the chat to other connections of the user
+    """
+    send_to_groups(
+        [get_user_group_name(user_id)],
+        {
+            "type": "chat_read",
+            "chat": int(chat_id),
+            "unread_count": unread_count or 0,
+        },
+    )
@@ -22,6 +22,7 @@ from exchange.signals import (
 from logistics.models import TransportApplication
 from logistics.signals import transport_application_status_update
 from notification.models import Notification
+from notification.push import push_notifications
 from user.models import UserRole, Favorite
 
 User = get_user_model()
@@ -37,11 +38,12 @@ def handle_new_message(sender, instance: Message, created, **kwargs):
             else instance.chat.deal.buyer_company
         )
 
-        Notification.create_notification(
+        notification = Notification.create_notification(
             receiver_company,
             instance,
             message=f"Новое сообщение в {instance.chat.name}",
         )
+        push_notifications([notification])
 
 
 @receiver(post_save, sender=RecyclablesDeal)
@@ -50,11 +52,12 @@ def handle_new_recyclables_deal(
 ):
     if created:
         company = instance.application.company
-        Notification.create_notification(
+        notification = Notification.create_notification(
             company,
             instance,
             message=f"Новая сделка по заявке {instance.application.pk}",
         )
+        push_notifications([notification])
 
 
 @receiver(post_save, sender=EquipmentDeal)
@@ -63,11 +66,12 @@ def handle_new_equipment_deal(
 ):
     if created:
         company = instance.application.company
-        Notification.create_notification(
+        notification = Notification.create_notification(
             company,
             instance,
             message=f"Новая сделка по заявке {instance.application.pk}",
         )
+        push_notifications([notification])
 
 
 @receiver(verification_status_changed, sender=CompanyVerificationRequest)
@@ -80,11 +84,12 @@ def handle_verification_status_change(
         3: "Надежная",
         4: "Отклонена",
     }
-    Notification.create_notification(
+    notification = Notification.create_notification(
         instance.company,
         instance,
         message=f"Смена статуса заявки на верификацию: {mapping_notification_id_to_name.get(instance.status)}",
     )
+    push_notifications([notification])
 
 
 @receiver(recyclables_deal_status_changed, sender=RecyclablesDeal)
@@ -102,7 +107,7 @@ def handle_recyclables_deal_status_change(
             )
         )
 
-    Notification.objects.bulk_create(to_create)
+    push_notifications(Notification.objects.bulk_create(to_create))
 
 
 @receiver(transport_application_status_update, sender=TransportApplication)
@@ -132,7 +137,7 @@ def handle_transport_application_status_change(
             )
         )
 
-    Notification.objects.bulk_create(to_create)
+    push_notifications(Notification.objects.bulk_create(to_create))
 
 
 @receiver(post_save, sender=TransportApplication)
@@ -151,7 +156,7 @@ def handle_new_transport_application(
                 )
             )
 
-        Notification.objects.bulk_create(to_create)
+        push_notifications(Notification.objects.bulk_create(to_create))
 
 
 @receiver(post_save, sender=RecyclablesApplication)
@@ -177,7 +182,7 @@ def handle_new_recyclables_application(
             )
         )
 
-    Notification.objects.bulk_create(to_create)
+    push_notifications(Notification.objects.bulk_create(to_create))
 
 
 @receiver(post_save, sender=EquipmentApplication)
@@ -203,7 +208,7 @@ def handle_new_recyclables_application(
             )
         )
 
-    Notification.objects.bulk_create(to_create)
+    push_notifications(Notification.objects.bulk_create(to_create))
 
 
 @receiver(application_status_changed, sender=RecyclablesApplication)
@@ -220,7 +225,7 @@ def handle_recyclables_application_status_change(
         )
     )
 
-    Notification.objects.bulk_create(to_create)
+    push_notifications(Notification.objects.bulk_create(to_create))
 
 
 @receiver(application_status_changed, sender=EquipmentApplication)
@@ -237,4 +242,4 @@ def handle_recyclables_equipment_status_change(
         )
     )
 
-    Notification.objects.bulk_create(to_create)
+    push_notifications(Notification.objects.bulk_create(to_create))
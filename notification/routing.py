@@ -0,0 +1,7 @@
+from django.urls import re_path
+
+from notification import consumers
+
+websocket_urlpatterns = [
+    re_path(r"ws/notifications/", consumers.NotificationConsumer.as_asgi()),
+]
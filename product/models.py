@@ -5,7 +5,12 @@ from mptt.managers import TreeManager
 from mptt.models import MPTTModel
 
 from common.models import BaseNameModel, BaseNameDescModel
-from exchange.models import ApplicationStatus, DealType
+from exchange.models import (
+    ApplicationStatus,
+    DealType,
+    DealStatus,
+    RecyclablesDeal,
+)
 
 
 class CategoryManager(TreeManager):
@@ -89,6 +94,38 @@ class RecyclablesQuerySet(BulkUpdateOrCreateQuerySet, models.QuerySet):
             lot_size=models.Subquery(
                 applications.order_by("lot_size").values("lot_size")[:1]
             ),
+            latest_deal_price=models.F("price_ticker__latest_price"),
+            deviation_percent=models.F("price_ticker__deviation_percent"),
+        )
+
+    def annotate_period_deal_prices(
+        self, lower_date_bound=None, *args, **kwargs
+    ):
+        """
+        Annotates id and price of the first and the last completed deals
+        of the period, so that prices of all recyclables are fetched with
+        one query
+        """
+        deals_filter = {"status": DealStatus.COMPLETED}
+
+        if lower_date_bound:
+            deals_filter["application__created_at__gte"] = lower_date_bound
+
+        deals = RecyclablesDeal.objects.filter(
+            application__recyclables=models.OuterRef("pk"), **deals_filter
+        )
+        first_deals = deals.order_by("created_at", "id")
+        last_deals = deals.order_by("-created_at", "-id")
+
+        return self.annotate(
+            period_first_deal_id=models.Subquery(first_deals.values("id")[:1]),
+            period_first_deal_price=models.Subquery(
+                first_deals.values("price")[:1]
+            ),
+            period_last_deal_id=models.Subquery(last_deals.values("id")[:1]),
+            period_last_deal_price=models.Subquery(
+                last_deals.values("price")[:1]
+            ),
         )
 
 
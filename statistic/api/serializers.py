@@ -1,65 +1,22 @@
 from common.serializers import NonNullDynamicFieldsModelSerializer
 from exchange.api.serializers import ExchangeRecyclablesSerializer
-from exchange.models import RecyclablesDeal, DealStatus, RecyclablesApplication
+from exchange.models import RecyclablesApplication, RecyclablesPriceTicker
 from product.models import Recyclables
 
 
 class RecyclablesStatisticsSerializer(ExchangeRecyclablesSerializer):
     def get_deviation_percent(self, instance: Recyclables):
-        lower_date_bound = self.context.get("lower_date_bound")
-        additional_filters = {}
+        # Annotated in RecyclablesQuerySet.annotate_period_deal_prices()
+        first_deal_id = getattr(instance, "period_first_deal_id", None)
+        last_deal_id = getattr(instance, "period_last_deal_id", None)
 
-        if lower_date_bound:
-            additional_filters[
-                "application__created_at__gte"
-            ] = lower_date_bound
-
-        # FIXME: Попробовать сделать через аннотации в get_queryset
-        try:
-            latest_deal = RecyclablesDeal.objects.filter(
-                application__recyclables=instance,
-                status=DealStatus.COMPLETED,
-                **additional_filters,
-            ).latest("created_at")
-        except RecyclablesDeal.DoesNotExist:
-            latest_deal = None
-
-        if not latest_deal:
-            return None
-
-        try:
-            first_deal = (
-                RecyclablesDeal.objects.filter(
-                    application__recyclables=instance,
-                    status=DealStatus.COMPLETED,
-                    **additional_filters,
-                )
-                .exclude(pk=latest_deal.pk)
-                .earliest("created_at")
-            )
-        except RecyclablesDeal.DoesNotExist:
-            first_deal = None
-
-        if not first_deal:
+        if first_deal_id is None or first_deal_id == last_deal_id:
             return None
 
-        latest_deal_price = float(latest_deal.price)
-        pre_latest_deal_price = float(first_deal.price)
-        return round(
-            (latest_deal_price - pre_latest_deal_price)
-            / pre_latest_deal_price
-            * 100,
-            2,
+        return RecyclablesPriceTicker.get_deviation_percent(
+            instance.period_last_deal_price, instance.period_first_deal_price
         )
 
-    def get_deviation(self, instance: Recyclables):
-        deviation_percent = self.get_deviation_percent(instance)
-        if not deviation_percent or deviation_percent == 0:
-            return 0
-        if deviation_percent > 0:
-            return 1
-        return -1
-
 
 class RecyclablesApplicationStatisticsSerializer(
     NonNullDynamicFieldsModelSerializer
@@ -7,6 +7,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
+from common.cache import cache_response
 from common.serializers import EmptySerializer
 from company.models import Company, RecyclingCollectionType
 from exchange.api.views import (
@@ -129,15 +130,23 @@ class StatisticsViewSet(GenericViewSet):
         ]
     )
     @action(methods=["get"], detail=False)
+    @cache_response(
+        depends_on=(
+            "product.Recyclables",
+            "exchange.RecyclablesApplication",
+            "exchange.RecyclablesDeal",
+        )
+    )
     def recyclables_price(self, request):
-        recyclables = self.filter_queryset(self.get_queryset())
         period = validate_period(request.query_params.get("period", "all"))
+        lower_date_bound = get_lower_date_bound(period)
 
-        serializer_context = self.get_serializer_context()
-        serializer_context["lower_date_bound"] = get_lower_date_bound(period)
+        recyclables = self.filter_queryset(
+            self.get_queryset()
+        ).annotate_period_deal_prices(lower_date_bound)
 
         data = RecyclablesStatisticsSerializer(
-            recyclables, many=True, context=serializer_context
+            recyclables, many=True, context=self.get_serializer_context()
         )
         return Response(data.data)
 
@@ -153,6 +162,12 @@ class StatisticsViewSet(GenericViewSet):
         ]
     )
     @action(methods=["get"], detail=False)
+    @cache_response(
+        depends_on=(
+            "exchange.RecyclablesApplication",
+            "product.Recyclables",
+        )
+    )
     def recyclables_volume(self, request):
         period = validate_period(request.query_params.get("period", "all"))
 
@@ -193,6 +208,7 @@ class StatisticsViewSet(GenericViewSet):
         ]
     )
     @action(methods=["get"], detail=False)
+    @cache_response(depends_on=("exchange.RecyclablesApplication",))
     def total_applications(self, request):
         qs = self.filter_queryset(self.get_queryset())
 
@@ -209,6 +225,13 @@ class StatisticsViewSet(GenericViewSet):
         return Response(TotalResponse(total=total, graph=graph_data).dict())
 
     @action(detail=False, methods=["get"])
+    @cache_response(
+        depends_on=(
+            "company.Company",
+            "company.CompanyActivityType",
+            "company.RecyclingCollectionType",
+        )
+    )
     def total_companies(self, request):
         company_qs = self.get_queryset()
 
@@ -246,6 +269,7 @@ class StatisticsViewSet(GenericViewSet):
         ]
     )
     @action(methods=["get"], detail=False)
+    @cache_response(depends_on=("exchange.RecyclablesDeal",))
     def total_deals(self, request):
         period = validate_period(request.query_params.get("period", "all"))
 
@@ -270,6 +294,7 @@ class StatisticsViewSet(GenericViewSet):
         return Response(response.dict())
 
     @action(detail=False, methods=["get"])
+    @cache_response(depends_on=("user.User",))
     def total_employee(self, request):
         users_qs = self.get_queryset()
 
@@ -291,6 +316,12 @@ class StatisticsViewSet(GenericViewSet):
         return Response(response.dict())
 
     @action(detail=False, methods=["get"])
+    @cache_response(
+        depends_on=(
+            "user.User",
+            "company.Company",
+        )
+    )
     def all_users(self, request):
         qs = self.get_queryset().order_by("-created_at")
 
@@ -316,9 +347,12 @@ class StatisticsViewSet(GenericViewSet):
         return response
 
     @action(detail=False, methods=["get"])
+    @cache_response(depends_on=("exchange.RecyclablesApplication",))
     def exchange_volume(self, request):
-        qs = self.get_queryset()
-        total_price = sum(list(map(lambda x: x.total_price, qs)))
+        # Total weight is annotated before filtering to support
+        # total_weight__gte/lte filters of RecyclablesApplicationFilterSet
+        qs = self.filter_queryset(self.get_queryset().annotate_total_weight())
+        total_price = qs.aggregate_total_price()
         response_data = ExchangeVolume(total=total_price)
 
         return Response(response_data.dict())